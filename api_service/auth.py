@@ -1,12 +1,18 @@
 # auth.py
 import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from fastapi import APIRouter, HTTPException, status, Depends, Form
+from fastapi import APIRouter, HTTPException, Request, status, Depends, Form
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from jose import jwt
 from argon2 import PasswordHasher, exceptions as argon2_exceptions
 from dotenv import load_dotenv
-from database import get_postgres_connection
+from database import postgres_connection
+from timing import span
+from ratelimit import LOGIN_IP, LOGIN_USERNAME, client_ip, rate_limiter
 
 load_dotenv()
 
@@ -16,31 +22,75 @@ SECRET_KEY = os.getenv("SECRET_KEY", "change-this-secret-in-prod")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Each verify holds 64 MiB, so concurrent hashes are capped by the worker
+# count and logins beyond workers + pending are rejected with 429.
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "2"))
+AUTH_HASH_MAX_PENDING = int(os.getenv("AUTH_HASH_MAX_PENDING", "8"))
+AUTH_RETRY_AFTER_SECONDS = os.getenv("AUTH_RETRY_AFTER_SECONDS", "1")
+
 ph = PasswordHasher(time_cost=3, memory_cost=65536, parallelism=4)
 
-def authenticate_user(username: str, password: str):
-    conn = get_postgres_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT password_hash, is_active FROM public.kyc_api_users WHERE username = %s LIMIT 1",
-        (username,)
-    )
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+_hash_executor = ThreadPoolExecutor(
+    max_workers=AUTH_HASH_WORKERS,
+    thread_name_prefix="argon2",
+)
+_hash_slots = threading.BoundedSemaphore(AUTH_HASH_WORKERS + AUTH_HASH_MAX_PENDING)
 
-    if not row:
-        return None
 
-    stored_hash, is_active = row
-    if not is_active:
-        return None
+def shutdown_hash_executor():
+    _hash_executor.shutdown(wait=True)
+
 
+def _fetch_api_user(username: str):
+    with postgres_connection() as conn:
+        cur = conn.cursor()
+        try:
+            with span("postgres_query"):
+                cur.execute(
+                    "SELECT password_hash, is_active FROM public.kyc_api_users WHERE username = %s LIMIT 1",
+                    (username,)
+                )
+                return cur.fetchone()
+        finally:
+            cur.close()
+
+
+def _verify_hash(stored_hash: str, password: str) -> bool:
     try:
-        ph.verify(stored_hash, password)
+        return ph.verify(stored_hash, password)
     except argon2_exceptions.VerifyMismatchError:
-        return None
+        return False
     except Exception:
+        return False
+
+
+async def authenticate_user(username: str, password: str):
+    # Reserve a hashing slot up front so a saturated pool rejects fast,
+    # before any database or CPU work is done for the request.
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts in progress, retry shortly",
+            headers={"Retry-After": AUTH_RETRY_AFTER_SECONDS},
+        )
+
+    try:
+        row = await run_in_threadpool(_fetch_api_user, username)
+
+        if not row:
+            return None
+
+        stored_hash, is_active = row
+        if not is_active:
+            return None
+
+        loop = asyncio.get_running_loop()
+        with span("password_hash"):
+            verified = await loop.run_in_executor(_hash_executor, _verify_hash, stored_hash, password)
+    finally:
+        _hash_slots.release()
+
+    if not verified:
         return None
 
     return {"username": username}
@@ -52,8 +102,13 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
+    await rate_limiter.check(
+        (LOGIN_IP, client_ip(request)),
+        (LOGIN_USERNAME, form_data.username.strip().lower()),
+    )
+
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
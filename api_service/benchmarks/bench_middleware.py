@@ -0,0 +1,99 @@
+"""
+Microbenchmark: per-request overhead of jwt_middleware.
+
+Compares the previous implementation (list scan + jwt.decode on every
+request) with the current one (prefix tuple + verified-token cache).
+
+Usage (from api_service/):
+    python -m benchmarks.bench_middleware [iterations]
+"""
+import os
+import sys
+import time
+import asyncio
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("BACKEND_TOKEN", "bench-backend-token")
+
+from jose import jwt, JWTError
+from starlette.requests import Request
+
+import middleware
+
+
+def _legacy_middleware():
+    """
+    The middleware as it was before the token cache was added
+    """
+    protected = ["/mssql"]
+
+    async def legacy(request, call_next):
+        path = request.url.path
+        if not any(path.startswith(p) for p in protected):
+            return await call_next(request)
+
+        token = request.headers.get("Authorization").split(" ")[1]
+        if token == middleware.BACKEND_TOKEN:
+            request.state.user = "django-backend"
+            return await call_next(request)
+
+        try:
+            payload = jwt.decode(token, middleware.SECRET_KEY, algorithms=[middleware.ALGORITHM])
+            request.state.user = payload.get("sub")
+        except JWTError:
+            return None
+        return await call_next(request)
+
+    return legacy
+
+
+def _request(path, token):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "server": ("bench", 80),
+        "scheme": "http",
+        "root_path": "",
+    }
+    return Request(scope)
+
+
+async def _call_next(request):
+    return getattr(request.state, "user", None)
+
+
+async def _run(fn, path, token, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await fn(_request(path, token), _call_next)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def main(iterations):
+    token = jwt.encode(
+        {"sub": "bench-user", "exp": datetime.utcnow() + timedelta(minutes=30)},
+        middleware.SECRET_KEY,
+        algorithm=middleware.ALGORITHM,
+    )
+    legacy = _legacy_middleware()
+
+    cases = [
+        ("JWT, /mssql route", "/mssql/newpolicies", token),
+        ("backend token", "/mssql/newpolicies", middleware.BACKEND_TOKEN),
+        ("unprotected route", "/otp/send", token),
+    ]
+
+    print(f"{'case':<22}{'before (us/req)':>18}{'after (us/req)':>18}")
+    for label, path, tok in cases:
+        middleware.token_cache.clear()
+        before = await _run(legacy, path, tok, iterations)
+        after = await _run(middleware.jwt_middleware, path, tok, iterations)
+        print(f"{label:<22}{before:>18.2f}{after:>18.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
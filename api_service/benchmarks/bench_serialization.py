@@ -0,0 +1,73 @@
+"""
+Benchmark: serialization time and payload size for policy list responses.
+
+Builds a synthetic result of trusted policy rows and compares the previous
+path (per-row PolicyOut validation + stdlib JSON) with the current one
+(plain dicts + orjson), then reports compressed sizes.
+
+Usage (from api_service/):
+    python -m benchmarks.bench_serialization [rows]
+"""
+import sys
+import gzip
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from mssql_routes import PolicyOut
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def synthetic_rows(count):
+    return [
+        {
+            "PolicyNo": f"POL{i:08d}",
+            "FirstName": "Ram",
+            "LastName": "Sharma",
+            "DOB": "1990-01-15",
+            "Mobile": f"98{i:08d}",
+            "BranchCode": i % 120,
+            "BranchName": "Kathmandu Branch",
+            "ClientNo": f"C{i:09d}",
+            "NewClientId": None,
+        }
+        for i in range(count)
+    ]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(count):
+    rows = synthetic_rows(count)
+
+    before, before_ms = _timed(
+        lambda: JSONResponse(jsonable_encoder([PolicyOut(**r) for r in rows])).body
+    )
+    after, after_ms = _timed(lambda: ORJSONResponse(rows).body)
+
+    print(f"rows: {count}")
+    print(f"{'path':<36}{'time (ms)':>12}{'bytes':>14}")
+    print(f"{'PolicyOut + stdlib json (before)':<36}{before_ms:>12.1f}{len(before):>14,}")
+    print(f"{'dicts + orjson (after)':<36}{after_ms:>12.1f}{len(after):>14,}")
+
+    gz, gz_ms = _timed(lambda: gzip.compress(after, compresslevel=9))
+    print(f"{'  + gzip (level 9)':<36}{gz_ms:>12.1f}{len(gz):>14,}")
+
+    if brotli is not None:
+        br, br_ms = _timed(lambda: brotli.compress(after, quality=4))
+        print(f"{'  + brotli (quality 4)':<36}{br_ms:>12.1f}{len(br):>14,}")
+    else:
+        print("  brotli not installed; skipping")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,260 @@
+"""
+Local stand-in databases for load tests and benchmarks.
+
+`FakeMSSQL` is a pyodbc-shaped connection factory backed by a seeded
+SQLite file: it rewrites the few T-SQL constructs the statement registry
+uses (TOP, VALUES row constructors) and returns rows with attribute access
+like pyodbc.Row. `FakePostgres` serves the `kyc_api_users` lookup used by
+/auth/login. An optional per-execute delay stands in for network latency.
+
+When the real pyodbc (or its ODBC driver) can't be imported, call
+`install_pyodbc_shim()` before importing the app.
+"""
+import re
+import sys
+import time
+import types
+import random
+import sqlite3
+from datetime import date, timedelta
+
+FIRST_NAMES = ("Ram", "Sita", "Hari", "Gita", "Krishna", "Laxmi", "Bishnu", "Parvati")
+LAST_NAMES = ("Sharma", "Shrestha", "Thapa", "Adhikari", "Gurung", "Karki", "Rai", "Tamang")
+BRANCHES = 120
+
+
+class Error(Exception):
+    pass
+
+
+def install_pyodbc_shim():
+    """
+    Registers a minimal `pyodbc` module (just `Error`) if the real one
+    can't load, so mssql_routes imports without an ODBC driver
+    """
+    try:
+        import pyodbc  # noqa: F401
+    except ImportError:
+        shim = types.ModuleType("pyodbc")
+        shim.Error = Error
+        sys.modules["pyodbc"] = shim
+    return sys.modules["pyodbc"]
+
+
+# -------------------------------------------------
+# SEEDING
+# -------------------------------------------------
+def synthetic_policy(i, rng):
+    dob = date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 55))
+    return (
+        f"POL{i:08d}",
+        rng.choice(FIRST_NAMES),
+        rng.choice(LAST_NAMES),
+        dob.isoformat(),
+        f"98{rng.randrange(10 ** 8):08d}",
+        f"C{i:09d}",
+        None,
+        i % BRANCHES,
+    )
+
+
+def synthetic_keys(rows, seed=42):
+    """
+    The (policy_no, dob) pairs `seed_mssql` writes for the same arguments
+    """
+    rng = random.Random(seed)
+    return [(p[0], p[3]) for p in (synthetic_policy(i, rng) for i in range(rows))]
+
+
+def seed_mssql(path, rows, seed=42):
+    """
+    Creates tblInsureddetail/tblBranch with `rows` synthetic policies and
+    returns [(policy_no, dob)] for every row
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        DROP TABLE IF EXISTS tblInsureddetail;
+        DROP TABLE IF EXISTS tblBranch;
+        CREATE TABLE tblInsureddetail (
+            policyno TEXT PRIMARY KEY, firstname TEXT, lastname TEXT, dob TEXT,
+            mobile TEXT, ClientNo TEXT, NewClientId TEXT, branch INTEGER
+        );
+        CREATE TABLE tblBranch (Branch INTEGER PRIMARY KEY, BranchName TEXT);
+    """)
+    conn.executemany(
+        "INSERT INTO tblBranch VALUES (?, ?)",
+        [(b, f"Branch {b}") for b in range(BRANCHES)],
+    )
+
+    keys = []
+    batch = []
+    for i in range(rows):
+        row = synthetic_policy(i, rng)
+        keys.append((row[0], row[3]))
+        batch.append(row)
+        if len(batch) >= 10000:
+            conn.executemany("INSERT INTO tblInsureddetail VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO tblInsureddetail VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+
+    conn.execute("CREATE INDEX ix_insured_identity ON tblInsureddetail (firstname, lastname, dob, mobile)")
+    conn.commit()
+    conn.close()
+    return keys
+
+
+def seed_postgres(path, users):
+    """
+    `users` is {username: argon2 hash}
+    """
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        DROP TABLE IF EXISTS kyc_api_users;
+        CREATE TABLE kyc_api_users (username TEXT PRIMARY KEY, password_hash TEXT, is_active INTEGER);
+    """)
+    conn.executemany(
+        "INSERT INTO kyc_api_users VALUES (?, ?, 1)",
+        list(users.items()),
+    )
+    conn.commit()
+    conn.close()
+
+
+# -------------------------------------------------
+# PYODBC-SHAPED CONNECTION
+# -------------------------------------------------
+class Row(tuple):
+    """
+    Tuple with case-insensitive attribute access, like pyodbc.Row
+    """
+
+    def __new__(cls, columns, values):
+        row = super().__new__(cls, values)
+        row._columns = columns
+        return row
+
+    def __getattr__(self, name):
+        try:
+            return self[self._columns[name.lower()]]
+        except KeyError:
+            raise AttributeError(name)
+
+
+_TOP_PARAM = re.compile(r"SELECT\s+TOP\s*\(\?\)", re.IGNORECASE)
+_TOP_N = re.compile(r"SELECT\s+TOP\s+(\d+)\s(.*?)(\)\s*SELECT|$)", re.IGNORECASE | re.DOTALL)
+_VALUES_ALIAS = re.compile(r"\(VALUES (.*?)\)\s+AS\s+(\w+)\((\w+),\s*(\w+)\)", re.IGNORECASE | re.DOTALL)
+
+
+def translate(sql, params):
+    """
+    Rewrites the T-SQL used by statements.py into SQLite
+    """
+    params = list(params)
+
+    if _TOP_PARAM.search(sql):
+        # TOP (?) binds first; SQLite's LIMIT ? binds last
+        sql = _TOP_PARAM.sub("SELECT", sql, count=1) + " LIMIT ?"
+        params = params[1:] + params[:1]
+
+    sql = _TOP_N.sub(lambda m: f"SELECT {m.group(2)} LIMIT {m.group(1)}{m.group(3)}", sql)
+    sql = _VALUES_ALIAS.sub(
+        lambda m: (
+            f"(SELECT column1 AS {m.group(3)}, column2 AS {m.group(4)} "
+            f"FROM (VALUES {m.group(1)})) AS {m.group(2)}"
+        ),
+        sql,
+    )
+    return sql, params
+
+
+class FakeCursor:
+    def __init__(self, conn, latency):
+        self._cursor = conn.cursor()
+        self._latency = latency
+        self._columns = {}
+        self.description = None
+
+    def execute(self, sql, params=()):
+        if self._latency:
+            time.sleep(self._latency)
+
+        sql, params = translate(sql, params)
+        try:
+            self._cursor.execute(sql, params)
+        except sqlite3.Error as e:
+            raise sys.modules["pyodbc"].Error(str(e)) from e
+
+        self.description = self._cursor.description
+        self._columns = {d[0].lower(): i for i, d in enumerate(self.description or ())}
+        return self
+
+    def _wrap(self, values):
+        return Row(self._columns, values)
+
+    def fetchone(self):
+        values = self._cursor.fetchone()
+        return None if values is None else self._wrap(values)
+
+    def fetchall(self):
+        return [self._wrap(v) for v in self._cursor.fetchall()]
+
+    def fetchmany(self, size):
+        return [self._wrap(v) for v in self._cursor.fetchmany(size)]
+
+    def nextset(self):
+        return False
+
+    def close(self):
+        self._cursor.close()
+
+
+class FakeConnection:
+    def __init__(self, path, latency=0.0, cursor_cls=FakeCursor):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._latency = latency
+        self._cursor_cls = cursor_cls
+
+    def cursor(self):
+        return self._cursor_cls(self._conn, self._latency)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+class FakeMSSQL:
+    """
+    Connection factory for `mssql_pool.creator`
+    """
+
+    def __init__(self, path, latency=0.0):
+        self.path = path
+        self.latency = latency
+
+    def __call__(self):
+        return FakeConnection(self.path, self.latency)
+
+
+# -------------------------------------------------
+# PSYCOPG2-SHAPED CONNECTION
+# -------------------------------------------------
+class FakePgCursor(FakeCursor):
+    def execute(self, sql, params=()):
+        sql = sql.replace("%s", "?").replace("public.", "")
+        return super().execute(sql, params)
+
+
+class FakePostgres(FakeMSSQL):
+    """
+    Connection factory for `pg_pool.creator`
+    """
+
+    def __call__(self):
+        return FakeConnection(self.path, self.latency, FakePgCursor)
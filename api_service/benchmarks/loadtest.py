@@ -0,0 +1,339 @@
+"""
+Load test: drives the hot endpoints at a fixed request rate and reports
+latency percentiles and error rates.
+
+By default the app is started in-process on a local port with its
+backends replaced by stand-ins (see benchmarks/fakedb.py):
+  - MSSQL: SQLite seeded with --rows synthetic insured rows
+  - Postgres: SQLite holding one API user for /auth/login
+  - Sparrow SMS: an httpx mock transport answering after --gateway-latency
+Pools, caches, executors, middleware and serialization are the real ones,
+so the numbers move with changes to them. Pass --url to drive an already
+running server instead (no stand-ins are installed then); a server
+started with --serve holds the same synthetic rows for the same --rows.
+
+The in-process server shares the interpreter (and GIL) with the load
+generator; for CPU-bound comparisons run --serve and --url as separate
+processes.
+
+Load is open-loop: requests are fired on schedule whether or not earlier
+ones finished, and latency is measured from the scheduled send time so a
+stalled server can't hide its queueing delay.
+
+Usage (from api_service/):
+    python -m benchmarks.loadtest [--rows 50000] [--rps 50] [--duration 20]
+        [--scenarios newpolicies,validate,login=2,otp=10]
+        [--max-p95 MS] [--max-error-rate PCT] [--json]
+    python -m benchmarks.loadtest --serve [--port 8000] [--rows 50000]
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 [--rows 50000]
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+
+import httpx
+
+from benchmarks import fakedb
+
+LOADTEST_USER = os.getenv("LOADTEST_USER", "loadtest")
+LOADTEST_PASSWORD = os.getenv("LOADTEST_PASSWORD", "loadtest-password")
+BACKEND_TOKEN = os.environ.setdefault("BACKEND_TOKEN", "loadtest-backend-token")
+
+
+# -------------------------------------------------
+# SCENARIOS
+# -------------------------------------------------
+class Scenario:
+    """
+    Builds one request per call; `expected` statuses count as success
+    """
+
+    def __init__(self, name, build, expected=(200,)):
+        self.name = name
+        self.build = build
+        self.expected = frozenset(expected)
+
+
+def _policy_key(keys, miss_rate, rng):
+    if rng.random() < miss_rate:
+        return f"MISS{rng.randrange(10 ** 8):08d}", "1970-01-01"
+    return rng.choice(keys)
+
+
+def build_scenarios(keys, miss_rate):
+    auth = {"Authorization": f"Bearer {BACKEND_TOKEN}"}
+
+    def newpolicies(rng):
+        policy_no, dob = _policy_key(keys, miss_rate, rng)
+        return "GET", "/mssql/newpolicies", {"params": {"policy_no": policy_no, "dob": dob}, "headers": auth}
+
+    def validate(rng):
+        policy_no, dob = _policy_key(keys, miss_rate, rng)
+        return "POST", "/mssql/validate-registration", {"json": {"policy_no": policy_no, "dob": dob}, "headers": auth}
+
+    def login(rng):
+        return "POST", "/auth/login", {"data": {"username": LOADTEST_USER, "password": LOADTEST_PASSWORD}}
+
+    def otp(rng):
+        return "POST", "/otp/send", {"json": {"mobile": f"98{rng.randrange(10 ** 8):08d}"}}
+
+    return {
+        # Misses are part of the mix, so their 404s aren't errors
+        "newpolicies": Scenario("newpolicies", newpolicies, (200, 404)),
+        "validate": Scenario("validate", validate, (200, 404)),
+        "login": Scenario("login", login),
+        "otp": Scenario("otp", otp),
+    }
+
+
+# -------------------------------------------------
+# IN-PROCESS SERVER WITH STAND-IN BACKENDS
+# -------------------------------------------------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def build_local_app(args, workdir):
+    """
+    Seeds the stand-ins and imports the app against them.
+    Returns (app, policy keys).
+    """
+    os.environ.setdefault("SECRET_KEY", "loadtest-secret")
+    os.environ.setdefault("SPARROW_SMS_URL", "http://sms.invalid/send")
+    os.environ.setdefault("SPARROW_SMS_TOKEN", "loadtest")
+    os.environ.setdefault("SPARROW_SMS_FROM", "loadtest")
+    os.environ.setdefault("SMS_QUEUE_PATH", os.path.join(workdir, "sms_queue.sqlite3"))
+    # Only the browser-facing reverse proxy should be trusted here
+    os.environ.setdefault("RATE_LIMIT_TRUSTED_PROXIES", "")
+
+    fakedb.install_pyodbc_shim()
+
+    import auth
+    import database
+    from cache import policy_cache
+    from otp import sms
+    from ratelimit import rate_limiter
+
+    mssql_path = os.path.join(workdir, "mssql.sqlite3")
+    pg_path = os.path.join(workdir, "postgres.sqlite3")
+
+    print(f"Seeding {args.rows:,} synthetic policies...", file=sys.stderr)
+    keys = fakedb.seed_mssql(mssql_path, args.rows)
+    fakedb.seed_postgres(pg_path, {LOADTEST_USER: auth.ph.hash(LOADTEST_PASSWORD)})
+
+    latency = args.db_latency / 1000
+    database.mssql_pool.creator = fakedb.FakeMSSQL(mssql_path, latency)
+    database.pg_pool.creator = fakedb.FakePostgres(pg_path, latency)
+
+    async def gateway(request):
+        await asyncio.sleep(args.gateway_latency / 1000)
+        return httpx.Response(200, text='{"response_code": 200}')
+
+    sms._client = httpx.AsyncClient(transport=httpx.MockTransport(gateway))
+
+    rate_limiter.enabled = args.rate_limit
+    if args.no_cache:
+        policy_cache.ttl = policy_cache.negative_ttl = 0
+
+    from main import app
+
+    return app, keys
+
+
+def start_local_server(args, workdir):
+    """
+    Serves the stand-in-backed app on a background thread.
+    Returns (base_url, policy keys, stop callback).
+    """
+    import uvicorn
+
+    app, keys = build_local_app(args, workdir)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="loadtest-server", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Load test server failed to start")
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+
+    return f"http://127.0.0.1:{port}", keys, stop
+
+
+# -------------------------------------------------
+# LOAD GENERATION
+# -------------------------------------------------
+async def _fire(client, scenario, rng, scheduled, results):
+    method, url, kwargs = scenario.build(rng)
+    loop = asyncio.get_running_loop()
+    try:
+        response = await client.request(method, url, **kwargs)
+        outcome = response.status_code
+    except httpx.HTTPError as e:
+        outcome = e.__class__.__name__
+    results.append((loop.time() - scheduled, outcome))
+
+
+async def drive(client, scenario, rps, duration, seed):
+    """
+    Sends `rps * duration` requests on a fixed schedule
+    """
+    rng = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    results = []
+    tasks = []
+
+    start = loop.time()
+    for i in range(int(rps * duration)):
+        scheduled = start + i / rps
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(_fire(client, scenario, rng, scheduled, results)))
+
+    await asyncio.gather(*tasks)
+    return results, loop.time() - start
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(scenario, results, elapsed):
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    statuses = {}
+    for _, outcome in results:
+        statuses[str(outcome)] = statuses.get(str(outcome), 0) + 1
+
+    errors = sum(1 for _, outcome in results if outcome not in scenario.expected)
+    return {
+        "scenario": scenario.name,
+        "requests": len(results),
+        "errors": errors,
+        "error_rate": round(100 * errors / len(results), 2) if results else 0.0,
+        "rps": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "statuses": statuses,
+    }
+
+
+async def run(base_url, scenarios, plan, duration):
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=200)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        runs = [
+            drive(client, scenarios[name], rps, duration, seed=i)
+            for i, (name, rps) in enumerate(plan)
+        ]
+        outcomes = await asyncio.gather(*runs)
+
+    return [
+        summarize(scenarios[name], results, elapsed)
+        for (name, _), (results, elapsed) in zip(plan, outcomes)
+    ]
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+def parse_plan(spec, default_rps, known):
+    plan = []
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        name, _, rps = item.partition("=")
+        if name not in known:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(known)}")
+        plan.append((name, float(rps) if rps else default_rps))
+    return plan
+
+
+def print_report(summaries):
+    header = f"{'scenario':<12}{'reqs':>8}{'rps':>8}{'err%':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}  statuses"
+    print(header)
+    print("-" * len(header))
+    for s in summaries:
+        statuses = " ".join(f"{k}:{v}" for k, v in sorted(s["statuses"].items()))
+        print(
+            f"{s['scenario']:<12}{s['requests']:>8}{s['rps']:>8}{s['error_rate']:>8}"
+            f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}  {statuses}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--url", help="drive this server instead of an in-process one")
+    parser.add_argument("--serve", action="store_true", help="only run the stand-in-backed server")
+    parser.add_argument("--port", type=int, default=8000, help="port for --serve")
+    parser.add_argument("--rows", type=int, default=50000, help="synthetic insured rows to seed")
+    parser.add_argument("--rps", type=float, default=50, help="default rate per scenario")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--scenarios", default="newpolicies,validate,login=2,otp=10")
+    parser.add_argument("--miss-rate", type=float, default=0.1, help="share of lookups for unknown policies")
+    parser.add_argument("--db-latency", type=float, default=2.0, help="ms added to every stand-in DB execute")
+    parser.add_argument("--gateway-latency", type=float, default=80.0, help="ms the stand-in SMS gateway takes")
+    parser.add_argument("--no-cache", action="store_true", help="disable the policy lookup cache")
+    parser.add_argument("--rate-limit", action="store_true", help="keep OTP/login rate limiting on")
+    parser.add_argument("--max-p95", type=float, help="exit 1 if any scenario's p95 exceeds this (ms)")
+    parser.add_argument("--max-error-rate", type=float, help="exit 1 if any scenario's error rate exceeds this (%%)")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="kycapi-loadtest-") as workdir:
+        stop = None
+        if args.serve:
+            import uvicorn
+
+            app, _ = build_local_app(args, workdir)
+            uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+            return 0
+
+        if args.url:
+            base_url, keys = args.url, fakedb.synthetic_keys(args.rows)
+        else:
+            base_url, keys, stop = start_local_server(args, workdir)
+
+        scenarios = build_scenarios(keys, args.miss_rate)
+        plan = parse_plan(args.scenarios, args.rps, scenarios)
+
+        try:
+            summaries = asyncio.run(run(base_url, scenarios, plan, args.duration))
+        finally:
+            if stop is not None:
+                stop()
+
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+    else:
+        print_report(summaries)
+
+    failed = [
+        s["scenario"] for s in summaries
+        if (args.max_p95 is not None and s["p95_ms"] > args.max_p95)
+        or (args.max_error_rate is not None and s["error_rate"] > args.max_error_rate)
+    ]
+    if failed:
+        print(f"Thresholds exceeded: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
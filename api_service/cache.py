@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------
+# POLICY CACHE ENV
+# -------------------------------------------------
+POLICY_CACHE_TTL = float(os.getenv("POLICY_CACHE_TTL", "300"))
+POLICY_CACHE_NEGATIVE_TTL = float(os.getenv("POLICY_CACHE_NEGATIVE_TTL", "30"))
+POLICY_CACHE_MAX_ENTRIES = int(os.getenv("POLICY_CACHE_MAX_ENTRIES", "10000"))
+
+# Optional shared backend (needs the `redis` package when set)
+POLICY_CACHE_REDIS_URL = os.getenv("POLICY_CACHE_REDIS_URL")
+POLICY_CACHE_PREFIX = os.getenv("POLICY_CACHE_PREFIX", "kycapi:policy:")
+
+
+# -------------------------------------------------
+# KEY NORMALIZATION
+# -------------------------------------------------
+def normalize_dob(dob: str) -> str:
+    """
+    Accepts YYYY-MM-DD or DD-MM-YYYY and returns YYYY-MM-DD.
+    Unknown formats are returned stripped so they still key consistently.
+    """
+    value = str(dob or "").strip()
+
+    for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+
+    return value
+
+
+def normalize_policy_key(policy_no: str, dob: str):
+    return (str(policy_no or "").strip().upper(), normalize_dob(dob))
+
+
+# -------------------------------------------------
+# BACKENDS
+# -------------------------------------------------
+class MemoryBackend:
+    """
+    In-process TTL + LRU store
+    """
+
+    def __init__(self, max_entries=POLICY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete_policy(self, policy_no, dob=None):
+        with self._lock:
+            if dob is not None:
+                return 1 if self._data.pop((policy_no, dob), None) else 0
+
+            keys = [k for k in self._data if k[0] == policy_no]
+            for k in keys:
+                del self._data[k]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisBackend:
+    """
+    Shared store so every api_service worker sees the same entries
+    """
+
+    def __init__(self, url, prefix=POLICY_CACHE_PREFIX):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("POLICY_CACHE_REDIS_URL is set but `redis` is not installed")
+
+        self.prefix = prefix
+        self.client = aioredis.from_url(url)
+
+    def _key(self, policy_no, dob):
+        return f"{self.prefix}{policy_no}:{dob}"
+
+    async def get(self, key):
+        raw = await self.client.get(self._key(*key))
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key, value, ttl):
+        await self.client.set(self._key(*key), json.dumps(value), ex=max(1, int(ttl)))
+
+    async def delete_policy(self, policy_no, dob=None):
+        if dob is not None:
+            return await self.client.delete(self._key(policy_no, dob))
+
+        keys = [k async for k in self.client.scan_iter(match=self._key(policy_no, "*"))]
+        return await self.client.delete(*keys) if keys else 0
+
+    async def clear(self):
+        keys = [k async for k in self.client.scan_iter(match=f"{self.prefix}*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+# -------------------------------------------------
+# READ-THROUGH POLICY CACHE
+# -------------------------------------------------
+class PolicyCache:
+    """
+    Caches policy lookups keyed by normalized (policy_no, dob).
+
+    Values are the list of policy rows returned for the key; an empty list
+    records a "not found" result and is kept for the shorter negative TTL.
+    Reads go memory -> shared backend -> caller's loader.
+    """
+
+    def __init__(
+        self,
+        ttl=POLICY_CACHE_TTL,
+        negative_ttl=POLICY_CACHE_NEGATIVE_TTL,
+        max_entries=POLICY_CACHE_MAX_ENTRIES,
+        shared=None,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.local = MemoryBackend(max_entries)
+        self.shared = shared
+        self._stats = {
+            "hits": 0,
+            "negative_hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+            "shared_errors": 0,
+        }
+
+    async def peek(self, policy_no, dob):
+        """
+        Returns cached rows for the key, or None on a miss
+        """
+        key = normalize_policy_key(policy_no, dob)
+
+        entry = self.local.get(key)
+        if entry is not None:
+            rows = entry[1]
+            self._stats["negative_hits" if not rows else "hits"] += 1
+            return rows
+
+        if self.shared is not None:
+            try:
+                rows = await self.shared.get(key)
+            except Exception as e:
+                self._stats["shared_errors"] += 1
+                logger.warning("Shared policy cache read failed: %s", e)
+                rows = None
+
+            if rows is not None:
+                self._stats["shared_hits"] += 1
+                self.local.set(key, rows, self._ttl_for(rows))
+                return rows
+
+        self._stats["misses"] += 1
+        return None
+
+    async def put(self, policy_no, dob, rows):
+        await self._store(normalize_policy_key(policy_no, dob), rows)
+
+    async def get_or_load(self, policy_no, dob, loader):
+        """
+        Returns cached rows for the key, or awaits `loader(policy_no, dob)`
+        and caches its result. The loader is given the normalized values,
+        as /policies/batch queries them: rows are cached under exactly the
+        values that produced them, so spellings sharing a key share a result.
+        """
+        rows = await self.peek(policy_no, dob)
+        if rows is not None:
+            return rows
+
+        key = normalize_policy_key(policy_no, dob)
+        rows = await loader(*key)
+        await self._store(key, rows)
+        return rows
+
+    def _ttl_for(self, rows):
+        return self.ttl if rows else self.negative_ttl
+
+    async def _store(self, key, rows):
+        ttl = self._ttl_for(rows)
+        self.local.set(key, rows, ttl)
+
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, rows, ttl)
+            except Exception as e:
+                self._stats["shared_errors"] += 1
+                logger.warning("Shared policy cache write failed: %s", e)
+
+    async def invalidate(self, policy_no, dob=None):
+        """
+        Drops one (policy_no, dob) entry, or every entry for the policy
+        when dob is omitted. Returns the number of local entries removed.
+        """
+        policy_key = str(policy_no or "").strip().upper()
+        dob_key = normalize_dob(dob) if dob else None
+
+        removed = self.local.delete_policy(policy_key, dob_key)
+        if self.shared is not None:
+            await self.shared.delete_policy(policy_key, dob_key)
+
+        self._stats["invalidations"] += 1
+        return removed
+
+    async def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            await self.shared.clear()
+        self._stats["invalidations"] += 1
+
+    def stats(self):
+        return {
+            **self._stats,
+            "entries": len(self.local),
+            "evictions": self.local.evictions,
+            "max_entries": self.local.max_entries,
+            "shared": self.shared is not None,
+        }
+
+
+policy_cache = PolicyCache(
+    shared=RedisBackend(POLICY_CACHE_REDIS_URL) if POLICY_CACHE_REDIS_URL else None,
+)
+
+
+def get_policy_cache():
+    """
+    FastAPI dependency returning the shared policy lookup cache
+    """
+    return policy_cache
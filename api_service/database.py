@@ -1,9 +1,21 @@
 import os
+import time
+import asyncio
+import logging
+import threading
+import functools
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
 import pyodbc
 import psycopg2
 from pathlib import Path
 from dotenv import load_dotenv
 
+from timing import record
+
 BASE_DIR = Path(__file__).resolve().parent
 ENV_PATH = BASE_DIR / ".env"
 
@@ -29,6 +41,35 @@ PG_HOST = os.getenv("PGHOST")
 PG_PORT = os.getenv("PGPORT")
 PG_SSL = os.getenv("PGSSL", "require")
 
+# -------------------------------------------------
+# MSSQL POOL ENV
+# -------------------------------------------------
+MSSQL_POOL_SIZE = int(os.getenv("MSSQL_POOL_SIZE", "5"))
+MSSQL_POOL_MAX_OVERFLOW = int(os.getenv("MSSQL_POOL_MAX_OVERFLOW", "5"))
+MSSQL_POOL_TIMEOUT = float(os.getenv("MSSQL_POOL_TIMEOUT", "10"))
+MSSQL_POOL_RECYCLE = float(os.getenv("MSSQL_POOL_RECYCLE", "1800"))
+MSSQL_POOL_PING_AFTER = float(os.getenv("MSSQL_POOL_PING_AFTER", "30"))
+MSSQL_POOL_WARMUP = int(os.getenv("MSSQL_POOL_WARMUP", str(MSSQL_POOL_SIZE)))
+
+# -------------------------------------------------
+# POSTGRES POOL ENV
+# -------------------------------------------------
+PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", "3"))
+PG_POOL_MAX_OVERFLOW = int(os.getenv("PG_POOL_MAX_OVERFLOW", "2"))
+PG_POOL_TIMEOUT = float(os.getenv("PG_POOL_TIMEOUT", "10"))
+# Neon drops idle connections, so recycle and ping more eagerly than MSSQL
+PG_POOL_RECYCLE = float(os.getenv("PG_POOL_RECYCLE", "300"))
+PG_POOL_PING_AFTER = float(os.getenv("PG_POOL_PING_AFTER", "5"))
+PG_POOL_WARMUP = int(os.getenv("PG_POOL_WARMUP", "1"))
+
+# One worker per connection the pool can hand out, so executor threads
+# never sit blocked waiting for a pool slot.
+MSSQL_EXECUTOR_WORKERS = int(
+    os.getenv("MSSQL_EXECUTOR_WORKERS", str(MSSQL_POOL_SIZE + MSSQL_POOL_MAX_OVERFLOW))
+)
+
+logger = logging.getLogger(__name__)
+
 
 # -------------------------------------------------
 # MSSQL CONNECTION
@@ -64,6 +105,402 @@ def get_mssql_conn():
         raise Exception(f"Failed to connect MSSQL: {e}")
 
 
+# -------------------------------------------------
+# CONNECTION POOL
+# -------------------------------------------------
+class PoolTimeoutError(Exception):
+    """
+    Raised when no pooled connection frees up within the checkout timeout
+    """
+
+
+class ConnectionPool:
+    """
+    Bounded, health-checked pool of DB-API connections (MSSQL, Postgres).
+
+    Keeps up to `size` idle connections around and allows `max_overflow`
+    extra connections during bursts; overflow connections are closed on
+    release instead of being kept. Connections idle longer than `recycle`
+    seconds are replaced, and connections idle longer than `ping_after`
+    seconds are checked with `SELECT 1` before being handed out.
+    """
+
+    def __init__(
+        self,
+        creator,
+        name,
+        size,
+        max_overflow,
+        timeout,
+        recycle,
+        ping_after,
+    ):
+        self.creator = creator
+        self.name = name
+        self._phase = name.lower()  # Server-Timing metric prefix
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+
+        self._idle = deque()  # (conn, created_at, last_used_at)
+        self._created_at = {}
+        self._state = {}  # per-connection scratch space, e.g. prepared cursors
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "connects": 0,
+            "connect_errors": 0,
+            "recycled": 0,
+            "ping_failures": 0,
+            "discarded": 0,
+        }
+
+    # ---------- internal helpers ----------
+    def _connect(self):
+        start = time.perf_counter()
+        try:
+            conn = self.creator()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._stats["connect_errors"] += 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._stats["connects"] += 1
+            self._created_at[id(conn)] = time.monotonic()
+        record(f"{self._phase}_connect", time.perf_counter() - start)
+        return conn
+
+    def _close(self, conn):
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+            self._state.pop(id(conn), None)
+            self._open -= 1
+            self._cond.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _ping(conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        finally:
+            cursor.close()
+
+    # ---------- public API ----------
+    def state(self, conn):
+        """
+        Dict that lives exactly as long as the pooled connection
+        """
+        with self._cond:
+            return self._state.setdefault(id(conn), {})
+
+    def acquire(self):
+        """
+        Checks out a connection, waiting up to `timeout` seconds when the
+        pool and its overflow are exhausted.
+        """
+        start = time.perf_counter()
+        try:
+            return self._checkout()
+        finally:
+            record(f"{self._phase}_acquire", time.perf_counter() - start)
+
+    def _checkout(self):
+        deadline = time.monotonic() + self.timeout
+
+        with self._cond:
+            self._stats["checkouts"] += 1
+            waited = False
+
+            while not self._idle and self._open >= self.size + self.max_overflow:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"No {self.name} connection available within {self.timeout}s"
+                    )
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                self._cond.wait(remaining)
+
+            if self._idle:
+                conn, created_at, last_used = self._idle.pop()
+            else:
+                conn = None
+                self._open += 1
+
+        if conn is None:
+            return self._connect()
+
+        now = time.monotonic()
+
+        if self.recycle and now - created_at > self.recycle:
+            with self._cond:
+                self._stats["recycled"] += 1
+                self._open += 1
+            self._close(conn)
+            return self._connect()
+
+        if self.ping_after is not None and now - last_used > self.ping_after:
+            try:
+                self._ping(conn)
+            except Exception:
+                with self._cond:
+                    self._stats["ping_failures"] += 1
+                    self._open += 1
+                self._close(conn)
+                return self._connect()
+
+        return conn
+
+    def release(self, conn, discard=False):
+        """
+        Returns a connection to the pool. The open transaction is rolled
+        back so the next borrower starts clean; connections that fail the
+        rollback, overflow connections and discarded ones are closed.
+        """
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            keep = not discard and len(self._idle) < self.size
+            if keep:
+                created_at = self._created_at.get(id(conn), time.monotonic())
+                self._idle.append((conn, created_at, time.monotonic()))
+                self._cond.notify()
+                return
+            if discard:
+                self._stats["discarded"] += 1
+
+        self._close(conn)
+
+    def ping(self):
+        """
+        Round-trips `SELECT 1` on a pooled connection; raises on failure
+        """
+        conn = self.acquire()
+        try:
+            self._ping(conn)
+        except Exception:
+            self.release(conn, discard=True)
+            raise
+        self.release(conn)
+
+    def saturated(self):
+        with self._cond:
+            return not self._idle and self._open >= self.size + self.max_overflow
+
+    def warm_up(self, count=None):
+        """
+        Opens up to `count` connections ahead of the first request.
+        Returns the number of connections opened.
+        """
+        count = self.size if count is None else min(count, self.size)
+        opened = []
+
+        try:
+            for _ in range(count):
+                opened.append(self.acquire())
+        except Exception as e:
+            logger.warning("%s pool warm-up stopped early: %s", self.name, e)
+        finally:
+            for conn in opened:
+                self.release(conn)
+
+        return len(opened)
+
+    def close_all(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+
+        for conn, _, _ in idle:
+            self._close(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self._stats,
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+            }
+
+
+mssql_pool = ConnectionPool(
+    get_mssql_conn,
+    name="MSSQL",
+    size=MSSQL_POOL_SIZE,
+    max_overflow=MSSQL_POOL_MAX_OVERFLOW,
+    timeout=MSSQL_POOL_TIMEOUT,
+    recycle=MSSQL_POOL_RECYCLE,
+    ping_after=MSSQL_POOL_PING_AFTER,
+)
+
+
+@contextmanager
+def mssql_connection():
+    """
+    Borrows a pooled MSSQL connection for the duration of the block
+    """
+    conn = mssql_pool.acquire()
+    try:
+        yield conn
+    finally:
+        mssql_pool.release(conn)
+
+
+def statement_cursor(conn, statement):
+    """
+    Returns (cursor, owned) for running `statement` on a pooled connection.
+
+    Prepared statements reuse one cursor per connection; pyodbc keeps the
+    statement prepared while the same text runs on the same cursor. Owned
+    cursors are one-off and must be closed by the caller.
+    """
+    if not statement.prepare:
+        return conn.cursor(), True
+
+    cursors = mssql_pool.state(conn)
+    cursor = cursors.get(statement.name)
+    if cursor is None:
+        cursor = cursors[statement.name] = conn.cursor()
+    return cursor, False
+
+
+def discard_statement_cursor(conn, statement):
+    cursor = mssql_pool.state(conn).pop(statement.name, None)
+    if cursor is not None:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+
+# -------------------------------------------------
+# ASYNC MSSQL EXECUTION
+# -------------------------------------------------
+class MSSQLExecutor:
+    """
+    Runs blocking pyodbc work on a dedicated thread pool.
+
+    Keeps MSSQL round trips off Starlette's shared threadpool so slow core
+    DB calls cannot starve the OTP and auth routes in the same process.
+    """
+
+    def __init__(self, max_workers=MSSQL_EXECUTOR_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="mssql",
+                    )
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Runs `fn(*args, **kwargs)` on the MSSQL executor and awaits it
+        """
+        # Copy the context so per-request timings follow the call onto the thread
+        ctx = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), functools.partial(ctx.run, fn, *args, **kwargs)
+        )
+
+    @staticmethod
+    def _query(statement, params, fetch):
+        with mssql_connection() as conn:
+            cursor, owned = statement_cursor(conn, statement)
+            try:
+                with statement.timed(params):
+                    cursor.execute(statement.sql, params)
+                    if fetch == "one":
+                        return cursor.fetchone()
+                    return cursor.fetchall()
+            except Exception:
+                if not owned:
+                    discard_statement_cursor(conn, statement)
+                raise
+            finally:
+                if owned:
+                    cursor.close()
+
+    async def fetchall(self, statement, params=()):
+        return await self.run(self._query, statement, params, "all")
+
+    async def fetchone(self, statement, params=()):
+        return await self.run(self._query, statement, params, "one")
+
+    @staticmethod
+    def _close_stream(cursor, conn):
+        # Closing and releasing (a rollback) are ODBC round trips too
+        try:
+            if cursor is not None:
+                cursor.close()
+        finally:
+            mssql_pool.release(conn)
+
+    async def stream(self, statement, params=(), batch_size=1000):
+        """
+        Yields `fetchmany` batches of rows while holding one pooled
+        connection, so large result sets never sit in memory at once.
+        """
+        conn = await self.run(mssql_pool.acquire)
+        cursor = None
+        try:
+            cursor = await self.run(conn.cursor)
+            with statement.timed(params):
+                await self.run(cursor.execute, statement.sql, params)
+            while True:
+                rows = await self.run(cursor.fetchmany, batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            await self.run(self._close_stream, cursor, conn)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+mssql_executor = MSSQLExecutor()
+
+
+def get_mssql_executor():
+    """
+    FastAPI dependency returning the shared MSSQL executor
+    """
+    return mssql_executor
+
+
 
 # -------------------------------------------------
 # POSTGRES CONNECTION
@@ -85,3 +522,39 @@ def get_postgres_connection():
 
     except Exception as e:
         raise Exception(f"Failed to connect Postgres: {e}")
+
+
+# -------------------------------------------------
+# POSTGRES CONNECTION POOL
+# -------------------------------------------------
+pg_pool = ConnectionPool(
+    get_postgres_connection,
+    name="Postgres",
+    size=PG_POOL_SIZE,
+    max_overflow=PG_POOL_MAX_OVERFLOW,
+    timeout=PG_POOL_TIMEOUT,
+    recycle=PG_POOL_RECYCLE,
+    ping_after=PG_POOL_PING_AFTER,
+)
+
+
+def pool_stats():
+    """
+    Checkout/wait/timeout counters for every connection pool
+    """
+    return {
+        "mssql": mssql_pool.stats(),
+        "postgres": pg_pool.stats(),
+    }
+
+
+@contextmanager
+def postgres_connection():
+    """
+    Borrows a pooled Postgres connection for the duration of the block
+    """
+    conn = pg_pool.acquire()
+    try:
+        yield conn
+    finally:
+        pg_pool.release(conn)
@@ -0,0 +1,136 @@
+import os
+import time
+import asyncio
+
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from cache import policy_cache
+from database import mssql_executor, mssql_pool, pg_pool
+from metrics import register_collector, render
+from otp.outbox import sms_queue
+
+router = APIRouter(tags=["Health"])
+
+# Readiness results are reused for this long so probes don't hammer the DBs
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "5"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "3"))
+
+_POOLS = {"mssql": mssql_pool, "postgres": pg_pool}
+
+_ready_cache = {"checked_at": 0.0, "result": None}
+_ready_lock = asyncio.Lock()
+
+
+# -------------------------------------------------
+# PROBES
+# -------------------------------------------------
+async def _probe(name, pool):
+    if pool.saturated():
+        return {"status": "saturated", **pool.stats()}
+
+    start = time.perf_counter()
+    try:
+        if name == "mssql":
+            await asyncio.wait_for(mssql_executor.run(pool.ping), HEALTH_PROBE_TIMEOUT)
+        else:
+            await asyncio.wait_for(run_in_threadpool(pool.ping), HEALTH_PROBE_TIMEOUT)
+    except Exception as e:
+        return {"status": "down", "error": str(e) or e.__class__.__name__}
+
+    return {
+        "status": "up",
+        "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        **pool.stats(),
+    }
+
+
+async def _check_ready():
+    async with _ready_lock:
+        now = time.monotonic()
+        if _ready_cache["result"] is not None and now - _ready_cache["checked_at"] < HEALTH_CACHE_SECONDS:
+            return _ready_cache["result"]
+
+        results = await asyncio.gather(*(_probe(n, p) for n, p in _POOLS.items()))
+        checks = dict(zip(_POOLS, results))
+        result = {
+            "ready": all(c["status"] == "up" for c in checks.values()),
+            "checks": checks,
+        }
+
+        _ready_cache.update(checked_at=time.monotonic(), result=result)
+        return result
+
+
+# -------------------------------------------------
+# ROUTES
+# -------------------------------------------------
+@router.get("/health/live")
+async def live():
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+async def ready():
+    result = await _check_ready()
+    return ORJSONResponse(result, status_code=200 if result["ready"] else 503)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    body = await run_in_threadpool(render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+# -------------------------------------------------
+# SCRAPE-TIME COLLECTORS
+# -------------------------------------------------
+@register_collector
+def _pool_metrics():
+    stats = {name: pool.stats() for name, pool in _POOLS.items()}
+
+    def per_pool(key):
+        return [({"pool": name}, s[key]) for name, s in stats.items()]
+
+    return [
+        ("kycapi_db_pool_in_use", "gauge", "Connections checked out", per_pool("in_use")),
+        ("kycapi_db_pool_idle", "gauge", "Idle connections kept in the pool", per_pool("idle")),
+        (
+            "kycapi_db_pool_capacity",
+            "gauge",
+            "Maximum connections (size + overflow)",
+            [({"pool": n}, s["size"] + s["max_overflow"]) for n, s in stats.items()],
+        ),
+        ("kycapi_db_pool_checkouts_total", "counter", "Connection checkouts", per_pool("checkouts")),
+        ("kycapi_db_pool_waits_total", "counter", "Checkouts that had to wait", per_pool("waits")),
+        ("kycapi_db_pool_timeouts_total", "counter", "Checkouts that timed out", per_pool("timeouts")),
+        ("kycapi_db_pool_connect_errors_total", "counter", "Failed connection attempts", per_pool("connect_errors")),
+    ]
+
+
+@register_collector
+def _cache_metrics():
+    stats = policy_cache.stats()
+    events = ("hits", "negative_hits", "shared_hits", "misses", "invalidations", "shared_errors")
+    return [
+        (
+            "kycapi_policy_cache_events_total",
+            "counter",
+            "Policy lookup cache events",
+            [({"event": e}, stats[e]) for e in events],
+        ),
+        ("kycapi_policy_cache_entries", "gauge", "Entries in the local policy cache", [({}, stats["entries"])]),
+    ]
+
+
+@register_collector
+def _sms_queue_metrics():
+    return [
+        (
+            "kycapi_sms_queue_messages",
+            "gauge",
+            "Outbound SMS messages by delivery status",
+            [({"status": status}, count) for status, count in sms_queue.stats().items()],
+        ),
+    ]
@@ -1,13 +1,63 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # optional: falls back to gzip only
+    BrotliMiddleware = None
 
 from auth import router as auth_router
+from auth import shutdown_hash_executor
+from database import (
+    mssql_pool,
+    mssql_executor,
+    pg_pool,
+    MSSQL_POOL_WARMUP,
+    PG_POOL_WARMUP,
+)
+from health import router as health_router
+from metrics import metrics_middleware
+from timing import TimedORJSONResponse, timing_middleware
 from mssql_routes import router as mssql_router
 from middleware import jwt_middleware
 from otp.routes import router as otp_router
+from otp.outbox import sms_dispatcher, sms_queue
+from otp.sms import close_sms_client
+
+
+# -----------------------------
+# Startup / Shutdown
+# -----------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open DB connections before the first request pays the TLS handshake
+    await run_in_threadpool(mssql_pool.warm_up, MSSQL_POOL_WARMUP)
+    await run_in_threadpool(pg_pool.warm_up, PG_POOL_WARMUP)
+    await sms_dispatcher.start()
+    yield
+    await sms_dispatcher.stop()
+    await run_in_threadpool(mssql_executor.shutdown)
+    await run_in_threadpool(shutdown_hash_executor)
+    await run_in_threadpool(mssql_pool.close_all)
+    await run_in_threadpool(pg_pool.close_all)
+    await close_sms_client()
+    await run_in_threadpool(sms_queue.close)
+
 
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
 
-app = FastAPI(title="Policy KYC API")
+
+app = FastAPI(
+    title="Policy KYC API",
+    lifespan=lifespan,
+    default_response_class=TimedORJSONResponse,
+)
 
 # Register OTP routes
 app.include_router(otp_router)
@@ -22,11 +72,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# -----------------------------
+# Response compression (Brotli when installed, else GZip)
+# -----------------------------
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_SIZE, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_SIZE)
+
 # -----------------------------
 # JWT Middleware
 # -----------------------------
 app.middleware("http")(jwt_middleware)
 
+# -----------------------------
+# Per-request phase timings (Server-Timing header + request log line)
+# -----------------------------
+app.middleware("http")(timing_middleware)
+
+# -----------------------------
+# Request metrics (outermost, so auth rejections are counted too)
+# -----------------------------
+app.middleware("http")(metrics_middleware)
+
 # -----------------------------
 # Root endpoint
 # -----------------------------
@@ -39,6 +107,7 @@ def root():
 # -----------------------------
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(mssql_router, prefix="/mssql", tags=["MSSQL"])
+app.include_router(health_router)
 
 
 # -----------------------------
@@ -0,0 +1,206 @@
+import time
+import bisect
+import threading
+
+from fastapi import Request
+
+# Seconds; tuned for core-DB round trips from a few ms up to slow reports
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+_collectors = []
+
+
+def _label_values(values):
+    return values if isinstance(values, tuple) else (values,)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with one series per label value (or tuple
+    of values when declared with several labels)
+    """
+
+    def __init__(self, name, help_text, labels, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = _label_values(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, label_values, seconds):
+        key = _label_values(label_values)
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += seconds
+
+    def snapshot(self):
+        """
+        Returns {label value: {"count", "sum", "buckets": {le: cumulative}}}
+        """
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+
+        result = {}
+        for key, counts in series.items():
+            cumulative, running = {}, 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts[:-1]):
+                running += n
+                cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+            label = key[0] if len(key) == 1 else "|".join(map(str, key))
+            result[label] = {
+                "count": running,
+                "sum": counts[-1],
+                "buckets": cumulative,
+            }
+        return result
+
+    def collect(self):
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, counts in sorted(series.items()):
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts[:-1]):
+                running += n
+                le = f'le="{_format_bound(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {running}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {counts[-1]}")
+            lines.append(f"{self.name}_count{labels} {running}")
+        return lines
+
+
+class Counter:
+    """
+    Monotonic counter with one series per label value (or tuple of values)
+    """
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = _label_values(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, label_values=(), amount=1):
+        key = _label_values(label_values)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            series = dict(self._series)
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(series.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+def register_collector(fn):
+    """
+    Registers `fn() -> list[(name, type, help, [(labels dict, value)])]`
+    for values read live at scrape time (pool sizes, queue depth, ...)
+    """
+    _collectors.append(fn)
+    return fn
+
+
+def render():
+    """
+    Prometheus text exposition of every registered metric
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.collect())
+
+    for fn in _collectors:
+        for name, kind, help_text, samples in fn():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------------------------------
+# METRICS
+# -------------------------------------------------
+statement_timings = Histogram(
+    "kycapi_db_statement_seconds",
+    "Core DB statement latency (execute + fetch) by statement name",
+    "statement",
+)
+
+request_latency = Histogram(
+    "kycapi_http_request_seconds",
+    "HTTP request latency by route template and method",
+    ("route", "method"),
+)
+
+request_errors = Counter(
+    "kycapi_http_errors_total",
+    "HTTP responses with status >= 500, or unhandled exceptions, by route",
+    ("route", "status"),
+)
+
+rate_limited = Counter(
+    "kycapi_rate_limited_total",
+    "Requests rejected with 429 by limit name",
+    "limit",
+)
+
+otp_send_latency = Histogram(
+    "kycapi_otp_send_seconds",
+    "SMS gateway call latency by outcome",
+    "result",
+)
+
+
+# -------------------------------------------------
+# REQUEST METRICS MIDDLEWARE
+# -------------------------------------------------
+def _route_label(request: Request):
+    route = request.scope.get("route")
+    # Raw paths of unmatched requests would explode label cardinality
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def metrics_middleware(request: Request, call_next):
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        request_errors.inc((_route_label(request), "exception"))
+        raise
+
+    route = _route_label(request)
+    request_latency.observe((route, request.method), time.perf_counter() - start)
+    if response.status_code >= 500:
+        request_errors.inc((route, str(response.status_code)))
+    return response
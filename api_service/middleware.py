@@ -1,9 +1,16 @@
 import os
+import hmac
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
-from fastapi import Request, status
+from fastapi import HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from jose import jwt, JWTError
 
+from timing import span
+
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -11,17 +18,106 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 
 # NEW: backend-to-backend token
 BACKEND_TOKEN = os.getenv("BACKEND_TOKEN")
+_BACKEND_TOKEN_BYTES = BACKEND_TOKEN.encode() if BACKEND_TOKEN else None
+
+# Verified-token cache (size 0 disables it)
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "1024"))
+# Upper bound for tokens without `exp`, and for revalidating long-lived ones
+JWT_CACHE_MAX_TTL = float(os.getenv("JWT_CACHE_MAX_TTL", "300"))
 
 
 # Paths requiring authentication
 PROTECTED_PATHS = ["/mssql"]
+_PROTECTED_PREFIXES = tuple(PROTECTED_PATHS)
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of token hash -> (subject, expires_at).
+
+    Keyed by SHA-256 of the token so raw bearer tokens are never kept in
+    memory; entries expire at the token's own `exp`, capped by `max_ttl`.
+    """
+
+    def __init__(self, max_size=JWT_CACHE_SIZE, max_ttl=JWT_CACHE_MAX_TTL):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        if not self.max_size:
+            return None
+
+        key = self._key(token)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            subject, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return subject
+
+    def set(self, token, subject, exp=None):
+        if not self.max_size:
+            return
+
+        expires_at = time.time() + self.max_ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+
+        key = self._key(token)
+        with self._lock:
+            self._data[key] = (subject, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+token_cache = VerifiedTokenCache()
+
+
+def _is_backend_token(token: str) -> bool:
+    if _BACKEND_TOKEN_BYTES is None:
+        return False
+    return hmac.compare_digest(token.encode(), _BACKEND_TOKEN_BYTES)
+
+
+def is_backend_request(request: Request) -> bool:
+    """
+    True when the request carries the backend token, on any path
+    """
+    auth_header = request.headers.get("Authorization") or ""
+    return auth_header.startswith("Bearer ") and _is_backend_token(auth_header[len("Bearer "):])
+
+
+def require_backend(request: Request):
+    """
+    Route dependency: 403 unless the request carries the backend token.
+    For admin and internal routes a user's JWT must not reach.
+    """
+    if not is_backend_request(request):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Backend token required")
 
 
 async def jwt_middleware(request: Request, call_next):
     path = request.url.path
 
     # Skip auth for non-protected routes
-    if not any(path.startswith(p) for p in PROTECTED_PATHS):
+    if not path.startswith(_PROTECTED_PREFIXES):
         return await call_next(request)
 
     auth_header = request.headers.get("Authorization")
@@ -39,15 +135,21 @@ async def jwt_middleware(request: Request, call_next):
     # ----------------------------------------------------------
     # 1. BACKEND TOKEN BYPASS (Django -> FastAPI internal calls)
     # ----------------------------------------------------------
-    if token == BACKEND_TOKEN:
+    if _is_backend_token(token):
         request.state.user = "django-backend"
         return await call_next(request)
 
     # ----------------------------------------------------------
-    # 2. NORMAL JWT VALIDATION
+    # 2. NORMAL JWT VALIDATION (cached per token until exp)
     # ----------------------------------------------------------
+    subject = token_cache.get(token)
+    if subject is not None:
+        request.state.user = subject
+        return await call_next(request)
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with span("jwt_decode"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         request.state.user = payload.get("sub")
 
         if request.state.user is None:
@@ -59,4 +161,6 @@ async def jwt_middleware(request: Request, call_next):
             content={"detail": "Invalid or expired token"},
         )
 
+    token_cache.set(token, request.state.user, payload.get("exp"))
+
     return await call_next(request)
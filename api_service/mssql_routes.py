@@ -1,6 +1,22 @@
+import orjson
+
 from fastapi import APIRouter, HTTPException, Request, Depends, Query
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
-from database import get_mssql_conn
+from cache import PolicyCache, get_policy_cache, normalize_policy_key
+from database import MSSQLExecutor, PoolTimeoutError, get_mssql_executor, mssql_connection
+from metrics import statement_timings
+from middleware import require_backend
+from timing import TimedORJSONResponse
+from statements import (
+    POLICY_IDENTITY,
+    POLICY_LOOKUP,
+    POLICY_PAGE,
+    POLICY_STREAM,
+    RELATED_POLICIES,
+    policy_batch_in,
+    policy_batch_pairs,
+)
 from pydantic import BaseModel, Field
 import pyodbc
 
@@ -8,6 +24,14 @@ security = HTTPBearer()
 
 router = APIRouter(tags=["MSSQL"])
 
+POLICY_PAGE_SIZE = 500
+POLICY_PAGE_SIZE_MAX = 5000
+POLICY_STREAM_BATCH = 1000
+
+BATCH_MAX_KEYS = 500
+# SQL Server caps a statement at 2100 parameters; pairs use two each
+BATCH_CHUNK_SIZE = 200
+
 # ------------------ MODELS ---------------------
 
 class PolicyOut(BaseModel):
@@ -33,191 +57,340 @@ class ValidationResponse(BaseModel):
     data: PolicyOut
 
 
+class IdentityResponse(BaseModel):
+    policy: PolicyOut
+    related_policies: list[str]
+
+
+class PolicyKey(BaseModel):
+    policy_no: str = Field(..., example="POL001")
+    dob: str | None = Field(None, example="1990-01-15")
+
+
+class BatchLookupRequest(BaseModel):
+    keys: list[PolicyKey] = Field(..., min_length=1, max_length=BATCH_MAX_KEYS)
+
+
+class BatchLookupResult(BaseModel):
+    policy_no: str
+    dob: str | None = None
+    policies: list[PolicyOut] = []
+    error: str | None = None
+
+
+class BatchLookupResponse(BaseModel):
+    found: int
+    missing: int
+    results: list[BatchLookupResult]
+
+
 # ---------------- ROUTES ------------------------
 
+def _policy_dict(r):
+    """
+    Maps a trusted DB row straight to the PolicyOut shape, so list
+    responses can skip per-row Pydantic validation.
+    """
+    return {
+        "PolicyNo": r.policyno,
+        "FirstName": r.firstname,
+        "LastName": r.lastname,
+        "DOB": str(r.dob),
+        "Mobile": r.mobile,
+        "BranchCode": int(r.branch_code) if r.branch_code is not None else None,
+        "BranchName": r.branch_name,
+        "ClientNo": r.ClientNo,
+        "NewClientId": r.NewClientId,
+    }
+
+
+async def _stream_policies(db: MSSQLExecutor, after: str):
+    async for rows in db.stream(POLICY_STREAM, (after,), batch_size=POLICY_STREAM_BATCH):
+        yield b"".join(orjson.dumps(_policy_dict(r)) + b"\n" for r in rows)
+
+
 @router.get("/policies")
-def get_policies(request: Request):
+async def get_policies(
+    request: Request,
+    after: str = Query("", description="Return policies after this policy number"),
+    limit: int = Query(POLICY_PAGE_SIZE, ge=1, le=POLICY_PAGE_SIZE_MAX),
+    stream: bool = Query(False, description="Stream every row as NDJSON"),
+    db: MSSQLExecutor = Depends(get_mssql_executor),
+):
+    """
+    Keyset-paginated on policyno: pass the returned `next_after` as
+    `after` to fetch the next page. With `stream=true` all rows after
+    `after` are streamed as NDJSON in fetchmany batches.
+    """
     user = getattr(request.state, "user", None)
 
+    if stream:
+        return StreamingResponse(
+            _stream_policies(db, after),
+            media_type="application/x-ndjson",
+        )
+
     try:
-        conn = get_mssql_conn()
-        cursor = conn.cursor()
+        rows = await db.fetchall(POLICY_PAGE, (limit, after))
+
+        result = [_policy_dict(r) for r in rows]
+        next_after = result[-1]["PolicyNo"] if len(result) == limit else None
 
-        cursor.execute("""
-            SELECT
-                tid.policyno,
-                tid.firstname,
-                tid.lastname,
-                tid.dob,
-                tid.mobile,
-                tid.ClientNo,
-                tid.NewClientId,
-                tid.branch AS branch_code,
-                tb.BranchName AS branch_name
-            FROM tblInsureddetail tid
-            LEFT JOIN tblBranch tb
-                ON tid.Branch = tb.Branch
-        """)
-
-        rows = cursor.fetchall()
-
-        result = [
-            {
-                "PolicyNo": r.policyno,
-                "FirstName": r.firstname,
-                "LastName": r.lastname,
-                "DOB": str(r.dob),
-                "Mobile": r.mobile,
-                "BranchCode": r.branch_code,
-                "BranchName": r.branch_name,
-                "ClientNo": r.ClientNo,
-                "NewClientId": r.NewClientId,
-            }
-            for r in rows
-        ]
-
-        return {"user": user, "policies": result}
+        return TimedORJSONResponse({"user": user, "policies": result, "next_after": next_after})
 
     except Exception as e:
         raise HTTPException(500, f"Error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
+
+
+def _policy_lookup_loader(db: MSSQLExecutor):
+    async def load(policy_no: str, dob: str):
+        rows = await db.fetchall(POLICY_LOOKUP, (policy_no, dob))
+        return [_policy_dict(r) for r in rows]
+
+    return load
 
 
 @router.get("/newpolicies", response_model=list[PolicyOut])
-def get_policy_details(
+async def get_policy_details(
     request: Request,
     policy_no: str = Query(...),
-    dob: str = Query(...)
+    dob: str = Query(...),
+    db: MSSQLExecutor = Depends(get_mssql_executor),
+    cache: PolicyCache = Depends(get_policy_cache),
 ):
     try:
-        conn = get_mssql_conn()
-        cursor = conn.cursor()
+        rows = await cache.get_or_load(policy_no, dob, _policy_lookup_loader(db))
 
-        cursor.execute("""
-            SELECT
-                tid.policyno,
-                tid.firstname,
-                tid.lastname,
-                tid.dob,
-                tid.mobile,
-                tid.ClientNo,
-                tid.NewClientId,
-                tid.branch AS branch_code,
-                tb.BranchName AS branch_name
-            FROM tblInsureddetail tid
-            LEFT JOIN tblBranch tb
-                ON tid.Branch = tb.Branch
-            WHERE tid.policyno = ? AND tid.dob = ?
-        """, (policy_no, dob))
-
-        rows = cursor.fetchall()
-
-    except pyodbc.Error as err:
+    except (pyodbc.Error, PoolTimeoutError) as err:
         raise HTTPException(500, f"Database error: {str(err)}")
-    finally:
-        cursor.close()
-        conn.close()
 
     if not rows:
         raise HTTPException(404, "No policy found")
 
-    return [
-        PolicyOut(
-            PolicyNo=r.policyno,
-            FirstName=r.firstname,
-            LastName=r.lastname,
-            DOB=str(r.dob),
-            Mobile=r.mobile,
-            BranchCode=r.branch_code,
-            BranchName=r.branch_name,
-            ClientNo=r.ClientNo,
-            NewClientId=r.NewClientId,
-        )
-        for r in rows
-    ]
+    return TimedORJSONResponse(rows)
 
 
 @router.post("/validate-registration", response_model=ValidationResponse)
-def validate_registration(data: RegistrationRequest):
+async def validate_registration(
+    data: RegistrationRequest,
+    db: MSSQLExecutor = Depends(get_mssql_executor),
+    cache: PolicyCache = Depends(get_policy_cache),
+):
     policy_no = data.policy_no
     dob = data.dob
 
     try:
-        conn = get_mssql_conn()
-        cursor = conn.cursor()
+        rows = await cache.get_or_load(policy_no, dob, _policy_lookup_loader(db))
 
-        cursor.execute("""
-            SELECT
-                tid.policyno,
-                tid.firstname,
-                tid.lastname,
-                tid.dob,
-                tid.mobile,
-                tid.ClientNo,
-                tid.NewClientId,
-                tid.branch AS branch_code,
-                tb.BranchName AS branch_name
-            FROM tblInsureddetail tid
-            LEFT JOIN tblBranch tb
-                ON tid.Branch = tb.Branch
-            WHERE tid.policyno = ? AND tid.dob = ?
-        """, (policy_no, dob))
-
-        row = cursor.fetchone()
-
-    except pyodbc.Error as err:
+    except (pyodbc.Error, PoolTimeoutError) as err:
         raise HTTPException(500, f"Query failed: {str(err)}")
-    finally:
-        cursor.close()
-        conn.close()
 
-    if not row:
+    if not rows:
         raise HTTPException(404, "Invalid Policy Number or DOB")
 
-    return ValidationResponse(
-        allowed=True,
-        message="Valid for registration",
-        data=PolicyOut(
-            PolicyNo=row.policyno,
-            FirstName=row.firstname,
-            LastName=row.lastname,
-            DOB=str(row.dob),
-            Mobile=row.mobile,
-            BranchCode=row.branch_code,
-            BranchName=row.branch_name,
-            ClientNo=row.ClientNo,
-            NewClientId=row.NewClientId,
-        )
-    )
+    return TimedORJSONResponse({
+        "allowed": True,
+        "message": "Valid for registration",
+        "data": rows[0],
+    })
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _batch_lookup(policy_nos, pairs):
+    """
+    Resolves policy-only keys with chunked IN lists and (policy_no, dob)
+    pairs with a chunked VALUES join, all on one pooled connection.
+    Returns (rows_by_key, errors_by_key); a failing chunk only marks
+    its own keys as failed.
+    """
+    found = {}
+    errors = {}
+
+    with mssql_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            for chunk in _chunks(policy_nos, BATCH_CHUNK_SIZE):
+                statement = policy_batch_in(len(chunk))
+                try:
+                    with statement.timed():
+                        cursor.execute(statement.sql, chunk)
+                        rows = cursor.fetchall()
+                    for r in rows:
+                        key = (str(r.policyno).strip().upper(), None)
+                        found.setdefault(key, []).append(_policy_dict(r))
+                except pyodbc.Error as err:
+                    errors.update({(p, None): f"Database error: {err}" for p in chunk})
+
+            for chunk in _chunks(pairs, BATCH_CHUNK_SIZE):
+                statement = policy_batch_pairs(len(chunk))
+                params = [v for pair in chunk for v in pair]
+                try:
+                    with statement.timed():
+                        cursor.execute(statement.sql, params)
+                        rows = cursor.fetchall()
+                    for r in rows:
+                        key = normalize_policy_key(r.policyno, str(r.dob))
+                        found.setdefault(key, []).append(_policy_dict(r))
+                except pyodbc.Error as err:
+                    errors.update({pair: f"Database error: {err}" for pair in chunk})
+        finally:
+            cursor.close()
+
+    return found, errors
+
+
+@router.post("/policies/batch", response_model=BatchLookupResponse)
+async def batch_policy_lookup(
+    data: BatchLookupRequest,
+    db: MSSQLExecutor = Depends(get_mssql_executor),
+    cache: PolicyCache = Depends(get_policy_cache),
+):
+    """
+    Resolves up to BATCH_MAX_KEYS policies in one request. Keys with a
+    `dob` are matched on (policy_no, dob) and served from the policy
+    cache where possible; keys without one match on policy_no alone.
+    Results come back in request order with a per-key `error`.
+    """
+    keys = [
+        normalize_policy_key(k.policy_no, k.dob) if k.dob else (k.policy_no.strip().upper(), None)
+        for k in data.keys
+    ]
+
+    resolved = {}
+    policy_nos, pairs = [], []
+
+    for key in dict.fromkeys(keys):
+        if not key[0]:
+            continue
+        if key[1] is None:
+            policy_nos.append(key[0])
+            continue
+
+        cached = await cache.peek(*key)
+        if cached is not None:
+            resolved[key] = cached
+        else:
+            pairs.append(key)
+
+    errors = {}
+    if policy_nos or pairs:
+        try:
+            found, errors = await db.run(_batch_lookup, policy_nos, pairs)
+        except PoolTimeoutError as err:
+            found = {}
+            errors = {k: f"Database error: {err}" for k in policy_nos + pairs}
+
+        for key in pairs:
+            if key not in errors:
+                resolved[key] = found.get(key, [])
+                await cache.put(*key, resolved[key])
+        for p in policy_nos:
+            key = (p, None)
+            if key not in errors:
+                resolved[key] = found.get(key, [])
+
+    results = []
+    for (policy_no, dob), k in zip(keys, data.keys):
+        key = (policy_no, dob)
+        if not policy_no:
+            error = "policy_no is required"
+        elif key in errors:
+            error = errors[key]
+        elif not resolved.get(key):
+            error = "No policy found"
+        else:
+            error = None
+
+        results.append({
+            "policy_no": k.policy_no,
+            "dob": k.dob,
+            "policies": resolved.get(key, []) if error is None else [],
+            "error": error,
+        })
+
+    found_count = sum(1 for r in results if r["error"] is None)
+    return TimedORJSONResponse({
+        "found": found_count,
+        "missing": len(results) - found_count,
+        "results": results,
+    })
+
+
+@router.get("/identity", response_model=IdentityResponse)
+async def resolve_identity(
+    policy_no: str = Query(...),
+    dob: str = Query(...),
+    db: MSSQLExecutor = Depends(get_mssql_executor),
+):
+    """
+    Looks up the policy by (policy_no, dob) and, in the same statement,
+    every policy held by the same insured (firstname, lastname, dob,
+    mobile). Replaces the /newpolicies + /related-policies round trips.
+    """
+    try:
+        rows = await db.fetchall(POLICY_IDENTITY, (policy_no, dob))
+
+    except (pyodbc.Error, PoolTimeoutError) as err:
+        raise HTTPException(500, f"Database error: {str(err)}")
+
+    if not rows:
+        raise HTTPException(404, "No policy found")
+
+    related = dict.fromkeys(r.related_policyno for r in rows if r.related_policyno)
+
+    return TimedORJSONResponse({
+        "policy": _policy_dict(rows[0]),
+        "related_policies": list(related),
+    })
 
 
 @router.get("/related-policies")
-def related_policies(
+async def related_policies(
     firstname: str,
     lastname: str,
     dob: str,
-    mobile: str
+    mobile: str,
+    db: MSSQLExecutor = Depends(get_mssql_executor),
 ):
     try:
-        conn = get_mssql_conn()
-        cursor = conn.cursor()
+        rows = await db.fetchall(RELATED_POLICIES, (firstname, lastname, dob, mobile))
 
-        cursor.execute("""
-            SELECT policyno
-            FROM tblInsureddetail
-            WHERE firstname = ?
-              AND lastname = ?
-              AND dob = ?
-              AND mobile = ?
-        """, (firstname, lastname, dob, mobile))
-
-        rows = cursor.fetchall()
-        return [r.policyno for r in rows]
+        return TimedORJSONResponse([r.policyno for r in rows])
 
     except Exception as e:
         raise HTTPException(500, f"DB error: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
+
+
+# ---------------- CACHE ADMIN -------------------
+
+@router.get("/cache/stats")
+async def policy_cache_stats(cache: PolicyCache = Depends(get_policy_cache)):
+    return cache.stats()
+
+
+@router.delete("/cache/policies", dependencies=[Depends(require_backend)])
+async def invalidate_policy_cache(
+    policy_no: str = Query(...),
+    dob: str | None = Query(None, description="Omit to drop every DOB cached for the policy"),
+    cache: PolicyCache = Depends(get_policy_cache),
+):
+    removed = await cache.invalidate(policy_no, dob)
+    return {"invalidated": removed}
+
+
+@router.delete("/cache", dependencies=[Depends(require_backend)])
+async def clear_policy_cache(cache: PolicyCache = Depends(get_policy_cache)):
+    await cache.clear()
+    return {"cleared": True}
+
+
+@router.get("/statements/stats")
+async def statement_stats():
+    """
+    Per-statement latency histograms (seconds, cumulative buckets)
+    """
+    return statement_timings.snapshot()
@@ -0,0 +1,410 @@
+import os
+import time
+import uuid
+import random
+import socket
+import asyncio
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+from decouple import config
+from starlette.concurrency import run_in_threadpool
+
+from .sms import send_sms
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------
+# SMS QUEUE CONFIG
+# -------------------------------------------------
+SMS_QUEUE_PATH = config(
+    "SMS_QUEUE_PATH",
+    default=str(Path(__file__).resolve().parent.parent / "sms_queue.sqlite3"),
+)
+SMS_QUEUE_CONCURRENCY = config("SMS_QUEUE_CONCURRENCY", default=5, cast=int)
+SMS_QUEUE_BATCH_SIZE = config("SMS_QUEUE_BATCH_SIZE", default=100, cast=int)
+# Identical texts are sent as one gateway call with comma-separated numbers
+SMS_QUEUE_MAX_RECIPIENTS = config("SMS_QUEUE_MAX_RECIPIENTS", default=50, cast=int)
+SMS_QUEUE_MAX_ATTEMPTS = config("SMS_QUEUE_MAX_ATTEMPTS", default=5, cast=int)
+SMS_QUEUE_BACKOFF_BASE = config("SMS_QUEUE_BACKOFF_BASE", default=2.0, cast=float)
+SMS_QUEUE_BACKOFF_MAX = config("SMS_QUEUE_BACKOFF_MAX", default=300.0, cast=float)
+SMS_QUEUE_PER_NUMBER_INTERVAL = config("SMS_QUEUE_PER_NUMBER_INTERVAL", default=5.0, cast=float)
+SMS_QUEUE_POLL_INTERVAL = config("SMS_QUEUE_POLL_INTERVAL", default=1.0, cast=float)
+# A claimed message whose worker hasn't reported back within this long is
+# assumed lost with its worker and queued again; keep it well above the time
+# one claim takes to send (SMS_QUEUE_BATCH_SIZE / concurrency gateway calls)
+SMS_QUEUE_LEASE_SECONDS = config("SMS_QUEUE_LEASE_SECONDS", default=600.0, cast=float)
+# How long stop() lets the batch in flight finish before cancelling it
+SMS_QUEUE_STOP_TIMEOUT = config("SMS_QUEUE_STOP_TIMEOUT", default=15.0, cast=float)
+
+QUEUED = "QUEUED"
+SENDING = "SENDING"
+SENT = "SENT"
+FAILED = "FAILED"
+# The gateway timed out: the text may already have been sent to some or all
+# of the recipients, so it is not retried
+UNKNOWN = "UNKNOWN"
+
+# Gateway timeout status, from send_sms or the gateway itself
+GATEWAY_TIMEOUT = 504
+
+
+# -------------------------------------------------
+# PERSISTENT OUTBOX
+# -------------------------------------------------
+class SmsQueue:
+    """
+    SQLite-backed outbox. Messages are durable from the moment `enqueue`
+    returns. `claim` leases messages to this queue's `owner`; a message
+    still in SENDING after SMS_QUEUE_LEASE_SECONDS (its worker died) is
+    claimable again.
+    """
+
+    def __init__(self, path=SMS_QUEUE_PATH):
+        self.path = path
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sms_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    mobile TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    batchable INTEGER NOT NULL DEFAULT 1,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    provider_response TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    sent_at REAL,
+                    claimed_by TEXT,
+                    claimed_at REAL
+                )
+            """)
+            # Outboxes created before claim leases existed
+            existing = {r["name"] for r in conn.execute("PRAGMA table_info(sms_outbox)")}
+            for column, decl in (("claimed_by", "TEXT"), ("claimed_at", "REAL")):
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE sms_outbox ADD COLUMN {column} {decl}")
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS sms_outbox_due
+                ON sms_outbox (status, next_attempt_at)
+            """)
+            self._conn = conn
+        return self._conn
+
+    def enqueue(self, mobile, message):
+        now = time.time()
+        with self._lock:
+            cur = self._db().execute(
+                """
+                INSERT INTO sms_outbox
+                    (mobile, message, status, next_attempt_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (mobile, message, QUEUED, now, now, now),
+            )
+            return cur.lastrowid
+
+    def get(self, message_id):
+        with self._lock:
+            row = self._db().execute(
+                """
+                SELECT id, status, attempts, last_error,
+                       created_at, updated_at, sent_at
+                FROM sms_outbox WHERE id = ?
+                """,
+                (message_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def claim(self, limit):
+        """
+        Moves up to `limit` due messages to SENDING under this queue's
+        lease and returns them. Expired leases are released first.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                expired = db.execute(
+                    """
+                    UPDATE sms_outbox
+                    SET status = ?, claimed_by = NULL, claimed_at = NULL, updated_at = ?
+                    WHERE status = ? AND (claimed_at IS NULL OR claimed_at <= ?)
+                    """,
+                    (QUEUED, now, SENDING, now - SMS_QUEUE_LEASE_SECONDS),
+                ).rowcount
+                rows = db.execute(
+                    """
+                    SELECT id, mobile, message, attempts, batchable
+                    FROM sms_outbox
+                    WHERE status = ? AND next_attempt_at <= ?
+                    ORDER BY next_attempt_at, id
+                    LIMIT ?
+                    """,
+                    (QUEUED, now, limit),
+                ).fetchall()
+                db.executemany(
+                    """
+                    UPDATE sms_outbox
+                    SET status = ?, claimed_by = ?, claimed_at = ?, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    [(SENDING, self.owner, now, now, r["id"]) for r in rows],
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+        if expired:
+            logger.warning("SMS outbox lease expired | requeued=%s", expired)
+        return [dict(r) for r in rows]
+
+    def mark_sent(self, ids, response):
+        now = time.time()
+        with self._lock:
+            self._db().executemany(
+                """
+                UPDATE sms_outbox
+                SET status = ?, attempts = attempts + 1, provider_response = ?,
+                    last_error = NULL, sent_at = ?, updated_at = ?,
+                    claimed_by = NULL, claimed_at = NULL
+                WHERE id = ?
+                """,
+                [(SENT, response, now, now, i) for i in ids],
+            )
+
+    def mark_unknown(self, ids, error):
+        now = time.time()
+        with self._lock:
+            self._db().executemany(
+                """
+                UPDATE sms_outbox
+                SET status = ?, attempts = attempts + 1, last_error = ?, updated_at = ?,
+                    claimed_by = NULL, claimed_at = NULL
+                WHERE id = ?
+                """,
+                [(UNKNOWN, error, now, i) for i in ids],
+            )
+
+    def mark_failed(self, messages, error, retryable=True, batchable=True):
+        """
+        Schedules a retry with exponential backoff and jitter, or marks
+        the message FAILED once it is out of attempts or not retryable.
+        """
+        now = time.time()
+        updates = []
+        for m in messages:
+            attempts = m["attempts"] + 1
+            if retryable and attempts < SMS_QUEUE_MAX_ATTEMPTS:
+                delay = min(SMS_QUEUE_BACKOFF_MAX, SMS_QUEUE_BACKOFF_BASE * 2 ** (attempts - 1))
+                delay *= random.uniform(0.8, 1.2)
+                updates.append((QUEUED, attempts, int(batchable), now + delay, error, now, m["id"]))
+            else:
+                updates.append((FAILED, attempts, int(batchable), now, error, now, m["id"]))
+
+        with self._lock:
+            self._db().executemany(
+                """
+                UPDATE sms_outbox
+                SET status = ?, attempts = ?, batchable = ?, next_attempt_at = ?,
+                    last_error = ?, updated_at = ?, claimed_by = NULL, claimed_at = NULL
+                WHERE id = ?
+                """,
+                updates,
+            )
+
+    def defer(self, ids, until):
+        with self._lock:
+            self._db().executemany(
+                """
+                UPDATE sms_outbox
+                SET status = ?, next_attempt_at = ?, updated_at = ?,
+                    claimed_by = NULL, claimed_at = NULL
+                WHERE id = ?
+                """,
+                [(QUEUED, until, time.time(), i) for i in ids],
+            )
+
+    def stats(self):
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT status, COUNT(*) FROM sms_outbox GROUP BY status"
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# -------------------------------------------------
+# BACKGROUND DISPATCHER
+# -------------------------------------------------
+class SmsDispatcher:
+    """
+    Drains the outbox in the background: claims due messages, holds back
+    numbers sent to within SMS_QUEUE_PER_NUMBER_INTERVAL, groups identical
+    texts into one gateway call and sends with bounded concurrency.
+    """
+
+    def __init__(self, queue, concurrency=SMS_QUEUE_CONCURRENCY):
+        self.queue = queue
+        self.concurrency = concurrency
+        self._task = None
+        self._wake = None
+        self._stopping = False
+        self._last_sent = {}
+
+    async def start(self):
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Lets the batch in flight finish, for up to SMS_QUEUE_STOP_TIMEOUT.
+        Nothing is re-queued here: messages of a cancelled batch may already
+        be at the gateway, so they wait out their lease instead.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self.wake()
+            try:
+                await asyncio.wait_for(self._task, SMS_QUEUE_STOP_TIMEOUT)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                logger.warning("SMS dispatcher stopped mid-batch; its messages wait out their lease")
+            self._task = None
+
+    def wake(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                sent_any = await self._drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("SMS dispatcher iteration failed")
+                sent_any = False
+
+            if sent_any or self._stopping:
+                continue
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), SMS_QUEUE_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def _rate_limit(self, messages):
+        now = time.monotonic()
+        ready, deferred = [], {}
+        seen = set()
+
+        for m in messages:
+            mobile = m["mobile"]
+            last = self._last_sent.get(mobile)
+            if mobile in seen:
+                wait = SMS_QUEUE_PER_NUMBER_INTERVAL
+            elif last is not None and now - last < SMS_QUEUE_PER_NUMBER_INTERVAL:
+                wait = SMS_QUEUE_PER_NUMBER_INTERVAL - (now - last)
+            else:
+                seen.add(mobile)
+                ready.append(m)
+                continue
+            deferred.setdefault(wait, []).append(m["id"])
+
+        return ready, deferred
+
+    @staticmethod
+    def _group(messages):
+        groups, singles = {}, []
+        for m in messages:
+            if m["batchable"]:
+                groups.setdefault(m["message"], []).append(m)
+            else:
+                singles.append([m])
+
+        batches = list(singles)
+        for group in groups.values():
+            for i in range(0, len(group), SMS_QUEUE_MAX_RECIPIENTS):
+                batches.append(group[i:i + SMS_QUEUE_MAX_RECIPIENTS])
+        return batches
+
+    def _prune_last_sent(self):
+        cutoff = time.monotonic() - SMS_QUEUE_PER_NUMBER_INTERVAL
+        self._last_sent = {k: v for k, v in self._last_sent.items() if v > cutoff}
+
+    async def _drain_once(self):
+        messages = await run_in_threadpool(self.queue.claim, SMS_QUEUE_BATCH_SIZE)
+        if not messages:
+            self._prune_last_sent()
+            return False
+
+        ready, deferred = self._rate_limit(messages)
+        for wait, ids in deferred.items():
+            await run_in_threadpool(self.queue.defer, ids, time.time() + wait)
+
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def deliver(batch):
+            async with slots:
+                await self._send_batch(batch)
+
+        await asyncio.gather(*(deliver(b) for b in self._group(ready)))
+        return True
+
+    async def _send_batch(self, batch):
+        mobiles = ",".join(m["mobile"] for m in batch)
+        now = time.monotonic()
+        for m in batch:
+            self._last_sent[m["mobile"]] = now
+
+        status, response = await send_sms(mobiles, batch[0]["message"])
+
+        if status == 200:
+            await run_in_threadpool(self.queue.mark_sent, [m["id"] for m in batch], response)
+            return
+
+        error = f"Gateway returned {status}: {response}"
+        if status == GATEWAY_TIMEOUT:
+            # The call may have reached the recipients; a retry could text
+            # them twice, so the outcome is recorded as unknown instead
+            await run_in_threadpool(self.queue.mark_unknown, [m["id"] for m in batch], error)
+        elif len(batch) > 1:
+            # One bad number can fail the whole call; retry individually
+            await run_in_threadpool(self.queue.mark_failed, batch, error, True, False)
+        else:
+            retryable = status >= 500 or status == 429
+            await run_in_threadpool(
+                self.queue.mark_failed, batch, error, retryable, bool(batch[0]["batchable"])
+            )
+
+
+sms_queue = SmsQueue()
+sms_dispatcher = SmsDispatcher(sms_queue)
+
+
+async def enqueue_sms(mobile: str, message: str) -> int:
+    message_id = await run_in_threadpool(sms_queue.enqueue, mobile, message)
+    sms_dispatcher.wake()
+    return message_id
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from .utils import generate_otp
 from .sms import send_sms
+from .outbox import enqueue_sms, sms_queue
+from starlette.concurrency import run_in_threadpool
+
+from middleware import is_backend_request, require_backend
+from ratelimit import OTP_IP, OTP_MOBILE, SMS_NOTIFY_MOBILE, client_ip, rate_limiter
 
 # THIS NAME MUST BE EXACTLY "router"
 router = APIRouter(prefix="/otp", tags=["OTP"])
@@ -18,10 +23,23 @@ async def send_otp(request: Request, mobile: str = ""):
 
     resolved_mobile = (payload.get("mobile") or mobile or "").strip()
     custom_message = (payload.get("message") or "").strip()
+    # Queue for background delivery instead of waiting on the gateway
+    queued = bool(payload.get("queue"))
 
     if not resolved_mobile:
         raise HTTPException(status_code=400, detail="mobile is required")
 
+    # Every send costs gateway credit, so throttle before any work is done.
+    # Django's admin notifications all come from one host, so they get a
+    # limit of their own instead of sharing the portal users' OTP buckets.
+    if is_backend_request(request):
+        await rate_limiter.check((SMS_NOTIFY_MOBILE, resolved_mobile))
+    else:
+        await rate_limiter.check(
+            (OTP_IP, client_ip(request)),
+            (OTP_MOBILE, resolved_mobile),
+        )
+
     if custom_message:
         message = custom_message
         otp = None
@@ -29,16 +47,38 @@ async def send_otp(request: Request, mobile: str = ""):
         otp = generate_otp()
         message = f"Your RJBCL KYC OTP is {otp}. Valid for 2 minutes."
 
-    status, response = send_sms(resolved_mobile, message)
+    if queued:
+        message_id = await enqueue_sms(resolved_mobile, message)
+        response_body = {
+            "success": True,
+            "message": "SMS queued for delivery",
+            "message_id": message_id,
+        }
+    else:
+        status, response = await send_sms(resolved_mobile, message)
+
+        if status != 200:
+            raise HTTPException(status_code=502, detail=response)
 
-    if status != 200:
-        raise HTTPException(status_code=502, detail=response)
+        response_body = {
+            "success": True,
+            "message": "SMS sent successfully",
+        }
 
-    response_body = {
-        "success": True,
-        "message": "SMS sent successfully",
-    }
     if otp is not None:
         response_body["otp"] = otp
 
     return response_body
+
+
+@router.get("/sms/{message_id}", dependencies=[Depends(require_backend)])
+async def sms_status(message_id: int):
+    record = await run_in_threadpool(sms_queue.get, message_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return record
+
+
+@router.get("/sms", dependencies=[Depends(require_backend)])
+async def sms_queue_stats():
+    return await run_in_threadpool(sms_queue.stats)
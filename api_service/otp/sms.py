@@ -1,7 +1,46 @@
-import requests
+import time
+
+import httpx
 from decouple import config
 
-def send_sms(mobile: str, message: str):
+from metrics import otp_send_latency
+
+# Per-request gateway timeout, and how long a send may wait for a free
+# connection when SPARROW_SMS_MAX_CONCURRENCY sends are already in flight
+SMS_TIMEOUT = config("SPARROW_SMS_TIMEOUT", default=10, cast=float)
+SMS_POOL_TIMEOUT = config("SPARROW_SMS_POOL_TIMEOUT", default=5, cast=float)
+SMS_MAX_CONCURRENCY = config("SPARROW_SMS_MAX_CONCURRENCY", default=20, cast=int)
+SMS_MAX_KEEPALIVE = config("SPARROW_SMS_MAX_KEEPALIVE", default=10, cast=int)
+
+_client = None
+
+
+def get_sms_client() -> httpx.AsyncClient:
+    """
+    Shared keep-alive client for the Sparrow gateway
+    """
+    global _client
+
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(SMS_TIMEOUT, pool=SMS_POOL_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=SMS_MAX_CONCURRENCY,
+                max_keepalive_connections=SMS_MAX_KEEPALIVE,
+            ),
+        )
+    return _client
+
+
+async def close_sms_client():
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def send_sms(mobile: str, message: str):
     payload = {
         "token": config("SPARROW_SMS_TOKEN"),
         "from": config("SPARROW_SMS_FROM"),  # REQUIRED
@@ -9,10 +48,18 @@ def send_sms(mobile: str, message: str):
         "text": message,
     }
 
-    r = requests.post(
-        config("SPARROW_SMS_URL"),
-        data=payload,
-        timeout=10
-    )
+    start = time.perf_counter()
+    try:
+        r = await get_sms_client().post(
+            config("SPARROW_SMS_URL"),
+            data=payload,
+        )
+    except httpx.TimeoutException:
+        otp_send_latency.observe("timeout", time.perf_counter() - start)
+        return 504, "SMS gateway timed out"
+    except httpx.HTTPError as e:
+        otp_send_latency.observe("error", time.perf_counter() - start)
+        return 502, f"SMS gateway error: {e}"
 
+    otp_send_latency.observe("ok" if r.status_code == 200 else "rejected", time.perf_counter() - start)
     return r.status_code, r.text
@@ -0,0 +1,271 @@
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request, status
+
+from metrics import rate_limited
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------
+# RATE LIMIT ENV
+# -------------------------------------------------
+# Limits are "<burst>/<seconds>": up to <burst> requests at once, refilled
+# evenly so <burst> more are allowed every <seconds>.
+RATE_LIMIT_OTP_MOBILE = os.getenv("RATE_LIMIT_OTP_MOBILE", "5/300")
+RATE_LIMIT_OTP_IP = os.getenv("RATE_LIMIT_OTP_IP", "30/60")
+RATE_LIMIT_LOGIN_USERNAME = os.getenv("RATE_LIMIT_LOGIN_USERNAME", "5/60")
+RATE_LIMIT_LOGIN_IP = os.getenv("RATE_LIMIT_LOGIN_IP", "20/60")
+# Django's own notifications (backend token on /otp/send), per mobile
+RATE_LIMIT_SMS_NOTIFY_MOBILE = os.getenv("RATE_LIMIT_SMS_NOTIFY_MOBILE", "10/3600")
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# Optional shared store (needs the `redis` package when set; a
+# "fakeredis://" URL uses an in-process stand-in from `fakeredis[lua]`)
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+RATE_LIMIT_PREFIX = os.getenv("RATE_LIMIT_PREFIX", "kycapi:rl:")
+
+# Peers allowed to name the real client in X-Forwarded-For (e.g. the Django
+# app or a reverse proxy); everyone else is keyed by the socket address.
+# The default trusts a Django app on the same host. When Django runs on
+# another host, add its address here: otherwise the X-Forwarded-For it sends
+# is ignored and every portal user shares the Django host's OTP_IP bucket.
+RATE_LIMIT_TRUSTED_PROXIES = frozenset(
+    p.strip() for p in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "127.0.0.1,::1").split(",") if p.strip()
+)
+
+
+class RateLimit:
+    """
+    Token-bucket parameters for one named limit
+    """
+
+    def __init__(self, name, spec):
+        burst, period = spec.split("/")
+        self.name = name
+        self.capacity = float(burst)
+        self.rate = self.capacity / float(period)  # tokens per second
+
+    def __repr__(self):
+        return f"<RateLimit {self.name} {self.capacity:g}/{self.capacity / self.rate:g}s>"
+
+
+# -------------------------------------------------
+# BUCKET STORES
+# -------------------------------------------------
+class MemoryBucketStore:
+    """
+    Per-process buckets, LRU-bounded so random keys can't grow memory
+    """
+
+    def __init__(self, max_keys=RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    async def take(self, buckets):
+        """
+        `buckets` are (key, capacity, rate) triples. Consumes one token from
+        each only when every one has a token; returns the per-bucket waits
+        (all 0 when allowed, else seconds until that bucket has one).
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, capacity, rate in buckets:
+                tokens, updated_at = self._buckets.get(key, (capacity, now))
+                levels.append(min(capacity, tokens + (now - updated_at) * rate))
+
+            waits = [0.0 if tokens >= 1 else (1 - tokens) / rate
+                     for tokens, (_, _, rate) in zip(levels, buckets)]
+            allowed = not any(waits)
+
+            for tokens, (key, _, _) in zip(levels, buckets):
+                self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return waits
+
+    async def reset(self, key=None):
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key, None)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RedisBucketStore:
+    """
+    Buckets shared by every api_service worker; refill and take happen in
+    one Lua call so concurrent workers can't double-spend a token.
+
+    A "fakeredis://" URL runs against an in-process stand-in (needs the
+    `fakeredis[lua]` package) for development and tests.
+    """
+
+    # ARGV: now, then capacity and rate for each key
+    _TAKE = """
+    local now = tonumber(ARGV[1])
+    local levels = {}
+    local waits = {}
+    local allowed = true
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[i * 2])
+        local rate = tonumber(ARGV[i * 2 + 1])
+        local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+        local tokens = tonumber(bucket[1]) or capacity
+        local ts = tonumber(bucket[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+        levels[i] = tokens
+        waits[i] = 0
+        if tokens < 1 then
+            waits[i] = (1 - tokens) / rate
+            allowed = false
+        end
+    end
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[i * 2])
+        local rate = tonumber(ARGV[i * 2 + 1])
+        local tokens = levels[i]
+        if allowed then
+            tokens = tokens - 1
+        end
+        redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+        redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+        waits[i] = tostring(waits[i])
+    end
+    return waits
+    """
+
+    def __init__(self, url, prefix=RATE_LIMIT_PREFIX):
+        self.prefix = prefix
+        self.client = self._connect(url)
+        self._take = self.client.register_script(self._TAKE)
+
+    @staticmethod
+    def _connect(url):
+        if url.startswith("fakeredis://"):
+            try:
+                import fakeredis
+            except ImportError:
+                raise RuntimeError("RATE_LIMIT_REDIS_URL is a fakeredis:// URL but `fakeredis` is not installed")
+            return fakeredis.FakeAsyncRedis()
+
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but `redis` is not installed")
+        return aioredis.from_url(url)
+
+    async def take(self, buckets):
+        keys = [self.prefix + key for key, _, _ in buckets]
+        args = [time.time()]
+        for _, capacity, rate in buckets:
+            args += [capacity, rate]
+        waits = await self._take(keys=keys, args=args)
+        return [float(w) for w in waits]
+
+    async def reset(self, key=None):
+        if key is not None:
+            await self.client.delete(self.prefix + key)
+            return
+
+        keys = [k async for k in self.client.scan_iter(match=f"{self.prefix}*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+# -------------------------------------------------
+# LIMITER
+# -------------------------------------------------
+class RateLimiter:
+    """
+    Applies named token-bucket limits to caller-supplied keys.
+
+    All of a request's buckets are taken together: a request rejected by
+    one limit doesn't spend tokens from the others.
+
+    Store failures fail open (logged and counted) so a Redis outage
+    doesn't take login and OTP down with it.
+    """
+
+    def __init__(self, store, enabled=RATE_LIMIT_ENABLED):
+        self.store = store
+        self.enabled = enabled
+        self._stats = {"allowed": 0, "limited": 0, "store_errors": 0}
+
+    async def check(self, *checks):
+        """
+        `checks` are (RateLimit, key) pairs; empty keys are skipped.
+        Raises 429 with Retry-After when any bucket is empty.
+        """
+        if not self.enabled:
+            return
+
+        checks = [(limit, key) for limit, key in checks if key]
+        if not checks:
+            return
+
+        try:
+            waits = await self.store.take(
+                [(f"{limit.name}:{key}", limit.capacity, limit.rate) for limit, key in checks]
+            )
+        except Exception as e:
+            self._stats["store_errors"] += 1
+            logger.warning("Rate limit store failed, allowing request: %s", e)
+            return
+
+        if any(waits):
+            self._stats["limited"] += 1
+            for (limit, _), wait in zip(checks, waits):
+                if wait > 0:
+                    rate_limited.inc(limit.name)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, retry later",
+                headers={"Retry-After": str(max(1, math.ceil(max(waits))))},
+            )
+
+        self._stats["allowed"] += 1
+
+    def stats(self):
+        return {**self._stats, "enabled": self.enabled}
+
+
+def client_ip(request: Request):
+    """
+    Socket peer address, or the first X-Forwarded-For hop when the peer
+    is a trusted proxy
+    """
+    peer = request.client.host if request.client else ""
+    if peer in RATE_LIMIT_TRUSTED_PROXIES:
+        forwarded = request.headers.get("X-Forwarded-For", "")
+        first = forwarded.split(",")[0].strip()
+        if first:
+            return first
+    return peer
+
+
+OTP_MOBILE = RateLimit("otp_mobile", RATE_LIMIT_OTP_MOBILE)
+OTP_IP = RateLimit("otp_ip", RATE_LIMIT_OTP_IP)
+LOGIN_USERNAME = RateLimit("login_username", RATE_LIMIT_LOGIN_USERNAME)
+LOGIN_IP = RateLimit("login_ip", RATE_LIMIT_LOGIN_IP)
+SMS_NOTIFY_MOBILE = RateLimit("sms_notify_mobile", RATE_LIMIT_SMS_NOTIFY_MOBILE)
+
+rate_limiter = RateLimiter(
+    RedisBucketStore(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_REDIS_URL else MemoryBucketStore(),
+)
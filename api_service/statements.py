@@ -0,0 +1,145 @@
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from metrics import statement_timings
+from timing import log_slow_query, record
+
+
+class Statement:
+    """
+    A named, parameterized SQL statement.
+
+    `prepare` marks statements whose text never changes; the executor keeps
+    one cursor per pooled connection for them, so pyodbc prepares the text
+    once and re-executes the prepared handle on later calls.
+    """
+
+    def __init__(self, name, sql, prepare=True):
+        self.name = name
+        self.sql = sql
+        self.prepare = prepare
+
+    @contextmanager
+    def timed(self, params=()):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            statement_timings.observe(self.name, elapsed)
+            record("mssql_query", elapsed)
+            log_slow_query(self.name, elapsed, params)
+
+    def __repr__(self):
+        return f"<Statement {self.name}>"
+
+
+STATEMENTS = {}
+
+
+def register(name, sql, prepare=True):
+    if name in STATEMENTS:
+        raise ValueError(f"Statement already registered: {name}")
+    STATEMENTS[name] = Statement(name, sql, prepare)
+    return STATEMENTS[name]
+
+
+# -------------------------------------------------
+# POLICY LOOKUPS (tblInsureddetail ⋈ tblBranch)
+# -------------------------------------------------
+_POLICY_COLUMNS = """
+    tid.policyno,
+    tid.firstname,
+    tid.lastname,
+    tid.dob,
+    tid.mobile,
+    tid.ClientNo,
+    tid.NewClientId,
+    tid.branch AS branch_code,
+    tb.BranchName AS branch_name
+"""
+
+_POLICY_FROM = """
+FROM tblInsureddetail tid
+LEFT JOIN tblBranch tb
+    ON tid.Branch = tb.Branch
+"""
+
+POLICY_LOOKUP = register(
+    "policy_lookup",
+    f"SELECT {_POLICY_COLUMNS} {_POLICY_FROM} WHERE tid.policyno = ? AND tid.dob = ?",
+)
+
+POLICY_PAGE = register(
+    "policy_page",
+    f"SELECT TOP (?) {_POLICY_COLUMNS} {_POLICY_FROM} "
+    "WHERE tid.policyno > ? ORDER BY tid.policyno",
+)
+
+POLICY_STREAM = register(
+    "policy_stream",
+    f"SELECT {_POLICY_COLUMNS} {_POLICY_FROM} "
+    "WHERE tid.policyno > ? ORDER BY tid.policyno",
+)
+
+POLICY_IDENTITY = register(
+    "policy_identity",
+    f"""
+    WITH matched AS (
+        SELECT TOP 1 {_POLICY_COLUMNS} {_POLICY_FROM}
+        WHERE tid.policyno = ? AND tid.dob = ?
+    )
+    SELECT
+        m.*,
+        rel.policyno AS related_policyno
+    FROM matched m
+    LEFT JOIN tblInsureddetail rel
+        ON rel.firstname = m.firstname
+       AND rel.lastname = m.lastname
+       AND rel.dob = m.dob
+       AND rel.mobile = m.mobile
+    """,
+)
+
+RELATED_POLICIES = register(
+    "related_policies",
+    """
+    SELECT policyno
+    FROM tblInsureddetail
+    WHERE firstname = ?
+      AND lastname = ?
+      AND dob = ?
+      AND mobile = ?
+    """,
+)
+
+
+# -------------------------------------------------
+# BATCH LOOKUPS (text depends on the chunk size)
+# -------------------------------------------------
+@lru_cache(maxsize=None)
+def policy_batch_in(size):
+    placeholders = ", ".join("?" for _ in range(size))
+    return Statement(
+        "policy_batch_in",
+        f"SELECT {_POLICY_COLUMNS} {_POLICY_FROM} WHERE tid.policyno IN ({placeholders})",
+        prepare=False,
+    )
+
+
+@lru_cache(maxsize=None)
+def policy_batch_pairs(size):
+    values = ", ".join("(?, ?)" for _ in range(size))
+    return Statement(
+        "policy_batch_pairs",
+        f"""
+        SELECT {_POLICY_COLUMNS}
+        FROM tblInsureddetail tid
+        JOIN (VALUES {values}) AS k(policyno, dob)
+            ON tid.policyno = k.policyno AND tid.dob = k.dob
+        LEFT JOIN tblBranch tb
+            ON tid.Branch = tb.Branch
+        """,
+        prepare=False,
+    )
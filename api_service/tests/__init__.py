@@ -0,0 +1,14 @@
+"""
+api_service unit tests. Run from api_service/:
+
+    python -m pytest tests
+    python -m unittest discover tests
+
+No database, Redis or SMS gateway is needed; where a module imports
+pyodbc without an ODBC driver available, the load-test shim stands in.
+The Redis rate-limit store runs against fakeredis (requirements-dev.txt)
+and is skipped when it isn't installed.
+"""
+from benchmarks.fakedb import install_pyodbc_shim
+
+install_pyodbc_shim()
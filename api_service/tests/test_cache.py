@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from cache import PolicyCache, normalize_dob, normalize_policy_key
+
+ROW = {"PolicyNo": "POL001", "DOB": "1990-01-15"}
+
+
+class FakeLoader:
+    """
+    Stands in for the SQL lookup: only the exact stored values match
+    """
+
+    def __init__(self, rows=None):
+        self.rows = rows or {("POL001", "1990-01-15"): [ROW]}
+        self.calls = []
+
+    async def __call__(self, policy_no, dob):
+        self.calls.append((policy_no, dob))
+        return self.rows.get((policy_no, dob), [])
+
+
+class NormalizationTest(unittest.TestCase):
+
+    def test_dob_formats(self):
+        self.assertEqual(normalize_dob("1990-01-15"), "1990-01-15")
+        self.assertEqual(normalize_dob("15-01-1990"), "1990-01-15")
+        self.assertEqual(normalize_dob("1990-01-15 00:00:00"), "1990-01-15")
+        self.assertEqual(normalize_dob(" 15/01/1990 "), "15/01/1990")
+
+    def test_policy_key(self):
+        self.assertEqual(normalize_policy_key(" pol001 ", "15-01-1990"), ("POL001", "1990-01-15"))
+
+
+class PolicyCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("cache.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = PolicyCache(ttl=300, negative_ttl=30, max_entries=100)
+
+    def lookup(self, loader, policy_no, dob):
+        return asyncio.run(self.cache.get_or_load(policy_no, dob, loader))
+
+    def test_loader_gets_the_values_it_is_cached_under(self):
+        loader = FakeLoader()
+
+        self.assertEqual(self.lookup(loader, " pol001", "15-01-1990"), [ROW])
+        self.assertEqual(self.lookup(loader, "POL001", "1990-01-15"), [ROW])
+        self.assertEqual(loader.calls, [("POL001", "1990-01-15")])
+
+    def test_miss_in_one_format_cannot_poison_another(self):
+        loader = FakeLoader()
+
+        # Not found, whatever the spelling: the negative entry is a real miss
+        self.assertEqual(self.lookup(loader, "POL001", "16-01-1990"), [])
+        self.assertEqual(self.lookup(loader, "POL001", "15-01-1990"), [ROW])
+        self.assertEqual(self.lookup(loader, "pol001 ", "1990-01-15"), [ROW])
+        self.assertEqual(loader.calls, [("POL001", "1990-01-16"), ("POL001", "1990-01-15")])
+
+    def test_negative_results_expire_after_negative_ttl(self):
+        loader = FakeLoader(rows={})
+
+        self.assertEqual(self.lookup(loader, "POL404", "1990-01-15"), [])
+        self.now += 29
+        self.assertEqual(self.lookup(loader, "POL404", "1990-01-15"), [])
+        self.assertEqual(len(loader.calls), 1)
+
+        self.now += 2
+        self.lookup(loader, "POL404", "1990-01-15")
+        self.assertEqual(len(loader.calls), 2)
+        self.assertEqual(self.cache.stats()["negative_hits"], 1)
+
+    def test_found_results_keep_the_full_ttl(self):
+        loader = FakeLoader()
+
+        self.lookup(loader, "POL001", "1990-01-15")
+        self.now += 299
+        self.lookup(loader, "POL001", "1990-01-15")
+        self.assertEqual(len(loader.calls), 1)
+
+        self.now += 2
+        self.lookup(loader, "POL001", "1990-01-15")
+        self.assertEqual(len(loader.calls), 2)
@@ -0,0 +1,39 @@
+import unittest
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import middleware
+from cache import PolicyCache, get_policy_cache
+from mssql_routes import router
+
+BACKEND = {"Authorization": "Bearer backend-token"}
+USER_JWT = {"Authorization": "Bearer some.user.jwt"}
+
+
+class CacheAdminRoutesTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(middleware, "_BACKEND_TOKEN_BYTES", b"backend-token")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.cache = PolicyCache()
+        app = FastAPI()
+        app.include_router(router, prefix="/mssql")
+        app.dependency_overrides[get_policy_cache] = lambda: self.cache
+        self.client = TestClient(app)
+
+    def test_user_token_cannot_flush_or_invalidate(self):
+        for headers in (USER_JWT, {}):
+            self.assertEqual(self.client.delete("/mssql/cache", headers=headers).status_code, 403)
+            response = self.client.delete("/mssql/cache/policies?policy_no=POL001", headers=headers)
+            self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.cache.stats()["invalidations"], 0)
+
+    def test_backend_token_can_flush_and_invalidate(self):
+        self.assertEqual(self.client.delete("/mssql/cache", headers=BACKEND).json(), {"cleared": True})
+        response = self.client.delete("/mssql/cache/policies?policy_no=POL001", headers=BACKEND)
+        self.assertEqual(response.json(), {"invalidated": 0})
+        self.assertEqual(self.cache.stats()["invalidations"], 2)
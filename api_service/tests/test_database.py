@@ -0,0 +1,240 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+import database
+from database import ConnectionPool, MSSQLExecutor, PoolTimeoutError
+from statements import POLICY_STREAM
+
+
+class FakeCursor:
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        self.conn.calls.append(("execute", threading.current_thread().name))
+        if self.conn.fail_execute:
+            raise RuntimeError("execute failed")
+        self.rows = list(self.conn.rows)
+
+    def fetchone(self):
+        return (1,)
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.conn.calls.append(("cursor.close", threading.current_thread().name))
+
+
+class FakeConnection:
+
+    def __init__(self, rows=(), fail_execute=False, fail_ping=False):
+        self.rows = rows
+        self.fail_execute = fail_execute
+        self.fail_ping = fail_ping
+        self.fail_rollback = False
+        self.calls = []
+        self.closed = False
+
+    def cursor(self):
+        if self.fail_ping:
+            raise RuntimeError("connection dropped")
+        self.calls.append(("cursor", threading.current_thread().name))
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.calls.append(("rollback", threading.current_thread().name))
+        if self.fail_rollback:
+            raise RuntimeError("rollback failed")
+
+    def close(self):
+        self.closed = True
+
+
+class PoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.created = []
+
+    def make_pool(self, size=2, max_overflow=0, timeout=1, recycle=0, ping_after=None):
+        def creator():
+            conn = FakeConnection()
+            self.created.append(conn)
+            return conn
+
+        return ConnectionPool(
+            creator, name="MSSQL", size=size, max_overflow=max_overflow,
+            timeout=timeout, recycle=recycle, ping_after=ping_after,
+        )
+
+    def fake_clock(self):
+        patcher = mock.patch("database.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_contention_stays_within_size_and_overflow(self):
+        pool = self.make_pool(size=2, max_overflow=1, timeout=5)
+        lock = threading.Lock()
+        in_use = [0, 0]  # current, peak
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(20):
+                    conn = pool.acquire()
+                    with lock:
+                        in_use[0] += 1
+                        in_use[1] = max(in_use)
+                    time.sleep(0.001)
+                    with lock:
+                        in_use[0] -= 1
+                    pool.release(conn)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = pool.stats()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(in_use[1], 3)
+        self.assertEqual(stats["checkouts"], 160)
+        self.assertGreater(stats["waits"], 0)
+        self.assertEqual(stats["timeouts"], 0)
+        # Overflow connections are closed on release, never kept idle
+        self.assertEqual(stats["in_use"], 0)
+        self.assertLessEqual(stats["idle"], 2)
+        self.assertEqual(stats["open"], stats["idle"])
+        self.assertEqual(len([c for c in self.created if not c.closed]), stats["open"])
+
+    def test_exhausted_pool_times_out(self):
+        pool = self.make_pool(size=1, timeout=0.05)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire()
+        self.assertEqual(pool.stats()["waits"], 1)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_waiter_gets_the_released_connection(self):
+        pool = self.make_pool(size=1, timeout=5)
+        conn = pool.acquire()
+        acquired = []
+
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.start()
+        time.sleep(0.05)
+        pool.release(conn)
+        waiter.join()
+
+        self.assertEqual(acquired, [conn])
+        self.assertEqual(pool.stats()["waits"], 1)
+        self.assertEqual(pool.stats()["connects"], 1)
+
+    def test_overflow_connection_is_closed_on_release(self):
+        pool = self.make_pool(size=1, max_overflow=1)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+
+        self.assertFalse(first.closed)
+        self.assertTrue(second.closed)
+        self.assertEqual(pool.stats()["open"], 1)
+
+    def test_old_connection_is_recycled(self):
+        self.fake_clock()
+        pool = self.make_pool(size=1, recycle=60)
+        old = pool.acquire()
+        pool.release(old)
+
+        self.now += 30
+        self.assertIs(pool.acquire(), old)
+        pool.release(old)
+
+        self.now += 31
+        new = pool.acquire()
+        self.assertIsNot(new, old)
+        self.assertTrue(old.closed)
+        self.assertEqual(pool.stats()["recycled"], 1)
+        self.assertEqual(pool.stats()["open"], 1)
+
+    def test_idle_connection_failing_ping_is_replaced(self):
+        self.fake_clock()
+        pool = self.make_pool(size=1, ping_after=10)
+        old = pool.acquire()
+        pool.release(old)
+
+        old.fail_ping = True
+        self.now += 5
+        self.assertIs(pool.acquire(), old)  # not idle long enough to ping
+        pool.release(old)
+
+        self.now += 11
+        new = pool.acquire()
+        self.assertIsNot(new, old)
+        self.assertTrue(old.closed)
+        self.assertEqual(pool.stats()["ping_failures"], 1)
+
+    def test_failed_rollback_discards_the_connection(self):
+        pool = self.make_pool(size=1)
+        conn = pool.acquire()
+        conn.fail_rollback = True
+        pool.release(conn)
+
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()["discarded"], 1)
+        self.assertEqual(pool.stats()["open"], 0)
+
+
+class StreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = FakeConnection(rows=[(i,) for i in range(5)])
+        self.pool = ConnectionPool(
+            lambda: self.conn, name="MSSQL", size=1, max_overflow=0,
+            timeout=1, recycle=0, ping_after=None,
+        )
+        patcher = mock.patch.object(database, "mssql_pool", self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.executor = MSSQLExecutor(max_workers=1)
+        self.addCleanup(self.executor.shutdown)
+
+    def collect(self):
+        async def run():
+            loop_thread = threading.current_thread().name
+            batches = [rows async for rows in self.executor.stream(POLICY_STREAM, (), batch_size=2)]
+            return loop_thread, batches
+
+        return asyncio.run(run())
+
+    def test_every_odbc_call_runs_on_the_executor(self):
+        loop_thread, batches = self.collect()
+
+        self.assertEqual(batches, [[(0,), (1,)], [(2,), (3,)], [(4,)]])
+        self.assertEqual(
+            [name for name, _ in self.conn.calls], ["cursor", "execute", "cursor.close", "rollback"]
+        )
+        for _, thread in self.conn.calls:
+            self.assertNotEqual(thread, loop_thread)
+            self.assertTrue(thread.startswith("mssql"))
+        self.assertEqual(self.pool.stats()["in_use"], 0)
+
+    def test_connection_is_released_when_the_query_fails(self):
+        self.conn.fail_execute = True
+
+        with self.assertRaises(RuntimeError):
+            self.collect()
+        self.assertEqual(self.pool.stats()["in_use"], 0)
+        self.assertEqual(self.pool.stats()["idle"], 1)
@@ -0,0 +1,53 @@
+import unittest
+from unittest import mock
+
+from middleware import VerifiedTokenCache
+
+
+class VerifiedTokenCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("middleware.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = VerifiedTokenCache(max_size=2, max_ttl=300)
+
+    def test_expires_at_token_exp_when_sooner(self):
+        self.cache.set("token", "agent1", exp=self.now + 60)
+
+        self.now += 59
+        self.assertEqual(self.cache.get("token"), "agent1")
+        self.now += 1
+        self.assertIsNone(self.cache.get("token"))
+
+    def test_expires_after_max_ttl_when_exp_is_later(self):
+        self.cache.set("token", "agent1", exp=self.now + 3600)
+
+        self.now += 299
+        self.assertEqual(self.cache.get("token"), "agent1")
+        self.now += 1
+        self.assertIsNone(self.cache.get("token"))
+
+    def test_token_without_exp_uses_max_ttl(self):
+        self.cache.set("token", "agent1")
+
+        self.now += 300
+        self.assertIsNone(self.cache.get("token"))
+
+    def test_already_expired_token_is_never_served(self):
+        self.cache.set("token", "agent1", exp=self.now - 1)
+        self.assertIsNone(self.cache.get("token"))
+
+    def test_lru_bound_and_hashed_keys(self):
+        for token in ("a", "b", "c"):
+            self.cache.set(token, token.upper())
+
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("c"), "C")
+        self.assertNotIn("c", self.cache._data)
+
+    def test_zero_size_disables_the_cache(self):
+        cache = VerifiedTokenCache(max_size=0)
+        cache.set("token", "agent1")
+        self.assertIsNone(cache.get("token"))
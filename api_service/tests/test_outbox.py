@@ -0,0 +1,136 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import middleware
+from otp import outbox, routes
+from otp.outbox import QUEUED, SENDING, SENT, UNKNOWN, SmsDispatcher, SmsQueue
+
+
+class OutboxTestCase(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        self.addCleanup(self._remove)
+
+        self.now = 1_000_000.0
+        patcher = mock.patch("otp.outbox.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.queue = SmsQueue(self.path)
+        self.addCleanup(self.queue.close)
+
+    def _remove(self):
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def other_worker(self):
+        worker = SmsQueue(self.path)
+        self.addCleanup(worker.close)
+        return worker
+
+    def status(self, message_id):
+        return self.queue.get(message_id)["status"]
+
+
+class ClaimLeaseTest(OutboxTestCase):
+
+    def test_claimed_rows_are_leased_to_their_worker(self):
+        ids = [self.queue.enqueue(f"98000000{i}", "hello") for i in range(3)]
+        other = self.other_worker()
+
+        claimed = self.queue.claim(10)
+        self.assertEqual([m["id"] for m in claimed], ids)
+        self.assertEqual(other.claim(10), [])
+
+        owners = self.queue._db().execute("SELECT DISTINCT claimed_by FROM sms_outbox").fetchall()
+        self.assertEqual([r[0] for r in owners], [self.queue.owner])
+
+    def test_expired_lease_is_requeued_for_another_worker(self):
+        message_id = self.queue.enqueue("9800000001", "hello")
+        self.queue.claim(10)
+        other = self.other_worker()
+
+        self.now += outbox.SMS_QUEUE_LEASE_SECONDS - 1
+        self.assertEqual(other.claim(10), [])
+        self.assertEqual(self.status(message_id), SENDING)
+
+        self.now += 2
+        self.assertEqual([m["id"] for m in other.claim(10)], [message_id])
+        owner = self.queue._db().execute(
+            "SELECT claimed_by FROM sms_outbox WHERE id = ?", (message_id,)
+        ).fetchone()[0]
+        self.assertEqual(owner, other.owner)
+
+    def test_stop_leaves_other_workers_rows_alone(self):
+        message_id = self.queue.enqueue("9800000001", "hello")
+        self.other_worker().claim(10)
+
+        async def start_and_stop():
+            dispatcher = SmsDispatcher(self.queue)
+            await dispatcher.start()
+            await dispatcher.stop()
+
+        asyncio.run(start_and_stop())
+        self.assertEqual(self.status(message_id), SENDING)
+
+
+class GatewayTimeoutTest(OutboxTestCase):
+
+    def send(self, status, recipients):
+        for i in range(recipients):
+            self.queue.enqueue(f"98000000{i}", "hello")
+        batch = self.queue.claim(10)
+
+        async def gateway(mobiles, message):
+            return status, "gateway response"
+
+        with mock.patch("otp.outbox.send_sms", gateway):
+            asyncio.run(SmsDispatcher(self.queue)._send_batch(batch))
+        return [self.status(m["id"]) for m in batch]
+
+    def test_timeout_is_unknown_for_a_single_recipient(self):
+        self.assertEqual(self.send(504, 1), [UNKNOWN])
+
+    def test_timeout_is_unknown_for_a_batch(self):
+        self.assertEqual(self.send(504, 3), [UNKNOWN] * 3)
+
+    def test_other_server_errors_are_retried(self):
+        self.assertEqual(self.send(502, 1), [QUEUED])
+
+    def test_success(self):
+        self.assertEqual(self.send(200, 2), [SENT] * 2)
+
+
+class SmsStatusRoutesTest(OutboxTestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(middleware, "_BACKEND_TOKEN_BYTES", b"backend-token")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(routes, "sms_queue", self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        app = FastAPI()
+        app.include_router(routes.router)
+        self.client = TestClient(app)
+
+    def test_status_and_stats_need_the_backend_token(self):
+        message_id = self.queue.enqueue("9800000001", "hello")
+
+        for path in (f"/otp/sms/{message_id}", "/otp/sms"):
+            self.assertEqual(self.client.get(path).status_code, 403)
+            response = self.client.get(path, headers={"Authorization": "Bearer backend-token"})
+            self.assertEqual(response.status_code, 200)
@@ -0,0 +1,110 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from fastapi import HTTPException
+
+from ratelimit import MemoryBucketStore, RateLimit, RateLimiter, RedisBucketStore
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+# Power-of-two periods keep the refill arithmetic exact
+MOBILE = RateLimit("otp_mobile", "2/64")  # one token every 32s
+IP = RateLimit("otp_ip", "4/64")
+
+
+class BucketTestMixin:
+    """
+    The same behaviour on every store; subclasses set `clock` and `make_store`
+    """
+
+    clock = None
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch(self.clock, side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_checks(self, steps):
+        """
+        Runs `steps` against a fresh limiter: each is (advance_seconds,
+        checks). Returns None for an allowed step, else its Retry-After.
+        """
+        async def run():
+            limiter = RateLimiter(self.make_store(), enabled=True)
+            results = []
+            for advance, checks in steps:
+                self.now += advance
+                try:
+                    await limiter.check(*checks)
+                    results.append(None)
+                except HTTPException as e:
+                    self.assertEqual(e.status_code, 429)
+                    results.append(int(e.headers["Retry-After"]))
+            return results
+
+        return asyncio.run(run())
+
+    def test_burst_then_retry_after(self):
+        mobile = [(MOBILE, "9800000000")]
+        self.assertEqual(self.run_checks([(0, mobile), (0, mobile), (0, mobile)]), [None, None, 32])
+
+    def test_refill(self):
+        mobile = [(MOBILE, "9800000000")]
+        steps = [(0, mobile), (0, mobile), (16, mobile), (16, mobile), (0, mobile)]
+        # 16s in, half a token is still missing: 16s to go
+        self.assertEqual(self.run_checks(steps), [None, None, 16, None, 32])
+
+    def test_keys_are_independent(self):
+        steps = [(0, [(MOBILE, "a")])] * 3 + [(0, [(MOBILE, "b")])]
+        self.assertEqual(self.run_checks(steps), [None, None, 32, None])
+
+    def test_rejection_does_not_drain_other_buckets(self):
+        # The mobile bucket rejects the 3rd to 5th sends; the shared IP
+        # bucket must still have 2 tokens for the other mobile afterwards
+        steps = [(0, [(MOBILE, "a"), (IP, "10.0.0.1")])] * 5
+        steps += [(0, [(MOBILE, "b"), (IP, "10.0.0.1")])] * 2
+        steps += [(0, [(IP, "10.0.0.1")])]
+        self.assertEqual(
+            self.run_checks(steps),
+            [None, None, 32, 32, 32, None, None, 16],
+        )
+
+    def test_empty_keys_are_skipped(self):
+        self.assertEqual(self.run_checks([(0, [(MOBILE, "")])] * 3), [None, None, None])
+
+
+class MemoryBucketStoreTest(BucketTestMixin, unittest.TestCase):
+    clock = "ratelimit.time.monotonic"
+
+    def make_store(self):
+        return MemoryBucketStore()
+
+    def test_keys_are_lru_bounded(self):
+        store = MemoryBucketStore(max_keys=2)
+        for key in ("a", "b", "c"):
+            asyncio.run(store.take([(key, 1, 1)]))
+        self.assertEqual(list(store._buckets), ["b", "c"])
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis[lua] is not installed")
+class RedisBucketStoreTest(BucketTestMixin, unittest.TestCase):
+    clock = "ratelimit.time.time"
+
+    def make_store(self):
+        return RedisBucketStore("fakeredis://", prefix=f"test:{self.id()}:")
+
+
+class FailOpenTest(unittest.TestCase):
+
+    def test_store_errors_allow_the_request(self):
+        store = mock.Mock()
+        store.take = mock.AsyncMock(side_effect=ConnectionError("redis down"))
+        limiter = RateLimiter(store, enabled=True)
+
+        asyncio.run(limiter.check((MOBILE, "a")))
+        self.assertEqual(limiter.stats()["store_errors"], 1)
@@ -0,0 +1,148 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import orjson
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged with redacted parameters (0 disables)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+# Exposes the per-request phase breakdown to clients (browser devtools, curl -v)
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "1") == "1"
+REQUEST_LOG_ENABLED = os.getenv("REQUEST_LOG_ENABLED", "1") == "1"
+
+
+# -------------------------------------------------
+# PER-REQUEST PHASE ACCUMULATOR
+# -------------------------------------------------
+class RequestTimings:
+    """
+    Total seconds and call count per phase for one request.
+
+    DB work runs on executor threads, so updates are locked.
+    """
+
+    def __init__(self):
+        self.phases = {}  # phase -> [seconds, count]
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            entry = self.phases.get(phase)
+            if entry is None:
+                self.phases[phase] = [seconds, 1]
+            else:
+                entry[0] += seconds
+                entry[1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {k: (v[0], v[1]) for k, v in self.phases.items()}
+
+
+_current = ContextVar("request_timings", default=None)
+
+
+def record(phase, seconds):
+    """
+    Adds `seconds` to `phase` of the current request; no-op outside one
+    """
+    timings = _current.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+@contextmanager
+def span(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start)
+
+
+# -------------------------------------------------
+# SLOW QUERY LOG
+# -------------------------------------------------
+def redact_param(value):
+    """
+    Replaces a bound value with its type (and length for strings/bytes)
+    so slow-query logs never carry policy numbers, DOBs or mobiles
+    """
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def log_slow_query(name, seconds, params=()):
+    if not SLOW_QUERY_MS or seconds * 1000 < SLOW_QUERY_MS:
+        return
+
+    logger.warning(orjson.dumps({
+        "event": "slow_query",
+        "statement": name,
+        "duration_ms": round(seconds * 1000, 2),
+        "params": [redact_param(p) for p in params or ()],
+    }).decode())
+
+
+# -------------------------------------------------
+# RESPONSE SERIALIZATION
+# -------------------------------------------------
+class TimedORJSONResponse(ORJSONResponse):
+    """
+    ORJSONResponse that books its render time under `serialize`
+    """
+
+    def render(self, content):
+        with span("serialize"):
+            return super().render(content)
+
+
+# -------------------------------------------------
+# TIMING MIDDLEWARE
+# -------------------------------------------------
+def _server_timing(phases, total):
+    parts = [f"{name};dur={seconds * 1000:.2f}" for name, (seconds, _) in phases.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+async def timing_middleware(request: Request, call_next):
+    timings = RequestTimings()
+    token = _current.set(timings)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+
+    total = time.perf_counter() - start
+    phases = timings.snapshot()
+
+    if SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = _server_timing(phases, total)
+
+    if REQUEST_LOG_ENABLED:
+        route = request.scope.get("route")
+        logger.info(orjson.dumps({
+            "event": "request",
+            "method": request.method,
+            "route": getattr(route, "path", None) or "unmatched",
+            "status": response.status_code,
+            "duration_ms": round(total * 1000, 2),
+            "phases": {
+                name: {"ms": round(seconds * 1000, 2), "count": count}
+                for name, (seconds, count) in phases.items()
+            },
+        }).decode())
+
+    return response
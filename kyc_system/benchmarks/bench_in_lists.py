@@ -0,0 +1,234 @@
+"""
+Benchmark: SQL Server plan compilations for policy-number IN-lists.
+
+Replays a synthetic mix of customers (mostly 1-3 policies, a tail of group
+and Rastra Sewak holders with hundreds) through the previous IN-list
+builder (one placeholder per policy) and `core_db.in_clause` (padded to
+power-of-two buckets), and counts the distinct statement texts each one
+produces. Every distinct text is a separate compiled plan in a cold cache.
+
+With --live the same lookups run against the configured `sqlserver`
+database and the cached plans for each variant are counted from
+sys.dm_exec_cached_plans (needs VIEW SERVER STATE).
+
+With --dashboard the real policy dashboard batch is replayed instead, as
+mssql-django sends it: any statement containing GROUP BY is rewritten by
+the backend into a DECLARE prelude (one NVARCHAR(len) variable per
+distinct value), so texts are counted after that rewrite. "grouped" is
+the batch with the monthly chart as a GROUP BY, as it was first written.
+Needs mssql-django importable; with --live the cached plans of the
+dashboard's temp-table statements are counted before and after each
+variant.
+
+Usage (from kyc_system/):
+    python -m benchmarks.bench_in_lists [customers] [--live] [--dashboard]
+"""
+import os
+import sys
+import random
+
+QUERY = """
+    SELECT /* bench_in_lists:{variant} */ COUNT(*)
+    FROM tblPolicyDetail WITH (NOLOCK)
+    WHERE PolicyNo IN {clause}
+"""
+
+PLAN_COUNT = """
+    SELECT COUNT(*)
+    FROM sys.dm_exec_cached_plans cp
+    CROSS APPLY sys.dm_exec_sql_text(cp.plan_handle) st
+    WHERE st.text LIKE %s
+      AND st.text NOT LIKE '%%dm_exec_cached_plans%%'
+"""
+
+GROUPED_CHART = """
+    SELECT
+        YEAR(p.PaidDate)            AS paid_year,
+        MONTH(p.PaidDate)           AS paid_month,
+        ISNULL(SUM(p.Premium), 0)   AS premium_amount
+    FROM #dashboard_paid p
+    WHERE p.PaidDate >= %s
+    GROUP BY YEAR(p.PaidDate), MONTH(p.PaidDate)
+    ORDER BY paid_year, paid_month;
+"""
+
+LOAN_COLS = {
+    "policy": "PolicyNo",
+    "amount": "LoanAmount",
+    "balance": "BalanceAmount",
+    "order": "LoanDate",
+    "loan_date": "LoanDate",
+    "interest": None,
+    "status": None,
+}
+
+
+def policy_counts(customers, seed=42):
+    """
+    Policies per customer: 90% hold 1-3, 9% hold 4-40, 1% hold 41-600
+    """
+    rng = random.Random(seed)
+    counts = []
+    for _ in range(customers):
+        roll = rng.random()
+        if roll < 0.90:
+            counts.append(rng.randint(1, 3))
+        elif roll < 0.99:
+            counts.append(rng.randint(4, 40))
+        else:
+            counts.append(rng.randint(41, 600))
+    return counts
+
+
+def setup_django():
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "kyc_system.settings")
+    django.setup()
+
+
+def exact_clause(values):
+    return "(" + ",".join(["%s"] * len(values)) + ")", list(values)
+
+
+def run_offline(counts):
+    from kycform.services.core_db import in_clause
+
+    results = {}
+    for variant, build in (("exact", exact_clause), ("bucketed", in_clause)):
+        texts = set()
+        params_sent = 0
+        for count in counts:
+            clause, params = build([f"POL{i:08d}" for i in range(count)])
+            texts.add(QUERY.format(variant=variant, clause=clause))
+            params_sent += len(params)
+        results[variant] = {"plans": len(texts), "params": params_sent}
+    return results
+
+
+def run_live(counts):
+    setup_django()
+
+    from kycform.services.core_db import core_cursor, in_clause, scalar
+
+    with core_cursor("bench_in_lists") as cursor:
+        cursor.execute(f"SELECT TOP {max(counts)} PolicyNo FROM tblPolicyDetail WITH (NOLOCK)")
+        pool = [r[0] for r in cursor.fetchall()]
+        if not pool:
+            raise SystemExit("tblPolicyDetail is empty")
+
+        results = {}
+        for variant, build in (("exact", exact_clause), ("bucketed", in_clause)):
+            for count in counts:
+                clause, params = build(pool[:count])
+                cursor.execute(QUERY.format(variant=variant, clause=clause), params)
+                cursor.fetchall()
+
+            cursor.execute(PLAN_COUNT, [f"%bench_in_lists:{variant}%"])
+            results[variant] = {"plans": int(scalar(cursor)), "params": None}
+    return results
+
+
+def dashboard_variants(loan_cols=LOAN_COLS):
+    from datetime import date
+
+    from kycform.services.policy_dashboard import _MONTHLY_CHART, dashboard_batch
+
+    month_start = date(date.today().year - 1, date.today().month, 1)
+
+    def current(policies):
+        return dashboard_batch(policies, loan_cols, month_start)
+
+    def grouped(policies):
+        sql, params = current(policies)
+        return sql.replace(_MONTHLY_CHART, GROUPED_CHART), params
+
+    return {"grouped": grouped, "current": current}
+
+
+def backend_rewrite():
+    """
+    mssql-django's own statement rewrite, (sql, params) -> (sql, params)
+    """
+    setup_django()
+    try:
+        from mssql.base import CursorWrapper
+    except Exception as e:
+        raise SystemExit(f"--dashboard needs mssql-django importable: {e}")
+
+    wrapper = CursorWrapper.__new__(CursorWrapper)
+    wrapper.driver_charset = None
+
+    def rewrite(sql, params):
+        if "GROUP BY" in sql:
+            sql, params = wrapper.format_group_by_params(sql, params)
+        return wrapper.format_sql(sql, params), params
+
+    return rewrite
+
+
+def run_dashboard_offline(counts):
+    rewrite = backend_rewrite()
+
+    results = {}
+    for variant, build in dashboard_variants().items():
+        texts = set()
+        params_sent = 0
+        for count in counts:
+            sql, params = rewrite(*build([f"POL{i:08d}" for i in range(count)]))
+            texts.add(sql)
+            params_sent += len(params)
+        results[variant] = {"plans": len(texts), "params": params_sent}
+    return results
+
+
+def run_dashboard_live(counts):
+    setup_django()
+
+    from kycform.services.core_db import core_cursor, scalar
+    from kycform.services.policy_loan_details import PolicyLoanDetailsService
+
+    def cached_plans(cursor):
+        cursor.execute(PLAN_COUNT, ["%#dashboard_paid%"])
+        return int(scalar(cursor))
+
+    with core_cursor("bench_in_lists") as cursor:
+        cursor.execute(f"SELECT TOP {max(counts)} PolicyNo FROM tblPolicyDetail WITH (NOLOCK)")
+        pool = [r[0] for r in cursor.fetchall()]
+        if not pool:
+            raise SystemExit("tblPolicyDetail is empty")
+
+        loan_cols, _ = PolicyLoanDetailsService.resolve_columns(cursor)
+
+        results = {}
+        for variant, build in dashboard_variants(loan_cols).items():
+            before = cached_plans(cursor)
+            for count in counts:
+                cursor.execute(*build(pool[:count]))
+                while cursor.nextset():
+                    pass
+            results[variant] = {"plans": cached_plans(cursor) - before, "params": None}
+    return results
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    customers = int(args[0]) if args else 5000
+    counts = policy_counts(customers)
+
+    if "--dashboard" in sys.argv:
+        run = run_dashboard_live if "--live" in sys.argv else run_dashboard_offline
+    else:
+        run = run_live if "--live" in sys.argv else run_offline
+    results = run(counts)
+
+    print(f"customers: {customers}  distinct list sizes: {len(set(counts))}")
+    for variant, result in results.items():
+        line = f"{variant:>9}: {result['plans']:>5} plans"
+        if result["params"] is not None:
+            line += f"  {result['params'] / len(counts):7.1f} params/query"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -98,11 +98,28 @@ DATABASES = {
             'driver': 'ODBC Driver 18 for SQL Server',
             'extra_params': 'Encrypt=yes;TrustServerCertificate=yes;',
         },
+        # Keep the TLS connection open across requests (one per worker
+        # thread) and verify it before reuse instead of reconnecting per request
+        'CONN_MAX_AGE': config('MSSQL_CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 
 }
 
 
+# Core (SQL Server) statements slower than this are logged by
+# kycform.services.core_db; 0 disables the slow-query log
+CORE_DB_SLOW_QUERY_MS = config('CORE_DB_SLOW_QUERY_MS', default=500, cast=int)
+
+# Incremental agent business refreshes (refresh_agent_business) re-read this
+# many days behind the stored DOC/PaidDate watermarks for back-dated entries
+AGENT_BUSINESS_LOOKBACK_DAYS = config('AGENT_BUSINESS_LOOKBACK_DAYS', default=7, cast=int)
+
+# Agent APIs flag their read models "stale" (and log a warning) once the last
+# refresh is older than this; see deployment/cron/agent_read_models
+AGENT_READ_MODEL_MAX_AGE_HOURS = config('AGENT_READ_MODEL_MAX_AGE_HOURS', default=26, cast=int)
+
+
 # PASSWORD VALIDATION
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -184,8 +201,14 @@ SMS_GATEWAY_TOKEN = config("SMS_GATEWAY_TOKEN", default="")
 SMS_GATEWAY_TIMEOUT = config("SMS_GATEWAY_TIMEOUT", default=15, cast=int)
 
 # ---- FASTAPI OTP/SMS SERVICE ----
-# Point this to the api_service app, e.g. http://127.0.0.1:8001
+# Point this to the api_service app, e.g. http://127.0.0.1:8001.
+# api_service rate-limits OTPs per client IP taken from the X-Forwarded-For
+# this app sends, which it only trusts from RATE_LIMIT_TRUSTED_PROXIES
+# (default: localhost). Add this host's address there when the two run apart.
 API_SERVICE_BASE_URL = config("API_SERVICE_BASE_URL", default="http://127.0.0.1:8001")
+# api_service's BACKEND_TOKEN; KYC notifications sent with it are not
+# counted against the portal users' OTP limits
+API_SERVICE_TOKEN = config("API_SERVICE_TOKEN", default="")
 
 # ---- POLICY SERVICE URLS (LOCAL DASHBOARD CONFIG) ----
 PREMIUM_PAYMENT_URL = config(
@@ -1,7 +1,88 @@
-from django.db import connections
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from kycform.services.agent_report import (
+    HOLDER_NAME,
+    PaginatedReport,
+    cursor_request,
+    page_request,
+    search_filter,
+)
+from kycform.services.keyset import InvalidCursor, Keyset
+
+COMMISSION_REPORT = PaginatedReport(
+    name="agent_commission_report",
+    source="""
+            FROM tblPolicyDetail pd WITH (NOLOCK)
+            INNER JOIN tblInsuredDetail i WITH (NOLOCK)
+                    ON i.RegisterNo = pd.RegisterNo
+            INNER JOIN tblPremiumPaid pz WITH (NOLOCK)
+                    ON pd.PolicyNo = pz.PolicyNo
+            WHERE pd.AgentCode = %s
+    """,
+    columns=f"""
+                pd.PolicyNo,
+                pd.PlanID,
+                {HOLDER_NAME} AS PolicyHolder,
+                pd.Term,
+                pd.PayMode,
+                pd.DOC,
+                pz.PaidDate,
+                CAST(pd.SA AS DECIMAL(18,0)) AS SA,
+                CAST(pd.Premium AS DECIMAL(18,0)) AS Premium,
+                CAST(ISNULL(pz.CommRate, 0) AS DECIMAL(6,2)) AS CommissionRate,
+                CAST(ISNULL(pz.CommAmount, 0) AS DECIMAL(18,0)) AS CommissionAmount,
+                pz.InstalmenType AS PremiumType
+    """,
+    # One row per payment: the payment's own unique key breaks ties
+    keyset=Keyset(
+        ("pd.DOC", True, True),
+        ("pd.PolicyNo", True),
+        ("pz.PaidDate", True, True),
+        row_key=("tblPremiumPaid", "pz"),
+    ),
+    totals={
+        "sa": "CAST(ISNULL(SUM(pd.SA) OVER (), 0) AS DECIMAL(18,0))",
+        "premium": "CAST(ISNULL(SUM(pd.Premium) OVER (), 0) AS DECIMAL(18,0))",
+        "commission": "CAST(ISNULL(SUM(ISNULL(pz.CommAmount, 0)) OVER (), 0) AS DECIMAL(18,0))",
+    },
+    page_joins="""
+        INNER JOIN tblPlan pl WITH (NOLOCK)
+                ON pl.PlanID = r.PlanID
+    """,
+    select="""
+            r.SN,
+            r.PolicyNo,
+            r.PolicyHolder,
+            pl.PlanName,
+            r.Term,
+            r.PayMode,
+            CONVERT(VARCHAR(10), r.DOC, 103) AS DOC,
+            CONVERT(VARCHAR(10), r.PaidDate, 103) AS PaidDate,
+            r.SA,
+            r.Premium,
+            r.CommissionRate,
+            r.CommissionAmount,
+            r.PremiumType
+    """,
+    keys=(
+        "sn",
+        "policy_no",
+        "policy_holder",
+        "plan_name",
+        "term",
+        "paymode",
+        "doc",
+        "paid_date",
+        "sa",
+        "premium",
+        "commission_rate",
+        "commission_amount",
+        "premium_type",
+    ),
+    floats=("sa", "premium", "commission_rate", "commission_amount"),
+)
+
 
 class AgentCommissionReportAPIView(APIView):
     authentication_classes = []
@@ -14,159 +95,35 @@ class AgentCommissionReportAPIView(APIView):
 
         policy_no = (request.GET.get("policy_no") or "").strip()
         name = (request.GET.get("name") or "").strip()
+        page, page_size = page_request(request)
+        search, search_params = search_filter("pd.PolicyNo", policy_no, name)
         try:
-            page = int(request.GET.get("page", "1") or 1)
-        except ValueError:
-            page = 1
-        try:
-            page_size = int(request.GET.get("page_size", "10") or 10)
-        except ValueError:
-            page_size = 10
-        if page < 1:
-            page = 1
-        if page_size < 1:
-            page_size = 10
-        if page_size > 100:
-            page_size = 100
-
-        params = [agent_code]
-        search_filter = ""
-
-        if policy_no and name:
-            search_filter = """
-                AND (
-                    pd.PolicyNo LIKE %s
-                    OR (
-                        i.FirstName
-                        + ISNULL(' ' + i.MiddleName,'')
-                        + ISNULL(' ' + i.LastName,'')
-                    ) LIKE %s
-                )
-            """
-            params.extend([f"%{policy_no}%", f"%{name}%"])
-        elif policy_no:
-            search_filter = "AND pd.PolicyNo LIKE %s"
-            params.append(f"%{policy_no}%")
-        elif name:
-            search_filter = """
-                AND (
-                    i.FirstName
-                    + ISNULL(' ' + i.MiddleName,'')
-                    + ISNULL(' ' + i.LastName,'')
-                ) LIKE %s
-            """
-            params.append(f"%{name}%")
-
-        count_sql = f"""
-            SELECT COUNT(*)
-            FROM tblPolicyDetail pd WITH (NOLOCK)
-            INNER JOIN tblInsuredDetail i WITH (NOLOCK)
-                    ON i.RegisterNo = pd.RegisterNo
-            INNER JOIN tblPremiumPaid pz WITH (NOLOCK)
-                    ON pd.PolicyNo = pz.PolicyNo
-            WHERE pd.AgentCode = %s
-            {search_filter}
-        """
-
-        total_sql = f"""
-            SELECT
-                CAST(ISNULL(SUM(pd.SA), 0) AS DECIMAL(18,0)) AS TotalSA,
-                CAST(ISNULL(SUM(pd.Premium), 0) AS DECIMAL(18,0)) AS TotalPremium,
-                CAST(ISNULL(SUM(ISNULL(pz.CommAmount, 0)), 0) AS DECIMAL(18,0)) AS TotalCommission
-            FROM tblPolicyDetail pd WITH (NOLOCK)
-            INNER JOIN tblInsuredDetail i WITH (NOLOCK)
-                    ON i.RegisterNo = pd.RegisterNo
-            INNER JOIN tblPremiumPaid pz WITH (NOLOCK)
-                    ON pd.PolicyNo = pz.PolicyNo
-            WHERE pd.AgentCode = %s
-            {search_filter}
-        """
-
-        with connections["sqlserver"].cursor() as cursor:
-            cursor.execute(count_sql, params)
-            total_rows = int((cursor.fetchone() or [0])[0] or 0)
-            total_pages = (total_rows + page_size - 1) // page_size if total_rows else 0
-            if total_pages and page > total_pages:
-                page = total_pages
-            offset = (page - 1) * page_size if total_rows else 0
-
-            cursor.execute(total_sql, params)
-            total_row = cursor.fetchone() or (0, 0, 0)
-
-            cursor.execute(f"""
-                SELECT
-                    ROW_NUMBER() OVER (ORDER BY pd.DOC DESC) AS SN,
-
-                    pd.PolicyNo,
-
-                    i.FirstName
-                        + ISNULL(' ' + i.MiddleName,'')
-                        + ISNULL(' ' + i.LastName,'') AS PolicyHolder,
-
-                    pl.PlanName,
-                    pd.Term,
-                    pd.PayMode,
-
-                    CONVERT(VARCHAR(10), pd.DOC, 103) AS DOC,
-                    CONVERT(VARCHAR(10), pz.PaidDate, 103) AS PaidDate,
-
-                    CAST(pd.SA AS DECIMAL(18,0)) AS SA,
-                    CAST(pd.Premium AS DECIMAL(18,0)) AS Premium,
-
-                    CAST(ISNULL(pz.CommRate, 0) AS DECIMAL(6,2)) AS CommissionRate,
-                    CAST(ISNULL(pz.CommAmount, 0) AS DECIMAL(18,0)) AS CommissionAmount,
-
-                    pz.InstalmenType AS PremiumType
-
-                FROM tblPolicyDetail pd  WITH (NOLOCK)
-                INNER JOIN tblPlan pl            WITH (NOLOCK) ON pl.PlanID = pd.PlanID
-                INNER JOIN tblInsuredDetail i    WITH (NOLOCK) ON i.RegisterNo = pd.RegisterNo
-                INNER JOIN tblPremiumPaid pz     WITH (NOLOCK) ON pd.PolicyNo = pz.PolicyNo
-
-                WHERE pd.AgentCode = %s
-                {search_filter}
-
-                ORDER BY pd.DOC DESC
-                OFFSET %s ROWS
-                FETCH NEXT %s ROWS ONLY
-            """, [*params, offset, page_size])
-
-            rows = cursor.fetchall()
+            cursor = cursor_request(request, COMMISSION_REPORT.keyset)
+            report = COMMISSION_REPORT.run(
+                [agent_code, *search_params], page, page_size, search=search, cursor=cursor
+            )
+        except InvalidCursor:
+            return Response({"detail": "INVALID_CURSOR"}, status=400)
 
         data = []
 
-        for r in rows:
-            sa = r[8] or 0
-            premium = r[9] or 0
-            commission = r[11] or 0
-
+        for r in report["rows"]:
             data.append({
-                "sn": r[0],
-                "policy_no": r[1],
-                "policy_holder": r[2],
-                "plan": f"{r[3]} (Term: {r[4]} | Paymode: {r[5]})",
-                "doc": r[6],
-                "paid_date": r[7],
-                "sa": float(sa),
-                "premium": float(premium),
-                "commission_rate": float(r[10] or 0),
-                "commission_amount": float(commission),
-                "premium_type": r[12],
+                "sn": r["sn"],
+                "policy_no": r["policy_no"],
+                "policy_holder": r["policy_holder"],
+                "plan": f"{r['plan_name']} (Term: {r['term']} | Paymode: {r['paymode']})",
+                "doc": r["doc"],
+                "paid_date": r["paid_date"],
+                "sa": r["sa"],
+                "premium": r["premium"],
+                "commission_rate": r["commission_rate"],
+                "commission_amount": r["commission_amount"],
+                "premium_type": r["premium_type"],
             })
 
         return Response({
             "rows": data,
-            "total": {
-                "sa": float(total_row[0] or 0),
-                "premium": float(total_row[1] or 0),
-                "commission": float(total_row[2] or 0)
-            },
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "total_rows": total_rows,
-                "total_pages": total_pages,
-                "has_next": bool(total_pages and page < total_pages),
-                "has_prev": bool(total_pages and page > 1),
-            },
+            "total": report["totals"],
+            "pagination": report["pagination"],
         })
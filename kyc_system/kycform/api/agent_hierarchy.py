@@ -1,4 +1,11 @@
-from django.db import connections
+from django.utils import timezone
+from kycform.services.agent_hierarchy import (
+    REFRESH_NAME,
+    ReadModelNotReady,
+    depth_request,
+    downline_agents,
+    require_refreshed,
+)
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
@@ -12,38 +19,25 @@ class AgentHierarchyAPIView(APIView):
         if not agent_code:
             return Response({"rows": []})
 
-        superior_code = f"AM{agent_code}"
+        try:
+            as_of, stale = require_refreshed(REFRESH_NAME)
+        except ReadModelNotReady:
+            return Response({"detail": "AGENT_DATA_NOT_READY"}, status=503)
 
-        with connections["sqlserver"].cursor() as cursor:
-            cursor.execute("""
-                SELECT
-                    ROW_NUMBER() OVER (ORDER BY a.AgentCode) AS SN,
-                    a.AgentCode,
-                    a.FirstName + ISNULL(' ' + a.LastName,'') AS AgentName,
-                    a.MobileNo2,
-                    a.[Address],
-                    CASE
-                        WHEN a.IsActive = 1 AND a.LicenseExpiryDate > GETDATE()
-                        THEN 'ACTIVE'
-                        ELSE 'INACTIVE'
-                    END AS LicenseStatus
-                FROM tblAgentUnderSuperior u
-                INNER JOIN tblAgent a
-                        ON a.AgentCode = u.AgentCode
-                WHERE u.SuperiorCode = %s
-            """, [superior_code])
-
-            rows = cursor.fetchall()
+        today = timezone.localdate()
 
         data = []
-        for r in rows:
+        for sn, (agent, depth) in enumerate(
+            downline_agents(agent_code, depth_request(request)), start=1
+        ):
             data.append({
-                "sn": r[0],
-                "agent_code": r[1],
-                "agent_name": r[2],
-                "mobile": r[3],
-                "address": r[4],
-                "license_status": r[5],
+                "sn": sn,
+                "agent_code": agent.agent_code,
+                "agent_name": agent.agent_name,
+                "mobile": agent.mobile,
+                "address": agent.address,
+                "license_status": "ACTIVE" if agent.is_licensed(today) else "INACTIVE",
+                "depth": depth,
             })
 
-        return Response({"rows": data})
+        return Response({"rows": data, "as_of": as_of, "stale": stale})
@@ -2,7 +2,11 @@ from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from kycform.services.agent_maturity_forecasting import AgentMaturityForecastingService
+from kycform.services.agent_maturity_forecasting import (
+    MATURITY_KEYSET,
+    AgentMaturityForecastingService,
+)
+from kycform.services.keyset import InvalidCursor, decode_cursor
 
 
 def _get_pagination_params(request):
@@ -28,9 +32,25 @@ def _get_pagination_params(request):
 
 def _attach_pagination(data, page, page_size):
     rows = data.get("rows") if isinstance(data, dict) else []
+    payload = dict(data)
+    cursors = payload.pop("cursors", {"next_cursor": None, "prev_cursor": None})
+
+    if payload.get("total_items", 0) is None:
+        # Cursor page: no counts, direction flags come from the seek
+        payload.pop("total_items")
+        payload["pagination"] = {
+            "page": None,
+            "page_size": page_size,
+            "total_items": None,
+            "total_pages": None,
+            "has_next": payload.pop("has_next"),
+            "has_previous": payload.pop("has_prev"),
+            **cursors,
+        }
+        return payload
+
     total_items = int(data.get("total_items", len(rows)) or 0)
     total_pages = (total_items + page_size - 1) // page_size if total_items else 0
-    payload = dict(data)
     payload.pop("total_items", None)
     payload["pagination"] = {
         "page": page,
@@ -39,6 +59,7 @@ def _attach_pagination(data, page, page_size):
         "total_pages": total_pages,
         "has_next": bool(total_pages and page < total_pages),
         "has_previous": bool(total_pages and page > 1),
+        **cursors,
     }
     return payload
 
@@ -58,12 +79,17 @@ class AgentMaturityForecastingAPIView(APIView):
             raise AuthenticationFailed("INVALID_AGENT_SESSION")
 
         policy_no = request.GET.get("policy_no", "").strip()
+        try:
+            cursor = decode_cursor(request.GET.get("cursor"), MATURITY_KEYSET.width)
+        except InvalidCursor:
+            return Response({"detail": "INVALID_CURSOR"}, status=400)
 
         data = AgentMaturityForecastingService.get_maturity_forecasting(
             agent_code=agent_code,
             policy_no=policy_no,
             page=page,
             page_size=page_size,
+            cursor=cursor,
         )
 
         return Response(_attach_pagination(data, page, page_size))
@@ -1,4 +1,4 @@
-from django.db import connections
+from kycform.services.core_db import core_cursor
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
@@ -12,7 +12,7 @@ class AgentProfileAPIView(APIView):
         if not agent_code:
             return Response({"detail": "Agent not authenticated"}, status=401)
 
-        with connections["sqlserver"].cursor() as cursor:
+        with core_cursor("agent_profile") as cursor:
             cursor.execute("""
                 SELECT
                     a.AgentCode,
@@ -2,7 +2,8 @@ from rest_framework.response import Response
 
 from kycform.api.policy_base import PolicySessionBaseAPIView
 from kycform.services.policy_client import PolicyClientService
-from kycform.services.policy_payment_history import PolicyPaymentHistoryService
+from kycform.services.keyset import InvalidCursor, decode_cursor
+from kycform.services.policy_payment_history import PAYMENT_KEYSET, PolicyPaymentHistoryService
 
 
 class PolicyPaymentHistoryAPIView(PolicySessionBaseAPIView):
@@ -14,7 +15,8 @@ class PolicyPaymentHistoryAPIView(PolicySessionBaseAPIView):
         policy_no = (request.GET.get("policy_no") or "").strip()
         page_raw = request.GET.get("page")
         page_size_raw = request.GET.get("page_size")
-        paginated = page_raw is not None or page_size_raw is not None
+        cursor_raw = request.GET.get("cursor")
+        paginated = page_raw is not None or page_size_raw is not None or cursor_raw is not None
         try:
             page = int(page_raw or 1)
         except (TypeError, ValueError):
@@ -24,12 +26,21 @@ class PolicyPaymentHistoryAPIView(PolicySessionBaseAPIView):
         except (TypeError, ValueError):
             page_size = 10
 
+        try:
+            cursor = decode_cursor(cursor_raw, PAYMENT_KEYSET.width)
+        except InvalidCursor:
+            return Response({"detail": "INVALID_CURSOR"}, status=400)
+
         client_id = PolicyClientService.get_client_no(user_id)
-        data = PolicyPaymentHistoryService.get_payment_history(
-            client_id=client_id,
-            policy_no=policy_no,
-            page=page,
-            page_size=page_size,
-            paginated=paginated,
-        )
+        try:
+            data = PolicyPaymentHistoryService.get_payment_history(
+                client_id=client_id,
+                policy_no=policy_no,
+                page=page,
+                page_size=page_size,
+                paginated=paginated,
+                cursor=cursor,
+            )
+        except InvalidCursor:
+            return Response({"detail": "INVALID_CURSOR"}, status=400)
         return Response(data)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from kycform.services.agent_business import refresh_agent_business
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the local agent business read model from CORE. "
+        "Incremental by DOC/PaidDate watermark; schedule it every few minutes "
+        "and with --full nightly (deployment/cron/agent_read_models)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild every agent instead of only those changed since the last run",
+        )
+
+    def handle(self, *args, **options):
+        state = refresh_agent_business(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Agent business refreshed: {state.agents_refreshed} agents "
+            f"(DOC through {state.doc_through}, PaidDate through {state.paid_through})"
+        ))
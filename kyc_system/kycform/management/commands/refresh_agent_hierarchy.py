@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from kycform.services.agent_hierarchy import refresh_agent_hierarchy
+
+
+class Command(BaseCommand):
+    help = (
+        "Sync the local agent hierarchy closure table from CORE. Only agents "
+        "below a changed superior link are recomputed unless --full is given. "
+        "Scheduled by deployment/cron/agent_read_models."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild the whole closure table",
+        )
+
+    def handle(self, *args, **options):
+        state = refresh_agent_hierarchy(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Agent hierarchy refreshed: {state.agents_refreshed} agents recomputed"
+        ))
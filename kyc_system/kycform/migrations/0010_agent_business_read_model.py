@@ -0,0 +1,61 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kycform", "0009_kycsmsnotification"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AgentBusinessAggregate",
+            fields=[
+                ("agent_code", models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ("agent_name", models.CharField(blank=True, default="", max_length=255)),
+                ("policy_count", models.IntegerField(default=0)),
+                ("premium", models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ("credit_premium", models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ("commission", models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ("refreshed_at", models.DateTimeField(default=timezone.now)),
+            ],
+            options={
+                "db_table": "agent_business_aggregate",
+            },
+        ),
+        migrations.CreateModel(
+            name="AgentMonthlyBusiness",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("agent_code", models.CharField(max_length=50)),
+                ("year", models.PositiveSmallIntegerField()),
+                ("month", models.PositiveSmallIntegerField()),
+                ("premium", models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ("commission", models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ("payments", models.IntegerField(default=0)),
+            ],
+            options={
+                "db_table": "agent_business_monthly",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("agent_code", "year", "month"),
+                        name="agent_business_month_uniq",
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="AgentBusinessRefresh",
+            fields=[
+                ("name", models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ("doc_through", models.DateField(blank=True, null=True)),
+                ("paid_through", models.DateField(blank=True, null=True)),
+                ("refreshed_at", models.DateTimeField(blank=True, null=True)),
+                ("agents_refreshed", models.IntegerField(default=0)),
+            ],
+            options={
+                "db_table": "agent_business_refresh",
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kycform", "0010_agent_business_read_model"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HierarchyAgent",
+            fields=[
+                ("agent_code", models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ("agent_name", models.CharField(blank=True, default="", max_length=255)),
+                ("mobile", models.CharField(blank=True, max_length=50, null=True)),
+                ("address", models.CharField(blank=True, max_length=255, null=True)),
+                ("is_active", models.BooleanField(default=False)),
+                ("license_expiry_date", models.DateField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "agent_hierarchy_agent",
+            },
+        ),
+        migrations.CreateModel(
+            name="AgentHierarchyEdge",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("superior_code", models.CharField(max_length=50)),
+                ("agent_code", models.CharField(max_length=50)),
+            ],
+            options={
+                "db_table": "agent_hierarchy_edge",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("superior_code", "agent_code"),
+                        name="agent_hierarchy_edge_uniq",
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="AgentHierarchyClosure",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("ancestor", models.CharField(max_length=50)),
+                ("descendant", models.CharField(max_length=50)),
+                ("depth", models.PositiveSmallIntegerField()),
+            ],
+            options={
+                "db_table": "agent_hierarchy_closure",
+                "indexes": [
+                    models.Index(fields=["descendant"], name="agent_hiera_descend_b0afeb_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ancestor", "descendant"),
+                        name="agent_hierarchy_closure_uniq",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kycform", "0011_agent_hierarchy_closure"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="agentbusinessaggregate",
+            name="policy_rows",
+            field=models.IntegerField(default=0),
+        ),
+    ]
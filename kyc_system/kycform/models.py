@@ -632,3 +632,153 @@ class Group(models.Model):
 
     def __str__(self):
         return f"{self.group_id} - {self.name}"
+
+
+# ================================================================
+# AGENT BUSINESS READ MODEL (REFRESHED FROM CORE)
+# ================================================================
+# Written only by `manage.py refresh_agent_business`; the agent summary and
+# downline report APIs read these instead of aggregating the core tables.
+
+class AgentBusinessAggregate(models.Model):
+    agent_code = models.CharField(max_length=50, primary_key=True)
+    agent_name = models.CharField(max_length=255, blank=True, default="")
+
+    policy_count = models.IntegerField(default=0)
+    # Policy x payment rows; a policy without payments counts once
+    policy_rows = models.IntegerField(default=0)
+    # Sum of policy premium over policy x payment rows (the "earned" premium)
+    premium = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    # Same, counting only policies with at least one payment
+    credit_premium = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    commission = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "agent_business_aggregate"
+
+    def __str__(self):
+        return f"{self.agent_code} | {self.policy_count} policies"
+
+
+class AgentMonthlyBusiness(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    agent_code = models.CharField(max_length=50)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+
+    premium = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    commission = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    payments = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "agent_business_monthly"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["agent_code", "year", "month"],
+                name="agent_business_month_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.agent_code} | {self.year}-{self.month:02d}"
+
+
+class AgentBusinessRefresh(models.Model):
+    # One row per refresh job ("agent_business", "agent_hierarchy")
+    name = models.CharField(max_length=50, primary_key=True)
+
+    # Highest tblPolicyDetail.DOC / tblPremiumPaid.PaidDate seen by the last run
+    doc_through = models.DateField(null=True, blank=True)
+    paid_through = models.DateField(null=True, blank=True)
+
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    agents_refreshed = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "agent_business_refresh"
+
+    @classmethod
+    def last_refreshed(cls, name):
+        """
+        ISO timestamp of the job's last completed refresh, or None
+        """
+        refreshed_at = (
+            cls.objects.filter(name=name).values_list("refreshed_at", flat=True).first()
+        )
+        return refreshed_at.isoformat() if refreshed_at else None
+
+    def __str__(self):
+        return f"{self.name} @ {self.refreshed_at}"
+
+
+# ================================================================
+# AGENT HIERARCHY (REFRESHED FROM CORE)
+# ================================================================
+# Written only by `manage.py refresh_agent_hierarchy`. An edge is an agent
+# listed in tblAgentUnderSuperior under a superior code; the closure holds
+# every (ancestor, descendant) pair with the shortest depth between them,
+# so "downline to N levels" is a single indexed lookup on `ancestor`.
+
+class HierarchyAgent(models.Model):
+    agent_code = models.CharField(max_length=50, primary_key=True)
+    agent_name = models.CharField(max_length=255, blank=True, default="")
+    mobile = models.CharField(max_length=50, blank=True, null=True)
+    address = models.CharField(max_length=255, blank=True, null=True)
+    is_active = models.BooleanField(default=False)
+    license_expiry_date = models.DateField(blank=True, null=True)
+
+    class Meta:
+        db_table = "agent_hierarchy_agent"
+
+    def is_licensed(self, today=None):
+        today = today or timezone.localdate()
+        return bool(
+            self.is_active
+            and self.license_expiry_date
+            and self.license_expiry_date > today
+        )
+
+    def __str__(self):
+        return f"{self.agent_code} - {self.agent_name}"
+
+
+class AgentHierarchyEdge(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    superior_code = models.CharField(max_length=50)
+    agent_code = models.CharField(max_length=50)
+
+    class Meta:
+        db_table = "agent_hierarchy_edge"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["superior_code", "agent_code"],
+                name="agent_hierarchy_edge_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.superior_code} -> {self.agent_code}"
+
+
+class AgentHierarchyClosure(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    ancestor = models.CharField(max_length=50)
+    descendant = models.CharField(max_length=50)
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table = "agent_hierarchy_closure"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"],
+                name="agent_hierarchy_closure_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["descendant"]),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor} > {self.descendant} ({self.depth})"
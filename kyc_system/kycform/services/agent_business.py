@@ -0,0 +1,355 @@
+import calendar
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from kycform.models import AgentBusinessAggregate, AgentBusinessRefresh, AgentMonthlyBusiness
+from kycform.services.agent_hierarchy import (
+    DEFAULT_DEPTH,
+    REFRESH_NAME as HIERARCHY_REFRESH_NAME,
+    active_downline_count,
+    downline_codes,
+    require_refreshed,
+)
+from kycform.services.core_db import core_cursor, key_table
+
+logger = logging.getLogger(__name__)
+
+REFRESH_NAME = "agent_business"
+
+# Changed agents are re-aggregated this many at a time (one key-table batch)
+REFRESH_CHUNK = 1000
+
+_AGENT_KEYS = "business_agents"
+_IN_AGENTS = f"AND pd.AgentCode IN (SELECT v FROM #{_AGENT_KEYS})"
+
+
+# -----------------------------------------------------------------------------
+# Core aggregation
+# -----------------------------------------------------------------------------
+_WATERMARKS_SQL = """
+    SELECT
+        (SELECT MAX(DOC) FROM tblPolicyDetail WITH (NOLOCK)),
+        (SELECT MAX(PaidDate) FROM tblPremiumPaid WITH (NOLOCK))
+"""
+
+# Agents owning a policy that started, or was paid, on/after the watermarks
+_CHANGED_AGENTS_SQL = """
+    SELECT pd.AgentCode
+    FROM tblPolicyDetail pd WITH (NOLOCK)
+    WHERE pd.DOC >= %s
+      AND pd.AgentCode IS NOT NULL
+    UNION
+    SELECT pd.AgentCode
+    FROM tblPremiumPaid pp WITH (NOLOCK)
+    INNER JOIN tblPolicyDetail pd WITH (NOLOCK)
+            ON pd.PolicyNo = pp.PolicyNo
+    WHERE pp.PaidDate >= %s
+      AND pd.AgentCode IS NOT NULL
+"""
+
+# Two result sets: 1. per-agent totals  2. per-agent, per-month payments
+_AGGREGATE_BATCH = """
+    SET NOCOUNT ON;
+
+    SELECT
+        pd.AgentCode,
+        MAX(a.FirstName + ISNULL(' ' + a.LastName, '')) AS AgentName,
+        COUNT(DISTINCT pd.PolicyNo) AS PolicyCount,
+        ISNULL(SUM(pd.Premium), 0) AS Premium,
+        ISNULL(SUM(CASE WHEN pp.PolicyNo IS NOT NULL THEN pd.Premium ELSE 0 END), 0) AS CreditPremium,
+        ISNULL(SUM(pp.CommAmount), 0) AS Commission,
+        COUNT(*) AS PolicyRows
+    FROM tblPolicyDetail pd WITH (NOLOCK)
+    LEFT JOIN tblAgent a WITH (NOLOCK)
+           ON a.AgentCode = pd.AgentCode
+    LEFT JOIN tblPremiumPaid pp WITH (NOLOCK)
+           ON pp.PolicyNo = pd.PolicyNo
+    WHERE pd.AgentCode IS NOT NULL
+    {agent_filter}
+    GROUP BY pd.AgentCode;
+
+    SELECT
+        pd.AgentCode,
+        YEAR(pp.PaidDate)                AS PaidYear,
+        MONTH(pp.PaidDate)               AS PaidMonth,
+        ISNULL(SUM(pd.Premium), 0)       AS Premium,
+        ISNULL(SUM(pp.CommAmount), 0)    AS Commission,
+        COUNT(*)                         AS Payments
+    FROM tblPolicyDetail pd WITH (NOLOCK)
+    INNER JOIN tblPremiumPaid pp WITH (NOLOCK)
+            ON pp.PolicyNo = pd.PolicyNo
+    WHERE pd.AgentCode IS NOT NULL
+      AND pp.PaidDate IS NOT NULL
+    {agent_filter}
+    GROUP BY pd.AgentCode, YEAR(pp.PaidDate), MONTH(pp.PaidDate);
+"""
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _read_aggregates(cursor, now):
+    totals = [
+        AgentBusinessAggregate(
+            agent_code=r[0],
+            agent_name=r[1] or "",
+            policy_count=int(r[2] or 0),
+            premium=r[3] or 0,
+            credit_premium=r[4] or 0,
+            commission=r[5] or 0,
+            policy_rows=int(r[6] or 0),
+            refreshed_at=now,
+        )
+        for r in cursor.fetchall()
+    ]
+    cursor.nextset()
+    months = [
+        AgentMonthlyBusiness(
+            agent_code=r[0],
+            year=int(r[1]),
+            month=int(r[2]),
+            premium=r[3] or 0,
+            commission=r[4] or 0,
+            payments=int(r[5] or 0),
+        )
+        for r in cursor.fetchall()
+    ]
+    return totals, months
+
+
+def aggregate_batch(agents=None):
+    """
+    (sql, params) for the aggregate batch over `agents`, or over every
+    agent when None. The agent key table is loaded first; key_table turns
+    NOCOUNT on before its INSERT so the totals are the first result.
+    """
+    if agents is None:
+        return _AGGREGATE_BATCH.format(agent_filter=""), []
+
+    sql, params = key_table(_AGENT_KEYS, agents, length=50)
+    sql += _AGGREGATE_BATCH.format(agent_filter=_IN_AGENTS)
+    sql += f"\nDROP TABLE #{_AGENT_KEYS};"
+    return sql, params
+
+
+def _fetch_aggregates(cursor, agents, now):
+    """
+    (totals, months) model instances for `agents`, or for every agent when
+    `agents` is None
+    """
+    if agents is None:
+        cursor.execute(*aggregate_batch())
+        return _read_aggregates(cursor, now)
+
+    totals, months = [], []
+    for start in range(0, len(agents), REFRESH_CHUNK):
+        cursor.execute(*aggregate_batch(agents[start:start + REFRESH_CHUNK]))
+
+        chunk_totals, chunk_months = _read_aggregates(cursor, now)
+        totals += chunk_totals
+        months += chunk_months
+    return totals, months
+
+
+# -----------------------------------------------------------------------------
+# Refresh
+# -----------------------------------------------------------------------------
+def refresh_agent_business(full=False):
+    """
+    Re-aggregates agent business from CORE into the local read model.
+
+    Incrementally, only agents with a policy whose DOC, or a payment whose
+    PaidDate, falls on/after the stored watermarks (less
+    AGENT_BUSINESS_LOOKBACK_DAYS for back-dated entries) are recomputed,
+    each one in full. `full` (or a first run) rebuilds every agent, which
+    also drops agents whose policies have all moved away.
+
+    Returns the refresh state row.
+    """
+    state, _ = AgentBusinessRefresh.objects.get_or_create(name=REFRESH_NAME)
+    full = full or state.refreshed_at is None or not (state.doc_through and state.paid_through)
+    lookback = timedelta(days=getattr(settings, "AGENT_BUSINESS_LOOKBACK_DAYS", 7))
+    now = timezone.now()
+
+    with core_cursor("agent_business.refresh") as cursor:
+        # Watermarks are read first so rows landing mid-refresh are picked
+        # up again by the next run
+        cursor.execute(_WATERMARKS_SQL)
+        doc_through, paid_through = cursor.fetchone() or (None, None)
+
+        if full:
+            agents = None
+        else:
+            cursor.execute(
+                _CHANGED_AGENTS_SQL,
+                [state.doc_through - lookback, state.paid_through - lookback],
+            )
+            agents = sorted({r[0] for r in cursor.fetchall()})
+
+        totals, months = _fetch_aggregates(cursor, agents, now)
+
+    with transaction.atomic():
+        if full:
+            AgentBusinessAggregate.objects.all().delete()
+            AgentMonthlyBusiness.objects.all().delete()
+        elif agents:
+            AgentBusinessAggregate.objects.filter(agent_code__in=agents).delete()
+            AgentMonthlyBusiness.objects.filter(agent_code__in=agents).delete()
+
+        AgentBusinessAggregate.objects.bulk_create(totals, batch_size=1000)
+        AgentMonthlyBusiness.objects.bulk_create(months, batch_size=1000)
+
+        state.doc_through = _as_date(doc_through) or state.doc_through
+        state.paid_through = _as_date(paid_through) or state.paid_through
+        state.refreshed_at = now
+        state.agents_refreshed = len(totals)
+        state.save()
+
+    logger.info(
+        "Agent business refreshed | full=%s | agents=%s | months=%s",
+        full,
+        len(totals),
+        len(months),
+    )
+    return state
+
+
+# -----------------------------------------------------------------------------
+# Read model queries
+# -----------------------------------------------------------------------------
+# What the summary's figures count; all three are over policy x payment
+# rows, as the summary computed them on CORE
+SUMMARY_BASIS = {
+    "policies": "policy x premium payment rows; a policy without payments counts once",
+    "premium": "policy premium summed over the same rows",
+    "commission": "commission of each premium payment",
+}
+
+
+def _business_totals(agent_codes):
+    totals = AgentBusinessAggregate.objects.filter(agent_code__in=agent_codes).aggregate(
+        policies=Sum("policy_rows"),
+        premium=Sum("premium"),
+        commission=Sum("commission"),
+    )
+    return (
+        int(totals["policies"] or 0),
+        float(totals["premium"] or 0),
+        float(totals["commission"] or 0),
+    )
+
+
+def _read_model_state():
+    """
+    Freshness of both read models behind the agent APIs; raises
+    ReadModelNotReady until each refresh job has run once
+    """
+    as_of, stale = require_refreshed(REFRESH_NAME)
+    hierarchy_as_of, hierarchy_stale = require_refreshed(HIERARCHY_REFRESH_NAME)
+    return {
+        "as_of": as_of,
+        "hierarchy_as_of": hierarchy_as_of,
+        "stale": stale or hierarchy_stale,
+    }
+
+
+def get_agent_summary(agent_code, max_depth=DEFAULT_DEPTH):
+    state = _read_model_state()
+
+    self_policy, self_premium, self_commission = _business_totals([agent_code])
+    downline_policy, downline_premium, downline_commission = _business_totals(
+        downline_codes(agent_code, max_depth)
+    )
+    downline_count = active_downline_count(agent_code, max_depth)
+
+    # Month of year across all years, as the chart always showed it
+    chart_rows = (
+        AgentMonthlyBusiness.objects.filter(agent_code=agent_code)
+        .values("month")
+        .annotate(premium=Sum("premium"), commission=Sum("commission"))
+        .order_by("month")
+    )
+
+    total_policy = self_policy + downline_policy
+    total_premium = self_premium + downline_premium
+    total_commission = self_commission + downline_commission
+
+    return {
+        "kpi": {
+            "policies": {
+                "total": total_policy,
+                "self": self_policy,
+                "downline": downline_policy,
+            },
+            "premium": {
+                "total": round(total_premium, 2),
+                "self": round(self_premium, 2),
+                "downline": round(downline_premium, 2),
+            },
+            "downline": {
+                "count": downline_count,
+            },
+        },
+        "summary": {
+            "policies": total_policy,
+            "premium": round(total_premium, 2),
+            "commission": round(total_commission, 2),
+        },
+        "basis": SUMMARY_BASIS,
+        "chart": {
+            "labels": [calendar.month_name[row["month"]] for row in chart_rows],
+            "premium": [float(row["premium"] or 0) for row in chart_rows],
+            "commission": [float(row["commission"] or 0) for row in chart_rows],
+        },
+        **state,
+    }
+
+
+def get_downline_business(agent_code, filter_agent="", max_depth=DEFAULT_DEPTH):
+    state = _read_model_state()
+
+    queryset = AgentBusinessAggregate.objects.filter(
+        agent_code__in=downline_codes(agent_code, max_depth)
+    ).order_by("agent_code")
+    if filter_agent:
+        queryset = queryset.filter(agent_code__icontains=filter_agent)
+
+    data = []
+    totals = {
+        "policy": 0,
+        "earned": 0,
+        "credit": 0,
+        "not_included": 0
+    }
+
+    for sn, agent in enumerate(queryset, start=1):
+        earned = float(agent.premium)
+        credit = float(agent.credit_premium)
+        not_included = earned - credit
+
+        totals["policy"] += agent.policy_count
+        totals["earned"] += earned
+        totals["credit"] += credit
+        totals["not_included"] += not_included
+
+        data.append({
+            "sn": sn,
+            "agent_name": f"{agent.agent_name} ({agent.agent_code})",
+            "policy": agent.policy_count,
+            "earned": earned,
+            "credit": credit,
+            "not_included": not_included,
+            "business_type": "DOWNLINE"
+        })
+
+    return {
+        "rows": data,
+        "total": totals,
+        **state,
+    }
@@ -1,5 +1,6 @@
 from datetime import date, timedelta
-from django.db import connections
+
+from kycform.services.core_db import core_cursor
 
 
 def get_agent_dashboard_data(agent_code: str):
@@ -21,7 +22,7 @@ def get_agent_dashboard_data(agent_code: str):
         "chart": {"labels": [], "premium": [], "commission": []},
     }
 
-    with connections["sqlserver"].cursor() as cursor:
+    with core_cursor("agent_dashboard") as cursor:
 
         # --------------------------------------------------
         # 1️⃣ POLICY COUNTS (Self / Downline / Total)
@@ -0,0 +1,281 @@
+import logging
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from kycform.models import (
+    AgentBusinessRefresh,
+    AgentHierarchyClosure,
+    AgentHierarchyEdge,
+    HierarchyAgent,
+)
+from kycform.services.core_db import core_cursor
+
+logger = logging.getLogger(__name__)
+
+REFRESH_NAME = "agent_hierarchy"
+
+DEFAULT_DEPTH = 1
+
+
+class ReadModelNotReady(Exception):
+    pass
+
+
+# -----------------------------------------------------------------------------
+# Core snapshot
+# -----------------------------------------------------------------------------
+# Two result sets: 1. (superior agent, agent) edges  2. agent details.
+# A superior code belongs to tblAgentSuperior.PersonalAgentCode; codes
+# missing there fall back to the "AM" + AgentCode convention.
+_HIERARCHY_BATCH = """
+    SET NOCOUNT ON;
+
+    SELECT DISTINCT
+        COALESCE(
+            s.PersonalAgentCode,
+            CASE WHEN LEFT(u.SuperiorCode, 2) = 'AM'
+                 THEN STUFF(u.SuperiorCode, 1, 2, '') END
+        ) AS SuperiorAgentCode,
+        u.AgentCode
+    FROM tblAgentUnderSuperior u WITH (NOLOCK)
+    LEFT JOIN tblAgentSuperior s WITH (NOLOCK)
+           ON s.SuperiorCode = u.SuperiorCode;
+
+    SELECT
+        a.AgentCode,
+        a.FirstName + ISNULL(' ' + a.LastName, '') AS AgentName,
+        a.MobileNo2,
+        a.[Address],
+        a.IsActive,
+        a.LicenseExpiryDate
+    FROM tblAgent a WITH (NOLOCK);
+"""
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _read_snapshot():
+    with core_cursor("agent_hierarchy.refresh") as cursor:
+        cursor.execute(_HIERARCHY_BATCH)
+        edges = {
+            (r[0], r[1])
+            for r in cursor.fetchall()
+            if r[0] and r[1] and r[0] != r[1]
+        }
+        cursor.nextset()
+        agents = {
+            r[0]: HierarchyAgent(
+                agent_code=r[0],
+                agent_name=r[1] or "",
+                mobile=r[2],
+                address=r[3],
+                is_active=bool(r[4]),
+                license_expiry_date=_as_date(r[5]),
+            )
+            for r in cursor.fetchall()
+            if r[0]
+        }
+    return edges, agents
+
+
+# -----------------------------------------------------------------------------
+# Closure maintenance
+# -----------------------------------------------------------------------------
+def _ancestors(agent_code, parents):
+    """
+    {ancestor: shortest depth} walking up `parents`; cycles are cut
+    """
+    found = {}
+    queue = deque([(agent_code, 0)])
+    seen = {agent_code}
+    while queue:
+        code, depth = queue.popleft()
+        for parent in parents.get(code, ()):
+            if parent in seen:
+                continue
+            seen.add(parent)
+            found[parent] = depth + 1
+            queue.append((parent, depth + 1))
+    return found
+
+
+def _subtree(roots, children):
+    found = set(roots)
+    queue = deque(roots)
+    while queue:
+        for child in children.get(queue.popleft(), ()):
+            if child not in found:
+                found.add(child)
+                queue.append(child)
+    return found
+
+
+def _sync_agents(agents):
+    existing = {a.agent_code: a for a in HierarchyAgent.objects.all()}
+    fields = ["agent_name", "mobile", "address", "is_active", "license_expiry_date"]
+
+    created = [a for code, a in agents.items() if code not in existing]
+    changed = [
+        a for code, a in agents.items()
+        if code in existing
+        and any(getattr(a, f) != getattr(existing[code], f) for f in fields)
+    ]
+    removed = [code for code in existing if code not in agents]
+
+    HierarchyAgent.objects.bulk_create(created, batch_size=1000)
+    HierarchyAgent.objects.bulk_update(changed, fields, batch_size=1000)
+    if removed:
+        HierarchyAgent.objects.filter(agent_code__in=removed).delete()
+
+
+def refresh_agent_hierarchy(full=False):
+    """
+    Syncs the local agent hierarchy (agents, edges, closure) with CORE.
+
+    The edge list is small, so it is read whole and diffed against the
+    stored one. Incrementally, only agents below an added or removed edge
+    (in the old or the new tree) get their ancestor rows recomputed;
+    `full` (or a first run) rebuilds the closure for everyone.
+
+    Returns the refresh state row.
+    """
+    state, _ = AgentBusinessRefresh.objects.get_or_create(name=REFRESH_NAME)
+    full = full or state.refreshed_at is None
+
+    edges, agents = _read_snapshot()
+
+    parents = defaultdict(set)
+    children = defaultdict(set)
+    for superior, agent in edges:
+        parents[agent].add(superior)
+        children[superior].add(agent)
+
+    if full:
+        added, removed = edges, set()
+        affected = set(parents)
+    else:
+        stored = set(AgentHierarchyEdge.objects.values_list("superior_code", "agent_code"))
+        added, removed = edges - stored, stored - edges
+        roots = {agent for _, agent in added | removed}
+        old_below = set(
+            AgentHierarchyClosure.objects.filter(ancestor__in=roots).values_list("descendant", flat=True)
+        )
+        affected = _subtree(roots, children) | old_below
+
+    closure = [
+        AgentHierarchyClosure(ancestor=ancestor, descendant=code, depth=depth)
+        for code in sorted(affected)
+        for ancestor, depth in _ancestors(code, parents).items()
+    ]
+
+    with transaction.atomic():
+        _sync_agents(agents)
+
+        if full:
+            AgentHierarchyEdge.objects.all().delete()
+            AgentHierarchyClosure.objects.all().delete()
+        else:
+            for superior, agent in removed:
+                AgentHierarchyEdge.objects.filter(superior_code=superior, agent_code=agent).delete()
+            if affected:
+                AgentHierarchyClosure.objects.filter(descendant__in=affected).delete()
+
+        AgentHierarchyEdge.objects.bulk_create(
+            [AgentHierarchyEdge(superior_code=s, agent_code=a) for s, a in added],
+            batch_size=1000,
+        )
+        AgentHierarchyClosure.objects.bulk_create(closure, batch_size=1000)
+
+        state.refreshed_at = timezone.now()
+        state.agents_refreshed = len(affected)
+        state.save()
+
+    logger.info(
+        "Agent hierarchy refreshed | full=%s | edges=+%s/-%s | agents=%s | closure_rows=%s",
+        full,
+        len(added),
+        len(removed),
+        len(affected),
+        len(closure),
+    )
+    return state
+
+
+def require_refreshed(name):
+    """
+    (as_of, stale) for the refresh job `name`: its last completed refresh
+    (ISO) and whether that is older than AGENT_READ_MODEL_MAX_AGE_HOURS,
+    i.e. its schedule has likely stopped. Raises ReadModelNotReady when
+    the job has never completed, as the read model is still empty.
+    """
+    refreshed_at = (
+        AgentBusinessRefresh.objects.filter(name=name).values_list("refreshed_at", flat=True).first()
+    )
+    if refreshed_at is None:
+        raise ReadModelNotReady(name)
+
+    max_age = timedelta(hours=getattr(settings, "AGENT_READ_MODEL_MAX_AGE_HOURS", 26))
+    stale = timezone.now() - refreshed_at > max_age
+    if stale:
+        logger.warning("Agent read model is stale | name=%s | as_of=%s", name, refreshed_at.isoformat())
+    return refreshed_at.isoformat(), stale
+
+
+# -----------------------------------------------------------------------------
+# Downline
+# -----------------------------------------------------------------------------
+def depth_request(request):
+    """
+    `depth` query parameter: levels of downline to include. Defaults to 1
+    (direct downline); 0 or "all" means every level (None).
+    """
+    value = (request.GET.get("depth") or "").strip().lower()
+    if value in ("0", "all"):
+        return None
+    try:
+        return max(int(value), 1)
+    except ValueError:
+        return DEFAULT_DEPTH
+
+
+def downline(agent_code, max_depth=DEFAULT_DEPTH):
+    """
+    Closure rows below `agent_code`, down to `max_depth` levels (None: all).
+    This is the one definition of "downline" shared by the agent APIs.
+    """
+    rows = AgentHierarchyClosure.objects.filter(ancestor=agent_code)
+    if max_depth:
+        rows = rows.filter(depth__lte=max_depth)
+    return rows
+
+
+def downline_codes(agent_code, max_depth=DEFAULT_DEPTH):
+    """
+    Subquery of downline agent codes, for `agent_code__in=`
+    """
+    return downline(agent_code, max_depth).values("descendant")
+
+
+def downline_agents(agent_code, max_depth=DEFAULT_DEPTH):
+    """
+    [(HierarchyAgent, depth)] ordered by agent code
+    """
+    depths = dict(downline(agent_code, max_depth).values_list("descendant", "depth"))
+    agents = HierarchyAgent.objects.filter(
+        agent_code__in=downline_codes(agent_code, max_depth)
+    ).order_by("agent_code")
+    return [(agent, depths[agent.agent_code]) for agent in agents]
+
+
+def active_downline_count(agent_code, max_depth=DEFAULT_DEPTH):
+    return HierarchyAgent.objects.filter(
+        agent_code__in=downline_codes(agent_code, max_depth),
+        is_active=True,
+        license_expiry_date__gt=timezone.localdate(),
+    ).count()
@@ -1,7 +1,7 @@
-from django.db import connections
+from kycform.services.core_db import core_cursor
 
 def fetch_agent_kpis(agent_code):
-    with connections["sqlserver"].cursor() as cursor:
+    with core_cursor("agent_kpi") as cursor:
 
         # 1️⃣ POLICY COUNTS
         cursor.execute("""
@@ -1,9 +1,87 @@
-from django.db import connections
+from kycform.services.core_db import core_cursor
+from kycform.services.keyset import Keyset
+
+MATURITY_KEYSET = Keyset(
+    ("p.MaturityDate", False),
+    ("p.PolicyNo", False),
+)
+
+_WHERE_SQL = """
+    WHERE p.AgentCode = %s
+      AND p.CurrentStatus IN ('I', 'L')
+      AND CAST(p.MaturityDate AS DATE) >= CAST(GETDATE() AS DATE)
+      AND CAST(p.MaturityDate AS DATE) <= DATEADD(MONTH, 3, CAST(GETDATE() AS DATE))
+"""
+
+
+def _rows_sql(policy_filter, top_sql="", seek_sql="", backward=False, pagination_sql=""):
+    return f"""
+        SELECT {top_sql}
+            ROW_NUMBER() OVER (ORDER BY p.MaturityDate ASC, p.PolicyNo ASC) AS SN,
+            p.PolicyNo,
+            p.Registerno,
+            i.FirstName
+                + ISNULL(' ' + i.MiddleName,'')
+                + ISNULL(' ' + i.LastName,'') AS PolicyHolder,
+            i.Mobile,
+            pl.PlanName,
+            p.Term,
+            p.PayMode,
+            CONVERT(VARCHAR(10), p.MaturityDate, 103) AS MaturityDate,
+            CAST(p.SA AS FLOAT),
+            CAST(p.Premium AS FLOAT),
+            CASE
+                WHEN p.CurrentStatus = 'I' THEN 'INFORCE'
+                WHEN p.CurrentStatus = 'L' THEN 'LAPSED'
+                ELSE ISNULL(NULLIF(LTRIM(RTRIM(p.CurrentStatus)), ''), 'UNKNOWN')
+            END AS PolicyStatus,
+            {MATURITY_KEYSET.columns()}
+        FROM tblPolicyDetail p
+        INNER JOIN tblInsuredDetail i
+                ON p.Registerno = i.Registerno
+        INNER JOIN tblPlan pl
+                ON p.PlanID = pl.PlanID
+        {_WHERE_SQL}
+          {policy_filter}
+          {seek_sql}
+        ORDER BY {MATURITY_KEYSET.order_by(backward)}
+        {pagination_sql}
+    """
+
+
+def _map_rows(raw):
+    data = []
+    sort_keys = []
+    for raw_row in raw:
+        r, keys = MATURITY_KEYSET.split(raw_row)
+        sort_keys.append(keys)
+        data.append(
+            {
+                "sn": r[0],
+                "policy_no": r[1],
+                "register_no": r[2],
+                "policy_holder": r[3],
+                "mobile": r[4],
+                "plan": r[5],
+                "term": r[6],
+                "paymode": r[7],
+                "maturity_date": r[8],
+                "sa": float(r[9] or 0),
+                "premium": float(r[10] or 0),
+                "status": r[11],
+            }
+        )
+    return data, sort_keys
 
 
 class AgentMaturityForecastingService:
     @staticmethod
-    def get_maturity_forecasting(agent_code, policy_no=None, page=1, page_size=10):
+    def get_maturity_forecasting(agent_code, policy_no=None, page=1, page_size=10, cursor=None):
+        """
+        `cursor` (a decoded SeekCursor) returns the page after/before it by
+        seeking on (MaturityDate, PolicyNo); totals are skipped and
+        `total_items` is None in that mode.
+        """
         page = int(page or 1)
         page_size = int(page_size or 10)
         if page < 1:
@@ -21,8 +99,13 @@ class AgentMaturityForecastingService:
             policy_filter = "AND p.PolicyNo LIKE %s"
             params.append(f"%{policy_no}%")
 
-        with connections["sqlserver"].cursor() as cursor:
-            cursor.execute(
+        if cursor is not None:
+            return AgentMaturityForecastingService._seek_page(
+                params, policy_filter, page_size, cursor
+            )
+
+        with core_cursor("agent_maturity_forecasting") as db_cursor:
+            db_cursor.execute(
                 f"""
                 SELECT
                     COUNT(*),
@@ -31,76 +114,29 @@ class AgentMaturityForecastingService:
                 FROM tblPolicyDetail p
                 INNER JOIN tblInsuredDetail i
                         ON p.Registerno = i.Registerno
-                WHERE p.AgentCode = %s
-                  AND p.CurrentStatus IN ('I', 'L')
-                  AND CAST(p.MaturityDate AS DATE) >= CAST(GETDATE() AS DATE)
-                  AND CAST(p.MaturityDate AS DATE) <= DATEADD(MONTH, 3, CAST(GETDATE() AS DATE))
+                {_WHERE_SQL}
                   {policy_filter}
                 """,
                 params,
             )
-            agg_row = cursor.fetchone() or (0, 0, 0)
+            agg_row = db_cursor.fetchone() or (0, 0, 0)
             total_items = int(agg_row[0] or 0)
             total_sa = float(agg_row[1] or 0)
             total_premium = float(agg_row[2] or 0)
 
-            cursor.execute(
-                f"""
-                SELECT
-                    ROW_NUMBER() OVER (ORDER BY p.MaturityDate ASC, p.PolicyNo ASC) AS SN,
-                    p.PolicyNo,
-                    p.Registerno,
-                    i.FirstName
-                        + ISNULL(' ' + i.MiddleName,'')
-                        + ISNULL(' ' + i.LastName,'') AS PolicyHolder,
-                    i.Mobile,
-                    pl.PlanName,
-                    p.Term,
-                    p.PayMode,
-                    CONVERT(VARCHAR(10), p.MaturityDate, 103) AS MaturityDate,
-                    CAST(p.SA AS FLOAT),
-                    CAST(p.Premium AS FLOAT),
-                    CASE
-                        WHEN p.CurrentStatus = 'I' THEN 'INFORCE'
-                        WHEN p.CurrentStatus = 'L' THEN 'LAPSED'
-                        ELSE ISNULL(NULLIF(LTRIM(RTRIM(p.CurrentStatus)), ''), 'UNKNOWN')
-                    END AS PolicyStatus
-                FROM tblPolicyDetail p
-                INNER JOIN tblInsuredDetail i
-                        ON p.Registerno = i.Registerno
-                INNER JOIN tblPlan pl
-                        ON p.PlanID = pl.PlanID
-                WHERE p.AgentCode = %s
-                  AND p.CurrentStatus IN ('I', 'L')
-                  AND CAST(p.MaturityDate AS DATE) >= CAST(GETDATE() AS DATE)
-                  AND CAST(p.MaturityDate AS DATE) <= DATEADD(MONTH, 3, CAST(GETDATE() AS DATE))
-                  {policy_filter}
-                ORDER BY p.MaturityDate ASC, p.PolicyNo ASC
-                OFFSET %s ROWS FETCH NEXT %s ROWS ONLY
-                """,
+            db_cursor.execute(
+                _rows_sql(policy_filter, pagination_sql="OFFSET %s ROWS FETCH NEXT %s ROWS ONLY"),
                 params + [offset, page_size],
             )
+            data, sort_keys = _map_rows(db_cursor.fetchall())
 
-            rows = cursor.fetchall()
-
-        data = []
-        for r in rows:
-            data.append(
-                {
-                    "sn": r[0],
-                    "policy_no": r[1],
-                    "register_no": r[2],
-                    "policy_holder": r[3],
-                    "mobile": r[4],
-                    "plan": r[5],
-                    "term": r[6],
-                    "paymode": r[7],
-                    "maturity_date": r[8],
-                    "sa": float(r[9] or 0),
-                    "premium": float(r[10] or 0),
-                    "status": r[11],
-                }
-            )
+        total_pages = (total_items + page_size - 1) // page_size if total_items else 0
+        cursors = MATURITY_KEYSET.cursors(
+            sort_keys,
+            offset + 1,
+            bool(total_pages and page < total_pages),
+            bool(total_pages and page > 1),
+        )
 
         return {
             "rows": data,
@@ -112,4 +148,33 @@ class AgentMaturityForecastingService:
             "summary": {
                 "policies": total_items,
             },
+            "cursors": cursors,
+        }
+
+    @staticmethod
+    def _seek_page(params, policy_filter, page_size, cursor):
+        seek_sql, seek_params = MATURITY_KEYSET.seek(cursor)
+
+        with core_cursor("agent_maturity_forecasting") as db_cursor:
+            db_cursor.execute(
+                _rows_sql(policy_filter, "TOP (%s)", seek_sql, cursor.backward),
+                [page_size + 1, *params, *seek_params],
+            )
+            raw = db_cursor.fetchall()
+
+        raw, first_sn, has_next, has_prev = MATURITY_KEYSET.window(raw, page_size, cursor)
+        data, sort_keys = _map_rows(raw)
+        for sn, row in enumerate(data, start=first_sn):
+            row["sn"] = sn
+
+        return {
+            "rows": data,
+            "total_items": None,
+            "total": None,
+            "summary": {
+                "policies": None,
+            },
+            "has_next": has_next,
+            "has_prev": has_prev,
+            "cursors": MATURITY_KEYSET.cursors(sort_keys, first_sn, has_next, has_prev),
         }
@@ -0,0 +1,253 @@
+from kycform.services.core_db import core_cursor
+from kycform.services.keyset import decode_cursor, seek_pagination
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+HOLDER_NAME = (
+    "i.FirstName + ISNULL(' ' + i.MiddleName, '') + ISNULL(' ' + i.LastName, '')"
+)
+
+
+# -----------------------------------------------------------------------------
+# Request helpers
+# -----------------------------------------------------------------------------
+def _int_param(request, key, default):
+    try:
+        return int(request.GET.get(key, str(default)) or default)
+    except ValueError:
+        return default
+
+
+def page_request(request):
+    """
+    (page, page_size) from the query string, clamped to sane bounds
+    """
+    page = _int_param(request, "page", 1)
+    page_size = _int_param(request, "page_size", DEFAULT_PAGE_SIZE)
+    if page < 1:
+        page = 1
+    if page_size < 1:
+        page_size = DEFAULT_PAGE_SIZE
+    if page_size > MAX_PAGE_SIZE:
+        page_size = MAX_PAGE_SIZE
+    return page, page_size
+
+
+def search_filter(policy_column, policy_no, name):
+    """
+    Returns (sql, params) matching the policy number and/or the insured's
+    full name (alias `i`); both given means either may match
+    """
+    if policy_no and name:
+        sql = f"AND ({policy_column} LIKE %s OR ({HOLDER_NAME}) LIKE %s)"
+        return sql, [f"%{policy_no}%", f"%{name}%"]
+    if policy_no:
+        return f"AND {policy_column} LIKE %s", [f"%{policy_no}%"]
+    if name:
+        return f"AND ({HOLDER_NAME}) LIKE %s", [f"%{name}%"]
+    return "", []
+
+
+def cursor_request(request, keyset):
+    """
+    Decoded `cursor` query parameter: None when absent or empty (page
+    numbers / first page). Raises InvalidCursor for a bad token.
+    """
+    return decode_cursor(request.GET.get("cursor"), keyset.width)
+
+
+def pagination_payload(page, page_size, total_rows):
+    total_pages = (total_rows + page_size - 1) // page_size if total_rows else 0
+    if total_pages and page > total_pages:
+        page = total_pages
+    return {
+        "page": page,
+        "page_size": page_size,
+        "total_rows": total_rows,
+        "total_pages": total_pages,
+        "has_next": bool(total_pages and page < total_pages),
+        "has_prev": bool(total_pages and page > 1),
+    }
+
+
+# -----------------------------------------------------------------------------
+# Single-pass paginated report
+# -----------------------------------------------------------------------------
+_DROP_PAGE = """
+        IF OBJECT_ID('tempdb..#report_page') IS NOT NULL
+            DROP TABLE #report_page;
+"""
+
+
+class PaginatedReport:
+    """
+    Row count, overall totals and one page of a filtered report in a single
+    statement.
+
+    The filtered set (`source`, projected through `columns`) is scanned
+    once: ROW_NUMBER() numbers it, COUNT(*) OVER () and the `totals`
+    window aggregates ride along on every row. The requested page is cut
+    by row number (clamped to the last page) into the session temp table
+    #report_page and only then joined to `page_joins`, so lookups (plan
+    names, latest payment) run for the page rather than the whole set;
+    joins may restrict themselves with `SELECT PolicyNo FROM #report_page`.
+
+    With a cursor the page is instead read by seeking on `keyset` (see
+    kycform.services.keyset); count and totals are skipped so deep pages
+    cost the same as the first.
+
+    `select` is the final projection over the page alias `r` (plus any
+    `page_joins` aliases) and must line up with `keys`.
+    """
+
+    def __init__(self, name, source, columns, keyset, select, keys,
+                 totals=None, page_joins="", floats=()):
+        self.name = name
+        self.source = source
+        self.columns = columns
+        self.keyset = keyset
+        self.select = select
+        self.keys = keys
+        self.totals = totals or {}
+        self.page_joins = page_joins
+        self.floats = floats
+
+    def sql(self, keyset, search=""):
+        totals = "".join(
+            f",\n            {expr} AS Total_{key}" for key, expr in self.totals.items()
+        )
+        total_columns = "".join(f", r.Total_{key}" for key in self.totals)
+        seek_columns = ", ".join(f"r.Seek{i}" for i in range(len(keyset.order)))
+        return f"""
+        SET NOCOUNT ON;
+        DECLARE @page INT = %s, @size INT = %s;
+        {_DROP_PAGE}
+
+        WITH filtered AS (
+            SELECT
+                {self.columns},
+                {keyset.columns()},
+                ROW_NUMBER() OVER (ORDER BY {keyset.order_by()}) AS SN,
+                COUNT(*) OVER () AS TotalRows{totals}
+            {self.source}
+            {search}
+        ),
+        paged AS (
+            SELECT
+                f.*,
+                CASE
+                    WHEN (@page - 1) * @size < f.TotalRows THEN (@page - 1) * @size
+                    ELSE ((f.TotalRows - 1) / @size) * @size
+                END AS PageOffset
+            FROM filtered f
+        )
+        SELECT *
+        INTO #report_page
+        FROM paged
+        WHERE SN > PageOffset
+          AND SN <= PageOffset + @size;
+
+        SELECT
+            {self.select},
+            r.TotalRows{total_columns},
+            {seek_columns}
+        FROM #report_page r
+        {self.page_joins}
+        ORDER BY r.SN;
+
+        DROP TABLE #report_page;
+        """
+
+    def seek_sql(self, keyset, search="", seek="", backward=False):
+        seek_columns = ", ".join(f"r.Seek{i}" for i in range(len(keyset.order)))
+        return f"""
+        SET NOCOUNT ON;
+        DECLARE @size INT = %s;
+        {_DROP_PAGE}
+
+        SELECT TOP (@size + 1)
+            {self.columns},
+            {keyset.columns()},
+            0 AS SN
+        INTO #report_page
+        {self.source}
+        {search}
+        {seek}
+        ORDER BY {keyset.order_by(backward)};
+
+        SELECT
+            {self.select},
+            {seek_columns}
+        FROM #report_page r
+        {self.page_joins}
+        ORDER BY {keyset.order_by(backward, alias="r")};
+
+        DROP TABLE #report_page;
+        """
+
+    def run(self, params, page, page_size, search="", limit=0, cursor=None):
+        """
+        Runs the report for `params` (source placeholders, then `search`
+        placeholders). With `limit`, the first `limit` rows are returned
+        instead of a page; pagination still reflects page/page_size.
+
+        `cursor` is a decoded SeekCursor; given one, the page after (or
+        before) it is returned with `totals` None and no row counts. Raises
+        InvalidCursor if the keyset can't seek (no unique row key).
+        """
+        if cursor is not None and limit <= 0:
+            return self._run_seek(params, page_size, search, cursor)
+
+        fetch_page, fetch_size = (1, limit) if limit > 0 else (page, page_size)
+
+        with core_cursor(self.name) as db_cursor:
+            keyset = self.keyset.bind(db_cursor)
+            db_cursor.execute(self.sql(keyset, search), [fetch_page, fetch_size, *params])
+            raw = db_cursor.fetchall()
+
+        width = len(self.keys)
+        total_rows = int(raw[0][width] or 0) if raw else 0
+
+        totals = {}
+        for i, key in enumerate(self.totals, start=width + 1):
+            totals[key] = float((raw[0][i] if raw else 0) or 0)
+
+        rows, seek_keys = keyset.rows(raw, self.keys, self.floats)
+        pagination = pagination_payload(page, page_size, total_rows)
+        first_sn = rows[0]["sn"] if rows else 1
+        pagination.update(
+            keyset.cursors(seek_keys, first_sn, pagination["has_next"], pagination["has_prev"])
+        )
+
+        return {
+            "rows": rows,
+            "totals": totals,
+            "pagination": pagination,
+        }
+
+    def _run_seek(self, params, page_size, search, cursor):
+        with core_cursor(self.name) as db_cursor:
+            keyset = self.keyset.bind(db_cursor)
+            seek, seek_params = keyset.seek(cursor)
+            db_cursor.execute(
+                self.seek_sql(keyset, search, seek, cursor.backward),
+                [page_size, *params, *seek_params],
+            )
+            raw = db_cursor.fetchall()
+
+        raw, first_sn, has_next, has_prev = keyset.window(raw, page_size, cursor)
+        rows, seek_keys = keyset.rows(raw, self.keys, self.floats)
+        for sn, row in enumerate(rows, start=first_sn):
+            row["sn"] = sn
+
+        return {
+            "rows": rows,
+            "totals": None,
+            "pagination": seek_pagination(
+                page_size,
+                has_next,
+                has_prev,
+                keyset.cursors(seek_keys, first_sn, has_next, has_prev),
+            ),
+        }
@@ -2,7 +2,7 @@ from datetime import date, datetime
 from decimal import Decimal
 
 from django.core.cache import cache
-from django.db import connections
+from kycform.services.core_db import core_cursor, is_available
 
 
 CLAIM_STATUS_CACHE_TTL = 10 * 60
@@ -104,7 +104,7 @@ def fetch_claim_status(policy_no):
     if cached_value is not None:
         return cached_value
 
-    if "sqlserver" not in connections.databases:
+    if not is_available():
         return {"holder": {}, "claims": []}
 
     policy_filter_sql = ""
@@ -205,7 +205,7 @@ def fetch_claim_status(policy_no):
               )
     """
 
-    with connections["sqlserver"].cursor() as cursor:
+    with core_cursor("claim_status") as cursor:
         cursor.execute(query, params)
         rows = _fetch_rows(cursor)
 
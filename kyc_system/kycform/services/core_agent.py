@@ -1,4 +1,4 @@
-from django.db import connections
+from kycform.services.core_db import core_cursor
 from datetime import datetime
 import logging
 
@@ -33,7 +33,7 @@ def verify_agent_from_core(agent_code: str, dob: str) -> bool:
     # CORE CALL (AUTHORITATIVE)
     # -----------------------------
     try:
-        with connections["sqlserver"].cursor() as cursor:
+        with core_cursor("core_agent.login") as cursor:
             cursor.execute(
                 """
                 EXEC proc_Online_AgentLogin
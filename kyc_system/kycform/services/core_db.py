@@ -0,0 +1,254 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+CORE_DB_ALIAS = "sqlserver"
+
+
+# -----------------------------------------------------------------------------
+# Per-query timing hooks
+# -----------------------------------------------------------------------------
+_query_hooks = []
+
+
+def add_query_hook(hook):
+    """
+    Registers `hook(name, sql, params, duration_seconds, error)`, called
+    after every statement run through `core_cursor`.
+    """
+    _query_hooks.append(hook)
+    return hook
+
+
+def _redact(params):
+    # Policy numbers, DOBs and client ids never reach the logs
+    return [type(p).__name__ for p in params or ()]
+
+
+@add_query_hook
+def _log_slow_query(name, sql, params, duration, error):
+    threshold_ms = getattr(settings, "CORE_DB_SLOW_QUERY_MS", 500)
+    if threshold_ms and duration * 1000 >= threshold_ms:
+        logger.warning(
+            "Slow core query | name=%s | duration_ms=%.1f | params=%s",
+            name,
+            duration * 1000,
+            _redact(params),
+        )
+
+
+class _QueryTimer:
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        error = None
+        try:
+            return execute(sql, params, many, context)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            for hook in _query_hooks:
+                try:
+                    hook(self.name, sql, params, duration, error)
+                except Exception:
+                    logger.exception("Core query hook failed | name=%s", self.name)
+
+
+# -----------------------------------------------------------------------------
+# Connection access
+# -----------------------------------------------------------------------------
+def is_available():
+    return CORE_DB_ALIAS in connections.databases
+
+
+@contextmanager
+def core_cursor(name):
+    """
+    Cursor on the persistent CORE (SQL Server) connection.
+
+    `name` identifies the caller in timing hooks and slow-query logs.
+    """
+    connection = connections[CORE_DB_ALIAS]
+    with connection.execute_wrapper(_QueryTimer(name)):
+        with connection.cursor() as cursor:
+            yield cursor
+
+
+# -----------------------------------------------------------------------------
+# Row mapping
+# -----------------------------------------------------------------------------
+def columns(cursor):
+    return [col[0] for col in cursor.description] if cursor.description else []
+
+
+def _to_float(value):
+    return float(value or 0)
+
+
+def dict_rows(cursor, keys=None, floats=()):
+    """
+    Fetches all rows as dicts keyed by `keys` (positional) or, by default,
+    the result-set column names. Keys in `floats` are coerced with
+    `float(value or 0)`.
+    """
+    keys = keys or columns(cursor)
+    rows = [dict(zip(keys, row)) for row in cursor.fetchall()]
+
+    for key in floats:
+        for row in rows:
+            row[key] = _to_float(row[key])
+
+    return rows
+
+
+def dict_row(cursor, keys=None, floats=()):
+    row = cursor.fetchone()
+    if row is None:
+        return None
+
+    data = dict(zip(keys or columns(cursor), row))
+    for key in floats:
+        data[key] = _to_float(data[key])
+    return data
+
+
+def scalar(cursor, default=0):
+    """
+    First column of the next row, or `default` when missing/NULL
+    """
+    row = cursor.fetchone()
+    if not row or row[0] is None:
+        return default
+    return row[0]
+
+
+
+# -----------------------------------------------------------------------------
+# Key sets (IN-lists)
+# -----------------------------------------------------------------------------
+# SQL Server caches one plan per distinct statement text, so an IN-list with
+# one placeholder per value compiles a new plan for every list length.
+# Lists are padded to power-of-two buckets instead: a customer with 5 or 7
+# policies reuses the 8-slot plan, one with 300 the 512-slot plan.
+IN_LIST_MIN_BUCKET = 8
+
+
+def bucket_size(count):
+    size = IN_LIST_MIN_BUCKET
+    while size < count:
+        size *= 2
+    return size
+
+
+def padded(values):
+    """
+    De-duplicated `values`, padded to the bucket size by repeating the
+    last value (duplicates don't change IN / DISTINCT semantics)
+    """
+    values = list(dict.fromkeys(values))
+    if not values:
+        return values
+    return values + [values[-1]] * (bucket_size(len(values)) - len(values))
+
+
+def in_clause(values):
+    """
+    Returns ("(%s,%s,...)", params) for `column IN <clause>`
+    """
+    params = padded(values)
+    return "(" + ",".join(["%s"] * len(params)) + ")", params
+
+
+def key_table(name, values, length=100):
+    """
+    Returns (sql, params) that load `values` into the session temp table
+    #<name>(v) for batches that filter on the same key set several times;
+    reference it as `IN (SELECT v FROM #<name>)` and drop it at the end.
+
+    The SQL turns NOCOUNT on itself: it usually opens a batch, and the
+    INSERT's row count would otherwise come back as the first result.
+
+    Keep "GROUP BY" out of batches whose plan reuse matters: mssql-django
+    turns the parameters of any statement containing it into a DECLARE of
+    one NVARCHAR(len) variable per distinct value, which undoes the padding.
+    """
+    params = padded(values)
+    rows = ",".join(["(%s)"] * len(params))
+    sql = f"""
+    SET NOCOUNT ON;
+
+    IF OBJECT_ID('tempdb..#{name}') IS NOT NULL
+        DROP TABLE #{name};
+
+    CREATE TABLE #{name} (v VARCHAR({length}) COLLATE DATABASE_DEFAULT PRIMARY KEY);
+
+    INSERT INTO #{name} (v)
+    SELECT DISTINCT k.v FROM (VALUES {rows}) AS k(v);
+"""
+    return sql, params
+
+
+# -----------------------------------------------------------------------------
+# Catalog
+# -----------------------------------------------------------------------------
+# Primary key first, then the first unique index on NOT NULL columns, then
+# the identity column; each row is (column, type, source, index_id, position).
+_UNIQUE_KEY_SQL = """
+    SELECT c.name, t.name, 2, 0, 0
+    FROM sys.columns c
+    INNER JOIN sys.types t ON t.user_type_id = c.user_type_id
+    WHERE c.object_id = OBJECT_ID(%s)
+      AND c.is_identity = 1
+    UNION ALL
+    SELECT c.name, t.name, CASE WHEN i.is_primary_key = 1 THEN 0 ELSE 1 END, i.index_id, ic.key_ordinal
+    FROM sys.indexes i
+    INNER JOIN sys.index_columns ic
+            ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+    INNER JOIN sys.columns c
+            ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+    INNER JOIN sys.types t ON t.user_type_id = c.user_type_id
+    WHERE i.object_id = OBJECT_ID(%s)
+      AND i.is_unique = 1
+      AND ic.key_ordinal > 0
+      AND i.has_filter = 0
+      AND NOT EXISTS (
+          SELECT 1
+          FROM sys.index_columns nic
+          INNER JOIN sys.columns nc
+                  ON nc.object_id = nic.object_id AND nc.column_id = nic.column_id
+          WHERE nic.object_id = i.object_id
+            AND nic.index_id = i.index_id
+            AND nic.key_ordinal > 0
+            AND nc.is_nullable = 1
+      )
+    ORDER BY 3, 4, 5
+"""
+
+_unique_keys = {}
+
+
+def unique_key(cursor, table):
+    """
+    [(column, sql_type)] that identify one row of `table`: its primary key,
+    else a unique index, else its identity column; [] when it has none.
+    Resolved from the catalog once per process.
+    """
+    if table not in _unique_keys:
+        cursor.execute(_UNIQUE_KEY_SQL, [table, table])
+        rows = cursor.fetchall()
+        key = []
+        if rows:
+            source, index_id = rows[0][2], rows[0][3]
+            key = [(r[0], r[1]) for r in rows if (r[2], r[3]) == (source, index_id)]
+        _unique_keys[table] = key
+    return _unique_keys[table]
+
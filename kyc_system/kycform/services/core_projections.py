@@ -0,0 +1,26 @@
+def latest_payment_join(policy_keys, alias="pp", on="r.PolicyNo"):
+    """
+    LEFT JOIN exposing each policy's latest tblPremiumPaid row as
+    `<alias>.PaidDate` / `<alias>.InstalmenType` / `<alias>.Premium`.
+
+    Computed set-based with ROW_NUMBER() over only the policies in
+    `policy_keys` (a subquery returning PolicyNo, e.g. a report's page),
+    instead of a correlated TOP 1 seek per row.
+    """
+    return f"""
+        LEFT JOIN (
+            SELECT
+                x.PolicyNo,
+                x.PaidDate,
+                x.InstalmenType,
+                x.Premium,
+                ROW_NUMBER() OVER (
+                    PARTITION BY x.PolicyNo
+                    ORDER BY x.PaidDate DESC
+                ) AS PaymentRank
+            FROM tblPremiumPaid x WITH (NOLOCK)
+            WHERE x.PolicyNo IN ({policy_keys})
+        ) {alias}
+               ON {alias}.PolicyNo = {on}
+              AND {alias}.PaymentRank = 1
+    """
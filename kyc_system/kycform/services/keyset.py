@@ -0,0 +1,264 @@
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core import signing
+
+from kycform.services.core_db import unique_key
+
+logger = logging.getLogger(__name__)
+
+CURSOR_SALT = "kycform.keyset"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# -----------------------------------------------------------------------------
+# Cursor tokens
+# -----------------------------------------------------------------------------
+def _bind_value(value):
+    """
+    Sort key as a bindable, JSON-safe value. Datetimes are kept at
+    millisecond precision in ISO 8601 so SQL Server converts them back to
+    the column's DATETIME exactly (binding a DATETIME2 would not compare
+    equal to .997-style values).
+    """
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}"
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values, sn, backward=False):
+    """
+    Opaque, signed token for the row whose sort keys are `values`; `sn` is
+    that row's position so serial numbers carry across pages
+    """
+    return signing.dumps(
+        {"k": [_bind_value(v) for v in values], "sn": sn, "b": int(backward)},
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+class SeekCursor:
+    def __init__(self, values, sn, backward):
+        self.values = values
+        self.sn = sn
+        self.backward = backward
+
+
+def decode_cursor(token, width):
+    """
+    SeekCursor for a token from `encode_cursor`, or None for an empty one
+    (first page). Raises InvalidCursor for anything tampered or stale.
+    """
+    if not token:
+        return None
+
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+        values, sn, backward = data["k"], int(data["sn"]), bool(data["b"])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise InvalidCursor("INVALID_CURSOR")
+
+    if not isinstance(values, list) or len(values) != width:
+        raise InvalidCursor("INVALID_CURSOR")
+    return SeekCursor(values, sn, backward)
+
+
+# -----------------------------------------------------------------------------
+# Seek pagination
+# -----------------------------------------------------------------------------
+_DATE_TYPES = {"date", "datetime", "datetime2", "smalldatetime", "datetimeoffset"}
+
+
+def _row_key_expr(alias, key):
+    """
+    One orderable expression for a table's unique key: the column itself,
+    or a delimited string of the columns for a composite key (the order
+    only has to be total and identical in ORDER BY and the seek).
+    """
+    if len(key) == 1:
+        return f"{alias}.[{key[0][0]}]"
+    parts = []
+    for column, sql_type in key:
+        style = ", 126" if sql_type in _DATE_TYPES else ""
+        parts.append(f"CONVERT(NVARCHAR(100), {alias}.[{column}]{style})")
+    return "CONCAT(" + ", NCHAR(31), ".join(parts) + ")"
+
+
+class Keyset:
+    """
+    Seek ("keyset") pagination over an ORDER BY of (expression, descending)
+    or (expression, descending, nullable) columns. The columns must make
+    the order unique: end with PolicyNo for one row per policy, or pass
+    `row_key=(table, alias)` when a policy can have several rows (one per
+    payment). The table's unique key is then resolved from the catalog
+    (core_db.unique_key) by `bind()` and appended as the last column.
+
+    Queries select `columns()` last, so each raw row ends with its sort
+    keys; `seek(cursor)` continues strictly after (or before) the cursor
+    row, which makes every page an index range read instead of an OFFSET
+    that grows with the page number. Columns are compared raw so the seek
+    stays sargable; nullable ones get an explicit IS NULL branch (SQL
+    Server sorts NULLs lowest).
+    """
+
+    def __init__(self, *order, row_key=None):
+        self.order = tuple(
+            (expr, descending, nullable)
+            for expr, descending, nullable in (
+                column if len(column) == 3 else (*column, False) for column in order
+            )
+        )
+        self.row_key = row_key
+        self.unique = row_key is None
+        self._bound = None
+
+    @property
+    def width(self):
+        return len(self.order) + (1 if self.row_key else 0)
+
+    def bind(self, db_cursor):
+        """
+        The keyset to build SQL with. With a `row_key`, its unique key is
+        appended; if the table has none, the keyset is returned without it
+        and marked non-unique (no cursors are issued or accepted).
+        """
+        if self.row_key is None:
+            return self
+        if self._bound is None:
+            table, alias = self.row_key
+            key = unique_key(db_cursor, table)
+            if key:
+                descending = self.order[-1][1]
+                bound = Keyset(*self.order, (_row_key_expr(alias, key), descending, False))
+            else:
+                logger.warning("No unique key on %s; cursor pagination disabled", table)
+                bound = Keyset(*self.order)
+                bound.unique = False
+            self._bound = bound
+        return self._bound
+
+    def columns(self):
+        return ",\n".join(f"{expr} AS Seek{i}" for i, (expr, _, _) in enumerate(self.order))
+
+    def order_by(self, backward=False, alias=None):
+        parts = []
+        for i, (expr, descending, _) in enumerate(self.order):
+            column = f"{alias}.Seek{i}" if alias else expr
+            parts.append(f"{column} {'ASC' if descending == backward else 'DESC'}")
+        return ", ".join(parts)
+
+    @staticmethod
+    def _equal(expr, nullable, value):
+        if nullable and value is None:
+            return f"{expr} IS NULL", []
+        return f"{expr} = %s", [value]
+
+    @staticmethod
+    def _after(expr, ascending, nullable, value):
+        """
+        `expr` strictly after `value` when scanning ascending/descending
+        """
+        if not nullable:
+            return f"{expr} {'>' if ascending else '<'} %s", [value]
+        if value is None:
+            return (f"{expr} IS NOT NULL", []) if ascending else ("1 = 0", [])
+        if ascending:
+            return f"{expr} > %s", [value]
+        return f"({expr} < %s OR {expr} IS NULL)", [value]
+
+    def seek(self, cursor):
+        """
+        Returns ("AND (...)", params) selecting rows after the cursor row in
+        the cursor's direction, or ("", []) without a cursor
+        """
+        if cursor is None:
+            return "", []
+        if not self.unique or len(cursor.values) != len(self.order):
+            raise InvalidCursor("INVALID_CURSOR")
+
+        clauses = []
+        params = []
+        for i, (expr, descending, nullable) in enumerate(self.order):
+            terms = []
+            for (prev, _, prev_nullable), value in zip(self.order[:i], cursor.values):
+                sql, values = self._equal(prev, prev_nullable, value)
+                terms.append(sql)
+                params.extend(values)
+            sql, values = self._after(expr, descending == cursor.backward, nullable, cursor.values[i])
+            terms.append(sql)
+            params.extend(values)
+            clauses.append("(" + " AND ".join(terms) + ")")
+        return "AND (" + " OR ".join(clauses) + ")", params
+
+    def split(self, row):
+        """
+        (row without the sort keys, sort keys)
+        """
+        width = len(self.order)
+        return row[: -width], row[-width:]
+
+    def rows(self, raw, keys, floats=()):
+        """
+        Maps raw rows to dicts keyed by `keys`; returns (rows, sort keys)
+        """
+        rows = []
+        sort_keys = []
+        for r in raw:
+            values, seek_values = self.split(r)
+            row = dict(zip(keys, values))
+            for key in floats:
+                row[key] = float(row[key] or 0)
+            rows.append(row)
+            sort_keys.append(seek_values)
+        return rows, sort_keys
+
+    def window(self, raw, page_size, cursor):
+        """
+        Trims a `page_size + 1` seek fetch to one page in display order.
+
+        Returns (rows, first_sn, has_next, has_prev).
+        """
+        has_more = len(raw) > page_size
+        raw = list(raw[:page_size])
+
+        if cursor is None:
+            return raw, 1, has_more, False
+        if cursor.backward:
+            raw.reverse()
+            return raw, cursor.sn - len(raw), True, has_more
+        return raw, cursor.sn + 1, has_more, True
+
+    def cursors(self, keys, first_sn, has_next, has_prev):
+        """
+        next/prev cursor tokens for a page whose rows have sort `keys`
+        """
+        if not keys or not self.unique:
+            return {"next_cursor": None, "prev_cursor": None}
+        return {
+            "next_cursor": encode_cursor(keys[-1], first_sn + len(keys) - 1) if has_next else None,
+            "prev_cursor": encode_cursor(keys[0], first_sn, backward=True) if has_prev else None,
+        }
+
+
+def seek_pagination(page_size, has_next, has_prev, cursors):
+    """
+    Pagination block for a cursor (seek) page; row counts aren't known
+    """
+    return {
+        "page": None,
+        "page_size": page_size,
+        "total_rows": None,
+        "total_pages": None,
+        "has_next": has_next,
+        "has_prev": has_prev,
+        **cursors,
+    }
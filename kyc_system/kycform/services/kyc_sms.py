@@ -17,6 +17,13 @@ def _get_sms_gateway_url():
     return (getattr(settings, "SMS_GATEWAY_URL", "") or "").strip()
 
 
+def _get_sms_gateway_headers():
+    token = (getattr(settings, "API_SERVICE_TOKEN", "") or "").strip()
+    if token and (getattr(settings, "API_SERVICE_BASE_URL", "") or "").strip():
+        return {"Authorization": f"Bearer {token}"}
+    return {}
+
+
 def send_kyc_verified_sms(user, mobile=None, actor_identifier="ADMIN", source="ADMIN"):
     """
     Create a persistent notification row and try to deliver the SMS.
@@ -51,12 +58,16 @@ def send_kyc_verified_sms(user, mobile=None, actor_identifier="ADMIN", source="A
     payload = {
         "mobile": resolved_mobile,
         "message": VERIFIED_SMS_MESSAGE,
+        # api_service persists the message and retries delivery itself;
+        # the returned message_id is kept as the provider reference.
+        "queue": True,
     }
 
     try:
         response = requests.post(
             gateway_url,
             json=payload,
+            headers=_get_sms_gateway_headers(),
             timeout=getattr(settings, "SMS_GATEWAY_TIMEOUT", 15),
         )
         response.raise_for_status()
@@ -1,8 +1,8 @@
 from django.core.cache import cache
-from django.db import connections
 from rest_framework.exceptions import AuthenticationFailed
 
 from kycform.models import KycPolicy, KycUserInfo
+from kycform.services.core_db import core_cursor, in_clause, scalar
 
 
 class PolicyClientService:
@@ -30,24 +30,23 @@ class PolicyClientService:
         if not policy_numbers:
             raise AuthenticationFailed("NO_POLICY_LINKED")
 
-        placeholders = ", ".join(["%s"] * len(policy_numbers))
+        policy_in, policy_params = in_clause(policy_numbers)
         query = f"""
             SELECT TOP 1 tid.ClientNo
             FROM tblPolicyDetail tpd WITH (NOLOCK)
             INNER JOIN tblInsuredDetail tid WITH (NOLOCK)
                     ON tid.RegisterNo = tpd.RegisterNo
-            WHERE tpd.PolicyNo IN ({placeholders})
+            WHERE tpd.PolicyNo IN {policy_in}
               AND tid.ClientNo IS NOT NULL
         """
 
-        with connections["sqlserver"].cursor() as cursor:
-            cursor.execute(query, policy_numbers)
-            row = cursor.fetchone()
+        with core_cursor("policy_client.client_no") as cursor:
+            cursor.execute(query, policy_params)
+            client_no = scalar(cursor, None)
 
-        if not row:
+        if client_no is None:
             raise AuthenticationFailed("CLIENT_NOT_FOUND")
 
-        client_no = row[0]
         cache.set(cache_key, client_no, 300)
         return client_no
 
@@ -1,41 +1,18 @@
 from datetime import date
 
-from django.db import connections
+from kycform.services.core_db import core_cursor, dict_rows, key_table
 from kycform.services.policy_loan_details import PolicyLoanDetailsService
 
+LOAN_PREVIEW_SIZE = 5
 
-def _build_in_clause(values):
-    placeholders = ",".join(["%s"] * len(values))
-    return f"({placeholders})"
+# Policy numbers are loaded once into this temp table and every statement
+# in the batch filters on it, so the batch text only varies by key bucket.
+_POLICY_KEYS = "dashboard_policies"
+_IN_POLICIES = f"(SELECT v FROM #{_POLICY_KEYS})"
 
 
-def get_policy_dashboard_data(policy_numbers):
-    """
-    Returns dashboard payload for policy-holder portal.
-    Reads only from CORE SQLServer.
-    """
-    policies = [p for p in policy_numbers if p]
-    if not policies:
-        return {
-            "kpi": {
-                "policies": {"total": 0},
-                "premium": {"total": 0},
-                "due": {"count": 0, "premium": 0},
-            },
-            "summary": {"policies": 0, "premium": 0, "paid_installments": 0},
-            "chart": {"labels": [], "premium": []},
-            "history": [],
-            "loan": {
-                "count": 0,
-                "loan_amount": 0.0,
-                "balance_amount": 0.0,
-                "rows": [],
-            },
-        }
-
-    in_clause = _build_in_clause(policies)
-
-    data = {
+def _empty_dashboard():
+    return {
         "kpi": {
             "policies": {"total": 0},
             "premium": {"total": 0},
@@ -52,111 +29,157 @@ def get_policy_dashboard_data(policy_numbers):
         },
     }
 
-    with connections["sqlserver"].cursor() as cursor:
-        cursor.execute(
-            f"""
-            SELECT
-                COUNT(DISTINCT pd.PolicyNo) AS total_policies,
-                SUM(CASE WHEN pd.FUP < GETDATE() THEN 1 ELSE 0 END) AS due_count,
-                ISNULL(SUM(CASE WHEN pd.FUP < GETDATE() THEN pd.Premium ELSE 0 END), 0) AS due_premium
-            FROM tblPolicyDetail pd WITH (NOLOCK)
-            WHERE pd.PolicyNo IN {in_clause}
-            """,
-            policies,
-        )
+
+def _chart_months(today):
+    """
+    First day of each of the last 12 months, oldest first
+    """
+    month_starts = []
+    for i in range(11, -1, -1):
+        y = today.year
+        m = today.month - i
+        while m <= 0:
+            y -= 1
+            m += 12
+        month_starts.append(date(y, m, 1))
+    return month_starts
+
+
+# Premium per month since the chart's first month (binds that date)
+_MONTHLY_CHART = """
+    SELECT DISTINCT
+        YEAR(p.PaidDate)            AS paid_year,
+        MONTH(p.PaidDate)           AS paid_month,
+        ISNULL(SUM(p.Premium) OVER (
+            PARTITION BY YEAR(p.PaidDate), MONTH(p.PaidDate)
+        ), 0)                       AS premium_amount
+    FROM #dashboard_paid p
+    WHERE p.PaidDate >= %s
+    ORDER BY paid_year, paid_month;
+"""
+
+# The policy holder's premium rows are read from tblPremiumPaid once into a
+# temp table; totals, the monthly chart and the recent history are all
+# answered from it. Each SELECT below is one result set, in this order:
+#   1. policy/due KPIs   2. paid total + installments   3. monthly chart
+#   4. last 10 payments  (5. loan totals  6. loan preview rows)
+#
+# The batch must not contain the text "GROUP BY": mssql-django rewrites any
+# such statement into a DECLARE prelude with one NVARCHAR(len) variable per
+# distinct parameter, so the text would vary with every policy list again.
+# The monthly chart sums with a window over the month instead.
+_PAID_BATCH = """
+    SET NOCOUNT ON;
+
+    IF OBJECT_ID('tempdb..#dashboard_paid') IS NOT NULL
+        DROP TABLE #dashboard_paid;
+
+    SELECT
+        pp.PolicyNo,
+        pp.PaidDate,
+        CAST(pp.Premium AS DECIMAL(18,2)) AS Premium
+    INTO #dashboard_paid
+    FROM tblPremiumPaid pp WITH (NOLOCK)
+    WHERE pp.PolicyNo IN {in_policies};
+
+    SELECT
+        COUNT(DISTINCT pd.PolicyNo) AS total_policies,
+        SUM(CASE WHEN pd.FUP < GETDATE() THEN 1 ELSE 0 END) AS due_count,
+        ISNULL(SUM(CASE WHEN pd.FUP < GETDATE() THEN pd.Premium ELSE 0 END), 0) AS due_premium
+    FROM tblPolicyDetail pd WITH (NOLOCK)
+    WHERE pd.PolicyNo IN {in_policies};
+
+    SELECT
+        ISNULL(SUM(p.Premium), 0) AS total_paid_premium,
+        COUNT(*) AS paid_installments
+    FROM #dashboard_paid p;
+
+{monthly_chart}
+    SELECT TOP 10
+        p.PolicyNo,
+        CONVERT(VARCHAR(10), p.PaidDate, 120) AS paid_date,
+        p.Premium AS amount,
+        pd.PayMode
+    FROM #dashboard_paid p
+    INNER JOIN tblPolicyDetail pd WITH (NOLOCK)
+            ON pd.PolicyNo = p.PolicyNo
+    ORDER BY p.PaidDate DESC;
+"""
+
+
+def dashboard_batch(policies, loan_cols, month_start):
+    """
+    (sql, params) for the whole dashboard batch: the policy key table, the
+    paid-premium result sets and, with `loan_cols`, the loan totals/preview
+    """
+    sql, params = key_table(_POLICY_KEYS, policies)
+    sql += _PAID_BATCH.format(in_policies=_IN_POLICIES, monthly_chart=_MONTHLY_CHART)
+    params += [month_start]
+    if loan_cols:
+        sql += PolicyLoanDetailsService.totals_sql(loan_cols, _IN_POLICIES)
+        sql += PolicyLoanDetailsService.rows_sql(loan_cols, _IN_POLICIES)
+        params += [0, LOAN_PREVIEW_SIZE]
+    sql += f"\nDROP TABLE #dashboard_paid;\nDROP TABLE #{_POLICY_KEYS};"
+    return sql, params
+
+
+def get_policy_dashboard_data(policy_numbers):
+    """
+    Returns dashboard payload for policy-holder portal.
+    Reads only from CORE SQLServer, in a single batched round trip.
+    """
+    policies = [p for p in policy_numbers if p]
+    if not policies:
+        return _empty_dashboard()
+
+    data = _empty_dashboard()
+
+    month_starts = _chart_months(date.today())
+
+    with core_cursor("policy_dashboard") as cursor:
+        loan_cols, loan_detail = PolicyLoanDetailsService.resolve_columns(cursor)
+
+        sql, params = dashboard_batch(policies, loan_cols, month_starts[0])
+        cursor.execute(sql, params)
+
         row = cursor.fetchone()
         if row:
             data["kpi"]["policies"]["total"] = int(row[0] or 0)
             data["kpi"]["due"]["count"] = int(row[1] or 0)
             data["kpi"]["due"]["premium"] = float(row[2] or 0)
 
-        cursor.execute(
-            f"""
-            SELECT ISNULL(SUM(CAST(pp.Premium AS DECIMAL(18,2))), 0) AS total_paid_premium
-            FROM tblPremiumPaid pp WITH (NOLOCK)
-            WHERE pp.PolicyNo IN {in_clause}
-            """,
-            policies,
-        )
+        cursor.nextset()
         row = cursor.fetchone()
         if row:
             data["kpi"]["premium"]["total"] = float(row[0] or 0)
+        paid_installments = int((row[1] or 0) if row else 0)
 
-        cursor.execute(
-            f"""
-            SELECT COUNT(*)
-            FROM tblPremiumPaid pp WITH (NOLOCK)
-            WHERE pp.PolicyNo IN {in_clause}
-            """,
-            policies,
-        )
-        row = cursor.fetchone()
-        paid_installments = int((row[0] or 0) if row else 0)
-
-        today = date.today()
-        month_starts = []
-        for i in range(11, -1, -1):
-            y = today.year
-            m = today.month - i
-            while m <= 0:
-                y -= 1
-                m += 12
-            while m > 12:
-                y += 1
-                m -= 12
-            month_starts.append(date(y, m, 1))
-
-        chart_start = month_starts[0]
-
-        cursor.execute(
-            f"""
-            SELECT
-                YEAR(pp.PaidDate)            AS paid_year,
-                MONTH(pp.PaidDate)           AS paid_month,
-                ISNULL(SUM(CAST(pp.Premium AS DECIMAL(18,2))), 0) AS premium_amount
-            FROM tblPremiumPaid pp WITH (NOLOCK)
-            WHERE pp.PolicyNo IN {in_clause}
-              AND pp.PaidDate >= %s
-            GROUP BY YEAR(pp.PaidDate), MONTH(pp.PaidDate)
-            ORDER BY paid_year, paid_month
-            """,
-            policies + [chart_start],
-        )
+        cursor.nextset()
         month_value_map = {
             (int(r[0]), int(r[1])): float(r[2] or 0)
             for r in cursor.fetchall()
         }
 
-        for dt in month_starts:
-            data["chart"]["labels"].append(dt.strftime("%b %Y"))
-            data["chart"]["premium"].append(month_value_map.get((dt.year, dt.month), 0.0))
-
-        cursor.execute(
-            f"""
-            SELECT TOP 10
-                pp.PolicyNo,
-                CONVERT(VARCHAR(10), pp.PaidDate, 120) AS paid_date,
-                CAST(pp.Premium AS DECIMAL(18,2)) AS amount,
-                pd.PayMode
-            FROM tblPremiumPaid pp WITH (NOLOCK)
-            INNER JOIN tblPolicyDetail pd WITH (NOLOCK)
-                    ON pd.PolicyNo = pp.PolicyNo
-            WHERE pp.PolicyNo IN {in_clause}
-            ORDER BY pp.PaidDate DESC
-            """,
-            policies,
-        )
-        rows = cursor.fetchall()
-        for idx, row in enumerate(rows, start=1):
-            data["history"].append(
-                {
-                    "sn": idx,
-                    "policy_no": row[0],
-                    "paid_date": row[1],
-                    "amount": float(row[2] or 0),
-                    "mode": row[3] or "-",
-                }
+        cursor.nextset()
+        history = dict_rows(cursor, ("policy_no", "paid_date", "amount", "mode"), floats=("amount",))
+
+        if loan_cols:
+            cursor.nextset()
+            loan_totals = PolicyLoanDetailsService.read_totals(cursor)
+            cursor.nextset()
+            data["loan"] = PolicyLoanDetailsService.dashboard_loan_payload(
+                *loan_totals, rows=PolicyLoanDetailsService.read_rows(cursor)
             )
+        else:
+            data["loan"] = PolicyLoanDetailsService.dashboard_loan_payload(detail=loan_detail)
+
+    for dt in month_starts:
+        data["chart"]["labels"].append(dt.strftime("%b %Y"))
+        data["chart"]["premium"].append(month_value_map.get((dt.year, dt.month), 0.0))
+
+    for idx, row in enumerate(history, start=1):
+        row["mode"] = row["mode"] or "-"
+        data["history"].append({"sn": idx, **row})
 
     data["summary"]["policies"] = data["kpi"]["policies"]["total"]
     data["summary"]["premium"] = round(data["kpi"]["premium"]["total"], 2)
@@ -164,6 +187,5 @@ def get_policy_dashboard_data(policy_numbers):
 
     data["kpi"]["premium"]["total"] = round(data["kpi"]["premium"]["total"], 2)
     data["kpi"]["due"]["premium"] = round(data["kpi"]["due"]["premium"], 2)
-    data["loan"] = PolicyLoanDetailsService.get_dashboard_loan_data(policies)
 
     return data
@@ -105,11 +105,11 @@ def resolve_policy_identity(*, policy_no, dob_ad, mobile=None):
         return user, user.user_id
 
     # ------------------------------------------------------
-    # 2) LOOKUP POLICY IN CORE SYSTEM (FastAPI → MSSQL)
+    # 2) LOOKUP POLICY + RELATED POLICIES IN CORE (FastAPI → MSSQL)
     # ------------------------------------------------------
     try:
         response = requests.get(
-            f"{settings.KYC_API_BASE_URL}/mssql/newpolicies",
+            f"{settings.KYC_API_BASE_URL}/mssql/identity",
             params={
                 "policy_no": policy_no,
                 "dob": input_dob.isoformat(),
@@ -126,12 +126,13 @@ def resolve_policy_identity(*, policy_no, dob_ad, mobile=None):
     if response.status_code != 200:
         raise ValidationError("Error during policy verification.")
 
-    payload = response.json()
-    if not payload:
+    try:
+        payload = response.json()
+        data = payload["policy"]
+        related_policies = set(payload["related_policies"])
+    except (ValueError, KeyError, TypeError):
         raise ValidationError("Invalid response from core system.")
 
-    data = payload[0]
-
     core_first = data.get("FirstName")
     core_last = data.get("LastName")
     core_dob = _normalize_dob(data.get("DOB"))
@@ -148,25 +149,8 @@ def resolve_policy_identity(*, policy_no, dob_ad, mobile=None):
             raise ValidationError("Mobile number does not match our records.")
 
     # ------------------------------------------------------
-    # 4) FETCH RELATED POLICIES (CORE)
+    # 4) RELATED POLICIES (RESOLVED SERVER-SIDE ABOVE)
     # ------------------------------------------------------
-    try:
-        response = requests.get(
-            f"{settings.KYC_API_BASE_URL}/mssql/related-policies",
-            params={
-                "firstname": core_first,
-                "lastname": core_last,
-                "dob": core_dob.isoformat(),
-                "mobile": core_mobile,
-            },
-            headers=headers,
-            timeout=10,
-        )
-        response.raise_for_status()
-        related_policies = set(response.json())
-    except Exception:
-        raise ValidationError("Could not resolve related policies.")
-
     related_policies.add(policy_no)
 
     # ------------------------------------------------------
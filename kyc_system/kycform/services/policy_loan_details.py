@@ -1,12 +1,7 @@
 from datetime import date, datetime
 from decimal import Decimal
 
-from django.db import connections
-
-
-def _build_in_clause(values):
-    placeholders = ",".join(["%s"] * len(values))
-    return f"({placeholders})"
+from kycform.services.core_db import core_cursor, dict_rows, in_clause, is_available
 
 
 def _resolve_column(column_names, candidates):
@@ -37,6 +32,11 @@ def _serialize_value(value):
     return value
 
 
+# tblPolicyLoanDetail's layout differs between CORE deployments; it is
+# resolved from INFORMATION_SCHEMA once per process and reused.
+_loan_columns = None
+
+
 class PolicyLoanDetailsService:
     @staticmethod
     def _empty_payload():
@@ -61,13 +61,108 @@ class PolicyLoanDetailsService:
         )
         return [r[0] for r in cursor.fetchall()]
 
+    @staticmethod
+    def resolve_columns(cursor):
+        """
+        Returns (columns, detail): the resolved column map, or None and the
+        error detail when the loan table/policy column can't be found.
+        """
+        global _loan_columns
+        if _loan_columns is not None:
+            return _loan_columns, None
+
+        columns = PolicyLoanDetailsService._resolve_table_columns(cursor)
+        if not columns:
+            return None, "LOAN_TABLE_NOT_FOUND"
+
+        policy_col = _resolve_column(
+            columns, ["PolicyNo", "PolicyNO", "PolicyNumber", "Policy_No"]
+        )
+        if not policy_col:
+            return None, "LOAN_POLICY_COLUMN_NOT_FOUND"
+
+        _loan_columns = {
+            "policy": policy_col,
+            "amount": _resolve_column(
+                columns,
+                ["LoanAmount", "LoanAmt", "Amount", "PrincipalAmount", "PrincipleAmount"],
+            ),
+            "balance": _resolve_column(
+                columns,
+                ["BalanceAmount", "OutstandingAmount", "Outstanding", "Balance", "DueAmount", "LoanBalance"],
+            ),
+            "order": _resolve_column(
+                columns, ["LoanDate", "DOC", "CreatedDate", "EntryDate", "LoanID", "ID"]
+            ) or policy_col,
+            "loan_date": _resolve_column(
+                columns, ["LoanDate", "DOC", "CreatedDate", "EntryDate"]
+            ),
+            "interest": _resolve_column(
+                columns, ["InterestAmount", "InterestAmt", "IntAmount", "Interest"]
+            ),
+            "status": _resolve_column(
+                columns, ["LoanStatus", "Status", "CurrentStatus", "ApprovalStatus"]
+            ),
+        }
+        return _loan_columns, None
+
+    @staticmethod
+    def totals_sql(cols, policy_in):
+        """
+        Count, loan amount and balance amount in one pass
+        """
+        def _sum(column):
+            if not column:
+                return "0"
+            return f"ISNULL(SUM(CAST([{column}] AS DECIMAL(38,2))), 0)"
+
+        return f"""
+            SELECT
+                COUNT(*),
+                {_sum(cols["amount"])},
+                {_sum(cols["balance"])}
+            FROM tblPolicyLoanDetail WITH (NOLOCK)
+            WHERE [{cols["policy"]}] IN {policy_in};
+        """
+
+    @staticmethod
+    def rows_sql(cols, policy_in):
+        """
+        One page of loan rows; binds offset and page size after the policies
+        """
+        return f"""
+            SELECT
+                [{cols["policy"]}] AS policy_no,
+                {_build_optional_select(cols["loan_date"], "loan_date")},
+                {_build_optional_select(cols["amount"], "loan_amount")},
+                {_build_optional_select(cols["balance"], "balance_amount")},
+                {_build_optional_select(cols["interest"], "interest_amount")},
+                {_build_optional_select(cols["status"], "status")}
+            FROM tblPolicyLoanDetail WITH (NOLOCK)
+            WHERE [{cols["policy"]}] IN {policy_in}
+            ORDER BY [{cols["order"]}] DESC
+            OFFSET %s ROWS FETCH NEXT %s ROWS ONLY;
+        """
+
+    @staticmethod
+    def read_totals(cursor):
+        total_items, loan_amount, balance_amount = cursor.fetchone() or (0, 0, 0)
+        return int(total_items or 0), float(loan_amount or 0), float(balance_amount or 0)
+
+    @staticmethod
+    def read_rows(cursor):
+        return [
+            {key: _serialize_value(value) for key, value in row.items()}
+            for row in dict_rows(cursor)
+        ]
+
     @staticmethod
     def get_loan_details(policy_numbers, page=1, page_size=10):
         policies = [p for p in policy_numbers if p]
         if not policies:
             return PolicyLoanDetailsService._empty_payload()
 
-        if "sqlserver" not in connections.databases:
+        if not is_available():
             payload = PolicyLoanDetailsService._empty_payload()
             payload["detail"] = "CORE_DB_UNAVAILABLE"
             return payload
@@ -82,109 +177,29 @@ class PolicyLoanDetailsService:
             page_size = 100
 
         offset = (page - 1) * page_size
-        in_clause = _build_in_clause(policies)
+        policy_in, policy_params = in_clause(policies)
 
-        with connections["sqlserver"].cursor() as cursor:
-            columns = PolicyLoanDetailsService._resolve_table_columns(cursor)
-            if not columns:
+        with core_cursor("policy_loan_details") as cursor:
+            cols, detail = PolicyLoanDetailsService.resolve_columns(cursor)
+            if detail:
                 payload = PolicyLoanDetailsService._empty_payload()
-                payload["detail"] = "LOAN_TABLE_NOT_FOUND"
+                payload["detail"] = detail
                 return payload
 
-            policy_col = _resolve_column(
-                columns, ["PolicyNo", "PolicyNO", "PolicyNumber", "Policy_No"]
+            cursor.execute(PolicyLoanDetailsService.totals_sql(cols, policy_in), policy_params)
+            total_items, total_loan_amount, total_balance_amount = (
+                PolicyLoanDetailsService.read_totals(cursor)
             )
-            if not policy_col:
-                payload = PolicyLoanDetailsService._empty_payload()
-                payload["detail"] = "LOAN_POLICY_COLUMN_NOT_FOUND"
-                return payload
-
-            amount_col = _resolve_column(
-                columns,
-                ["LoanAmount", "LoanAmt", "Amount", "PrincipalAmount", "PrincipleAmount"],
-            )
-            balance_col = _resolve_column(
-                columns,
-                ["BalanceAmount", "OutstandingAmount", "Outstanding", "Balance", "DueAmount", "LoanBalance"],
-            )
-            order_col = _resolve_column(
-                columns, ["LoanDate", "DOC", "CreatedDate", "EntryDate", "LoanID", "ID"]
-            ) or policy_col
-            loan_date_col = _resolve_column(
-                columns, ["LoanDate", "DOC", "CreatedDate", "EntryDate"]
-            )
-            interest_col = _resolve_column(
-                columns, ["InterestAmount", "InterestAmt", "IntAmount", "Interest"]
-            )
-            status_col = _resolve_column(
-                columns, ["LoanStatus", "Status", "CurrentStatus", "ApprovalStatus"]
-            )
-
-            cursor.execute(
-                f"""
-                SELECT COUNT(*)
-                FROM tblPolicyLoanDetail WITH (NOLOCK)
-                WHERE [{policy_col}] IN {in_clause}
-                """,
-                policies,
-            )
-            total_items = int((cursor.fetchone() or [0])[0] or 0)
             total_pages = (total_items + page_size - 1) // page_size if total_items else 0
             if total_pages and page > total_pages:
                 page = total_pages
                 offset = (page - 1) * page_size
 
-            total_loan_amount = 0.0
-            if amount_col:
-                cursor.execute(
-                    f"""
-                    SELECT ISNULL(SUM(CAST([{amount_col}] AS DECIMAL(38,2))), 0)
-                    FROM tblPolicyLoanDetail WITH (NOLOCK)
-                    WHERE [{policy_col}] IN {in_clause}
-                    """,
-                    policies,
-                )
-                total_loan_amount = float((cursor.fetchone() or [0])[0] or 0)
-
-            total_balance_amount = 0.0
-            if balance_col:
-                cursor.execute(
-                    f"""
-                    SELECT ISNULL(SUM(CAST([{balance_col}] AS DECIMAL(38,2))), 0)
-                    FROM tblPolicyLoanDetail WITH (NOLOCK)
-                    WHERE [{policy_col}] IN {in_clause}
-                    """,
-                    policies,
-                )
-                total_balance_amount = float((cursor.fetchone() or [0])[0] or 0)
-
             cursor.execute(
-                f"""
-                SELECT
-                    [{policy_col}] AS policy_no,
-                    {_build_optional_select(loan_date_col, "loan_date")},
-                    {_build_optional_select(amount_col, "loan_amount")},
-                    {_build_optional_select(balance_col, "balance_amount")},
-                    {_build_optional_select(interest_col, "interest_amount")},
-                    {_build_optional_select(status_col, "status")}
-                FROM tblPolicyLoanDetail WITH (NOLOCK)
-                WHERE [{policy_col}] IN {in_clause}
-                ORDER BY [{order_col}] DESC
-                OFFSET %s ROWS FETCH NEXT %s ROWS ONLY
-                """,
-                policies + [offset, page_size],
-            )
-            rows = cursor.fetchall()
-            row_columns = [col[0] for col in cursor.description]
-
-        data_rows = []
-        for row in rows:
-            data_rows.append(
-                {
-                    key: _serialize_value(value)
-                    for key, value in zip(row_columns, row)
-                }
+                PolicyLoanDetailsService.rows_sql(cols, policy_in),
+                policy_params + [offset, page_size],
             )
+            data_rows = PolicyLoanDetailsService.read_rows(cursor)
 
         return {
             "rows": data_rows,
@@ -203,15 +218,25 @@ class PolicyLoanDetailsService:
             },
         }
 
+    @staticmethod
+    def dashboard_loan_payload(total_items=0, loan_amount=0.0, balance_amount=0.0, rows=None, detail=None):
+        return {
+            "count": int(total_items or 0),
+            "loan_amount": round(float(loan_amount or 0), 2),
+            "balance_amount": round(float(balance_amount or 0), 2),
+            "rows": rows or [],
+            "detail": detail,
+        }
+
     @staticmethod
     def get_dashboard_loan_data(policy_numbers, preview_size=5):
         result = PolicyLoanDetailsService.get_loan_details(
             policy_numbers, page=1, page_size=preview_size
         )
-        return {
-            "count": int(result.get("total_items", 0) or 0),
-            "loan_amount": float(result.get("total", {}).get("loan_amount", 0) or 0),
-            "balance_amount": float(result.get("total", {}).get("balance_amount", 0) or 0),
-            "rows": result.get("rows", []),
-            "detail": result.get("detail"),
-        }
+        return PolicyLoanDetailsService.dashboard_loan_payload(
+            result.get("total_items", 0),
+            result.get("total", {}).get("loan_amount", 0),
+            result.get("total", {}).get("balance_amount", 0),
+            result.get("rows", []),
+            result.get("detail"),
+        )
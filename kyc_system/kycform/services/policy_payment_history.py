@@ -1,9 +1,77 @@
-from django.db import connections
+from kycform.services.core_db import core_cursor, scalar
+from kycform.services.keyset import Keyset, seek_pagination
+
+
+_ROW_KEYS = (
+    "policy_no",
+    "premium_paid_date",
+    "paid_amount",
+    "premium",
+    "installment_type",
+    "plan_name",
+    "term",
+    "fup",
+    "client_id",
+    "client_name",
+    "policy_premium_frequency",
+)
+
+_FLOATS = ("paid_amount", "premium")
+
+# A policy can be paid several times on one date; the payment row's own
+# unique key is the last tie-breaker
+PAYMENT_KEYSET = Keyset(
+    ("tpp.PaidDate", True, True),
+    ("tpp.PolicyNo", True),
+    row_key=("tblPremiumPaid", "tpp"),
+)
+
+_FROM_SQL = """
+    FROM tblPremiumPaid tpp WITH (NOLOCK)
+    INNER JOIN tblPolicyDetail tpd WITH (NOLOCK)
+            ON tpd.PolicyNo = tpp.PolicyNo
+    INNER JOIN tblInsuredDetail tid WITH (NOLOCK)
+            ON tid.RegisterNo = tpd.RegisterNo
+"""
+
+
+def _rows_sql(keyset, policy_filter_sql, top_sql="", seek_sql="", backward=False, pagination_sql=""):
+    return f"""
+        SELECT {top_sql}
+            tpp.PolicyNo,
+            CONVERT(VARCHAR(10), tpp.PaidDate, 103) AS PremiumPaidDate,
+            tpp.PaidAmount,
+            tpp.Premium,
+            tpp.InstalmenType,
+            p.PlanName,
+            tpd.Term,
+            CONVERT(VARCHAR(10), tpd.FUP, 103) AS FUP,
+            tid.ClientNo,
+            tid.FirstName
+                + ISNULL(' ' + tid.MiddleName, '')
+                + ISNULL(' ' + tid.LastName, '') AS ClientName,
+            tpd.PayMode AS PolicyPremiumFrequency,
+            {keyset.columns()}
+        {_FROM_SQL}
+        INNER JOIN tblPlan p WITH (NOLOCK)
+                ON p.PlanID = tpd.PlanID
+        WHERE tid.ClientNo = %s
+        {policy_filter_sql}
+        {seek_sql}
+        ORDER BY {keyset.order_by(backward)}
+        {pagination_sql}
+    """
 
 
 class PolicyPaymentHistoryService:
     @staticmethod
-    def get_payment_history(client_id, policy_no="", page=1, page_size=10, paginated=False):
+    def get_payment_history(client_id, policy_no="", page=1, page_size=10, paginated=False, cursor=None):
+        """
+        `cursor` (a decoded SeekCursor) returns the page after/before it by
+        seeking on (PaidDate, PolicyNo, payment key) instead of OFFSET;
+        totals and row counts are skipped in that mode. Raises InvalidCursor
+        if tblPremiumPaid has no unique key to seek on.
+        """
         page = int(page or 1)
         page_size = int(page_size or 10)
         if page < 1:
@@ -19,22 +87,24 @@ class PolicyPaymentHistoryService:
             policy_filter_sql = "AND tpp.PolicyNo LIKE %s"
             params.append(f"%{policy_no}%")
 
-        with connections["sqlserver"].cursor() as cursor:
+        if cursor is not None:
+            return PolicyPaymentHistoryService._seek_page(
+                params, policy_filter_sql, page_size, cursor
+            )
+
+        with core_cursor("policy_payment_history") as db_cursor:
+            keyset = PAYMENT_KEYSET.bind(db_cursor)
             if paginated:
-                cursor.execute(
+                db_cursor.execute(
                     f"""
                     SELECT COUNT(*)
-                    FROM tblPremiumPaid tpp WITH (NOLOCK)
-                    INNER JOIN tblPolicyDetail tpd WITH (NOLOCK)
-                            ON tpd.PolicyNo = tpp.PolicyNo
-                    INNER JOIN tblInsuredDetail tid WITH (NOLOCK)
-                            ON tid.RegisterNo = tpd.RegisterNo
+                    {_FROM_SQL}
                     WHERE tid.ClientNo = %s
                     {policy_filter_sql}
                     """,
                     params,
                 )
-                total_rows = int((cursor.fetchone() or [0])[0] or 0)
+                total_rows = int(scalar(db_cursor))
                 total_pages = (total_rows + page_size - 1) // page_size if total_rows else 0
                 if total_pages and page > total_pages:
                     page = total_pages
@@ -44,84 +114,39 @@ class PolicyPaymentHistoryService:
             else:
                 total_rows = 0
                 total_pages = 0
+                offset = 0
                 pagination_sql = ""
                 query_params = params
 
-            cursor.execute(
+            db_cursor.execute(
                 f"""
                 SELECT
                     ISNULL(SUM(tpp.PaidAmount), 0) AS TotalPaidAmount,
                     ISNULL(SUM(tpp.Premium), 0) AS TotalPremium
-                FROM tblPremiumPaid tpp WITH (NOLOCK)
-                INNER JOIN tblPolicyDetail tpd WITH (NOLOCK)
-                        ON tpd.PolicyNo = tpp.PolicyNo
-                INNER JOIN tblInsuredDetail tid WITH (NOLOCK)
-                        ON tid.RegisterNo = tpd.RegisterNo
+                {_FROM_SQL}
                 WHERE tid.ClientNo = %s
                 {policy_filter_sql}
                 """,
                 params,
             )
-            total_row = cursor.fetchone() or (0, 0)
+            total_row = db_cursor.fetchone() or (0, 0)
 
-            cursor.execute(
-                f"""
-                SELECT
-                    tpp.PolicyNo,
-                    CONVERT(VARCHAR(10), tpp.PaidDate, 103) AS PremiumPaidDate,
-                    tpp.PaidAmount,
-                    tpp.Premium,
-                    tpp.InstalmenType,
-                    p.PlanName,
-                    tpd.Term,
-                    CONVERT(VARCHAR(10), tpd.FUP, 103) AS FUP,
-                    tid.ClientNo,
-                    tid.FirstName
-                        + ISNULL(' ' + tid.MiddleName, '')
-                        + ISNULL(' ' + tid.LastName, '') AS ClientName,
-                    tpd.PayMode AS PolicyPremiumFrequency
-                FROM tblPremiumPaid tpp WITH (NOLOCK)
-                INNER JOIN tblPolicyDetail tpd WITH (NOLOCK)
-                        ON tpd.PolicyNo = tpp.PolicyNo
-                INNER JOIN tblInsuredDetail tid WITH (NOLOCK)
-                        ON tid.RegisterNo = tpd.RegisterNo
-                INNER JOIN tblPlan p WITH (NOLOCK)
-                        ON p.PlanID = tpd.PlanID
-                WHERE tid.ClientNo = %s
-                {policy_filter_sql}
-                ORDER BY tpp.PaidDate DESC
-                {pagination_sql}
-                """,
+            db_cursor.execute(
+                _rows_sql(keyset, policy_filter_sql, pagination_sql=pagination_sql),
                 query_params,
             )
-            rows = cursor.fetchall()
-
-        data = []
-
-        for row in rows:
-            paid_amount = float(row[2] or 0)
-            premium = float(row[3] or 0)
-
-            data.append(
-                {
-                    "policy_no": row[0],
-                    "premium_paid_date": row[1],
-                    "paid_amount": paid_amount,
-                    "premium": premium,
-                    "installment_type": row[4],
-                    "plan_name": row[5],
-                    "term": row[6],
-                    "fup": row[7],
-                    "client_id": row[8],
-                    "client_name": row[9],
-                    "policy_premium_frequency": row[10],
-                }
-            )
+            data, sort_keys = keyset.rows(db_cursor.fetchall(), _ROW_KEYS, _FLOATS)
 
         if not paginated:
             total_rows = len(data)
             total_pages = 1 if total_rows else 0
 
+        has_next = bool(total_pages and page < total_pages)
+        has_prev = bool(total_pages and page > 1)
+        cursors = {"next_cursor": None, "prev_cursor": None}
+        if paginated:
+            cursors = keyset.cursors(sort_keys, offset + 1, has_next, has_prev)
+
         return {
             "rows": data,
             "total": {
@@ -133,7 +158,33 @@ class PolicyPaymentHistoryService:
                 "page_size": page_size,
                 "total_rows": total_rows,
                 "total_pages": total_pages,
-                "has_next": bool(total_pages and page < total_pages),
-                "has_prev": bool(total_pages and page > 1),
+                "has_next": has_next,
+                "has_prev": has_prev,
+                **cursors,
             },
         }
+
+    @staticmethod
+    def _seek_page(params, policy_filter_sql, page_size, cursor):
+        with core_cursor("policy_payment_history") as db_cursor:
+            keyset = PAYMENT_KEYSET.bind(db_cursor)
+            seek_sql, seek_params = keyset.seek(cursor)
+            db_cursor.execute(
+                _rows_sql(keyset, policy_filter_sql, "TOP (%s)", seek_sql, cursor.backward),
+                [page_size + 1, *params, *seek_params],
+            )
+            raw = db_cursor.fetchall()
+
+        raw, first_sn, has_next, has_prev = keyset.window(raw, page_size, cursor)
+        data, sort_keys = keyset.rows(raw, _ROW_KEYS, _FLOATS)
+
+        return {
+            "rows": data,
+            "total": None,
+            "pagination": seek_pagination(
+                page_size,
+                has_next,
+                has_prev,
+                keyset.cursors(sort_keys, first_sn, has_next, has_prev),
+            ),
+        }
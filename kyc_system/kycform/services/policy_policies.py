@@ -1,4 +1,4 @@
-from django.db import connections
+from kycform.services.core_db import core_cursor
 from kycform.services.policy_status import format_policy_status
 
 
@@ -20,7 +20,7 @@ class PolicyPoliciesService:
             policy_filter_sql = "AND tpd.PolicyNo LIKE %s"
             params.append(f"%{policy_no}%")
 
-        with connections["sqlserver"].cursor() as cursor:
+        with core_cursor("policy_policies") as cursor:
             if paginated:
                 cursor.execute(
                     f"""
@@ -1,7 +1,7 @@
-from django.db import connections
 from rest_framework.exceptions import AuthenticationFailed
 
 from kycform.models import KycPolicy, KycUserInfo
+from .core_db import core_cursor, dict_row
 from .policy_client import PolicyClientService
 
 
@@ -39,7 +39,7 @@ class PolicyProfileService:
             client_id = None
 
         if client_id:
-            with connections["sqlserver"].cursor() as cursor:
+            with core_cursor("policy_profile.bank") as cursor:
                 cursor.execute(
                     """
                     SELECT TOP 1
@@ -50,11 +50,11 @@ class PolicyProfileService:
                     """,
                     [client_id],
                 )
-                bank_row = cursor.fetchone()
+                bank_row = dict_row(cursor, ("account", "name"))
 
             if bank_row:
-                bank_account = bank_row[0] or "-"
-                bank_name = bank_row[1] or "-"
+                bank_account = bank_row["account"] or "-"
+                bank_name = bank_row["name"] or "-"
 
         full_name = " ".join(
             part
@@ -1,4 +1,4 @@
-from django.db import connections
+from kycform.services.core_db import core_cursor, is_available
 
 from kycform.models import Group
 from kycform.services.policy_status import format_policy_status
@@ -7,7 +7,7 @@ from kycform.services.policy_status import format_policy_status
 class PolicyRastraSewakService:
     @staticmethod
     def get_details(policy_no, dob, page=1, page_size=10):
-        if "sqlserver" not in connections.databases:
+        if not is_available():
             return {
                 "rows": [],
                 "total": 0,
@@ -91,7 +91,7 @@ class PolicyRastraSewakService:
             FETCH NEXT %s ROWS ONLY
         """
 
-        with connections["sqlserver"].cursor() as cursor:
+        with core_cursor("policy_rastra_sewak") as cursor:
             cursor.execute(count_query, filter_params)
             total = int((cursor.fetchone() or [0])[0] or 0)
 
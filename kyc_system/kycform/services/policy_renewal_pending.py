@@ -1,9 +1,116 @@
-from django.db import connections
+from kycform.services.core_db import core_cursor, scalar
+from kycform.services.keyset import Keyset, seek_pagination
+
+RENEWAL_KEYSET = Keyset(
+    ("pd.FUP", False, True),
+    ("pd.PolicyNo", False),
+)
+
+
+def _rows_sql(policy_filter_sql, top_sql="", seek_sql="", backward=False, pagination_sql=""):
+    return f"""
+        SELECT {top_sql}
+            pd.PolicyNo,
+            i.ClientNo,
+            pd.AgentCode,
+            CONVERT(VARCHAR(10), pd.FUP, 103) AS RenewalDeadlineDate,
+            p.PlanName AS ProductName,
+            CAST(pd.Premium AS DECIMAL(38, 0)) AS PremiumAmount,
+            p.PlanName AS PlanName,
+            p.PlanId,
+            CONVERT(VARCHAR(10), pd.DOC, 103) AS PolicyCreatedDate,
+            pd.Term,
+            pd.PayMode AS PolicyPremiumFrequency,
+            CAST(pd.LateFineAmount AS DECIMAL(38, 0)) AS LateFee,
+            i.Mobile,
+            i.FirstName
+                + ISNULL(' ' + i.MiddleName + ' ', ' ')
+                + i.LastName AS PolicyHolderName,
+            DATEDIFF(day, pd.FUP, GETDATE()) AS DaysElapsedSinceLastDueDate,
+            pd.CurrentStatus AS Status,
+            CASE
+                WHEN pd.PayMode = 'Y' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 365.25)
+                WHEN pd.PayMode = 'H' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 180.0)
+                WHEN pd.PayMode = 'Q' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 90.0)
+                WHEN pd.PayMode = 'M' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 30.0)
+                ELSE CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 365.25)
+            END AS LapsedInstallments,
+            CASE
+                WHEN pd.PayMode = 'Y' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 365.25) * pd.Premium
+                WHEN pd.PayMode = 'H' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 180.0) * pd.Premium
+                WHEN pd.PayMode = 'Q' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 90.0) * pd.Premium
+                WHEN pd.PayMode = 'M' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 30.0) * pd.Premium
+                ELSE CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 365.25) * pd.Premium
+            END AS LapsedPremium,
+            CASE
+                WHEN pd.PayMode = 'Y' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 365.25) * pd.Premium + CAST(pd.LateFineAmount AS DECIMAL(38, 0))
+                WHEN pd.PayMode = 'H' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 180.0) * pd.Premium + CAST(pd.LateFineAmount AS DECIMAL(38, 0))
+                WHEN pd.PayMode = 'Q' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 90.0) * pd.Premium + CAST(pd.LateFineAmount AS DECIMAL(38, 0))
+                WHEN pd.PayMode = 'M' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 30.0) * pd.Premium + CAST(pd.LateFineAmount AS DECIMAL(38, 0))
+                ELSE CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 365.25) * pd.Premium + CAST(pd.LateFineAmount AS DECIMAL(38, 0))
+            END AS TotalAmount,
+            {RENEWAL_KEYSET.columns()}
+        FROM tblPolicyDetail pd WITH (NOLOCK)
+        INNER JOIN tblPlan p
+                ON p.PlanID = pd.PlanID
+        INNER JOIN tblInsuredDetail i
+                ON i.RegisterNo = pd.RegisterNo
+        WHERE i.ClientNo = %s
+        {policy_filter_sql}
+        {seek_sql}
+        ORDER BY {RENEWAL_KEYSET.order_by(backward)}
+        {pagination_sql}
+    """
+
+
+def _map_rows(raw):
+    data = []
+    sort_keys = []
+
+    for raw_row in raw:
+        row, keys = RENEWAL_KEYSET.split(raw_row)
+        sort_keys.append(keys)
+
+        premium_amount = float(row[5] or 0)
+        late_fee = float(row[11] or 0)
+        lapsed_premium = float(row[17] or 0)
+        row_total_amount = float(row[18] or 0)
+
+        data.append(
+            {
+                "policy_no": row[0],
+                "client_id": row[1],
+                "agent_code": row[2],
+                "renewal_deadline_date": row[3],
+                "product_name": row[4],
+                "premium_amount": premium_amount,
+                "plan_name": row[6],
+                "plan_id": row[7],
+                "policy_created_date": row[8],
+                "term": row[9],
+                "policy_premium_frequency": row[10],
+                "late_fee": late_fee,
+                "mobile": row[12],
+                "policy_holder_name": row[13],
+                "days_elapsed_since_last_due_date": int(row[14] or 0),
+                "status": row[15],
+                "lapsed_installments": int(row[16] or 0),
+                "lapsed_premium": lapsed_premium,
+                "total_amount": row_total_amount,
+            }
+        )
+
+    return data, sort_keys
 
 
 class PolicyRenewalPendingService:
     @staticmethod
-    def get_renewal_pending(client_id, policy_no="", page=1, page_size=10, paginated=False):
+    def get_renewal_pending(client_id, policy_no="", page=1, page_size=10, paginated=False, cursor=None):
+        """
+        `cursor` (a decoded SeekCursor) returns the page after/before it by
+        seeking on (FUP, PolicyNo) instead of OFFSET; totals and row counts
+        are skipped in that mode.
+        """
         page = int(page or 1)
         page_size = int(page_size or 10)
         if page < 1:
@@ -19,9 +126,14 @@ class PolicyRenewalPendingService:
             policy_filter_sql = "AND pd.PolicyNo LIKE %s"
             params.append(f"%{policy_no}%")
 
-        with connections["sqlserver"].cursor() as cursor:
+        if cursor is not None:
+            return PolicyRenewalPendingService._seek_page(
+                params, policy_filter_sql, page_size, cursor
+            )
+
+        with core_cursor("policy_renewal_pending") as db_cursor:
             if paginated:
-                cursor.execute(
+                db_cursor.execute(
                     f"""
                     SELECT COUNT(*)
                     FROM tblPolicyDetail pd WITH (NOLOCK)
@@ -32,7 +144,7 @@ class PolicyRenewalPendingService:
                     """,
                     params,
                 )
-                total_rows = int((cursor.fetchone() or [0])[0] or 0)
+                total_rows = int(scalar(db_cursor))
                 total_pages = (total_rows + page_size - 1) // page_size if total_rows else 0
                 if total_pages and page > total_pages:
                     page = total_pages
@@ -42,10 +154,11 @@ class PolicyRenewalPendingService:
             else:
                 total_rows = 0
                 total_pages = 0
+                offset = 0
                 pagination_sql = ""
                 query_params = params
 
-            cursor.execute(
+            db_cursor.execute(
                 f"""
                 SELECT
                     ISNULL(SUM(CAST(pd.Premium AS DECIMAL(38, 0))), 0) AS TotalPremiumAmount,
@@ -76,100 +189,24 @@ class PolicyRenewalPendingService:
                 """,
                 params,
             )
-            totals_row = cursor.fetchone() or (0, 0, 0, 0)
+            totals_row = db_cursor.fetchone() or (0, 0, 0, 0)
 
-            cursor.execute(
-                f"""
-                SELECT
-                    pd.PolicyNo,
-                    i.ClientNo,
-                    pd.AgentCode,
-                    CONVERT(VARCHAR(10), pd.FUP, 103) AS RenewalDeadlineDate,
-                    p.PlanName AS ProductName,
-                    CAST(pd.Premium AS DECIMAL(38, 0)) AS PremiumAmount,
-                    p.PlanName AS PlanName,
-                    p.PlanId,
-                    CONVERT(VARCHAR(10), pd.DOC, 103) AS PolicyCreatedDate,
-                    pd.Term,
-                    pd.PayMode AS PolicyPremiumFrequency,
-                    CAST(pd.LateFineAmount AS DECIMAL(38, 0)) AS LateFee,
-                    i.Mobile,
-                    i.FirstName
-                        + ISNULL(' ' + i.MiddleName + ' ', ' ')
-                        + i.LastName AS PolicyHolderName,
-                    DATEDIFF(day, pd.FUP, GETDATE()) AS DaysElapsedSinceLastDueDate,
-                    pd.CurrentStatus AS Status,
-                    CASE
-                        WHEN pd.PayMode = 'Y' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 365.25)
-                        WHEN pd.PayMode = 'H' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 180.0)
-                        WHEN pd.PayMode = 'Q' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 90.0)
-                        WHEN pd.PayMode = 'M' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 30.0)
-                        ELSE CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 365.25)
-                    END AS LapsedInstallments,
-                    CASE
-                        WHEN pd.PayMode = 'Y' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 365.25) * pd.Premium
-                        WHEN pd.PayMode = 'H' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 180.0) * pd.Premium
-                        WHEN pd.PayMode = 'Q' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 90.0) * pd.Premium
-                        WHEN pd.PayMode = 'M' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 30.0) * pd.Premium
-                        ELSE CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 365.25) * pd.Premium
-                    END AS LapsedPremium,
-                    CASE
-                        WHEN pd.PayMode = 'Y' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 365.25) * pd.Premium + CAST(pd.LateFineAmount AS DECIMAL(38, 0))
-                        WHEN pd.PayMode = 'H' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 180.0) * pd.Premium + CAST(pd.LateFineAmount AS DECIMAL(38, 0))
-                        WHEN pd.PayMode = 'Q' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 90.0) * pd.Premium + CAST(pd.LateFineAmount AS DECIMAL(38, 0))
-                        WHEN pd.PayMode = 'M' THEN CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 30.0) * pd.Premium + CAST(pd.LateFineAmount AS DECIMAL(38, 0))
-                        ELSE CEILING(DATEDIFF(day, pd.FUP, GETDATE()) / 365.25) * pd.Premium + CAST(pd.LateFineAmount AS DECIMAL(38, 0))
-                    END AS TotalAmount
-                FROM tblPolicyDetail pd WITH (NOLOCK)
-                INNER JOIN tblPlan p
-                        ON p.PlanID = pd.PlanID
-                INNER JOIN tblInsuredDetail i
-                        ON i.RegisterNo = pd.RegisterNo
-                WHERE i.ClientNo = %s
-                {policy_filter_sql}
-                ORDER BY pd.FUP ASC
-                {pagination_sql}
-                """,
+            db_cursor.execute(
+                _rows_sql(policy_filter_sql, pagination_sql=pagination_sql),
                 query_params,
             )
-            rows = cursor.fetchall()
-
-        data = []
-
-        for row in rows:
-            premium_amount = float(row[5] or 0)
-            late_fee = float(row[11] or 0)
-            lapsed_premium = float(row[17] or 0)
-            row_total_amount = float(row[18] or 0)
-
-            data.append(
-                {
-                    "policy_no": row[0],
-                    "client_id": row[1],
-                    "agent_code": row[2],
-                    "renewal_deadline_date": row[3],
-                    "product_name": row[4],
-                    "premium_amount": premium_amount,
-                    "plan_name": row[6],
-                    "plan_id": row[7],
-                    "policy_created_date": row[8],
-                    "term": row[9],
-                    "policy_premium_frequency": row[10],
-                    "late_fee": late_fee,
-                    "mobile": row[12],
-                    "policy_holder_name": row[13],
-                    "days_elapsed_since_last_due_date": int(row[14] or 0),
-                    "status": row[15],
-                    "lapsed_installments": int(row[16] or 0),
-                    "lapsed_premium": lapsed_premium,
-                    "total_amount": row_total_amount,
-                }
-            )
+            data, sort_keys = _map_rows(db_cursor.fetchall())
 
         if not paginated:
             total_rows = len(data)
             total_pages = 1 if total_rows else 0
 
+        has_next = bool(total_pages and page < total_pages)
+        has_prev = bool(total_pages and page > 1)
+        cursors = {"next_cursor": None, "prev_cursor": None}
+        if paginated:
+            cursors = RENEWAL_KEYSET.cursors(sort_keys, offset + 1, has_next, has_prev)
+
         return {
             "rows": data,
             "total": {
@@ -183,7 +220,33 @@ class PolicyRenewalPendingService:
                 "page_size": page_size,
                 "total_rows": total_rows,
                 "total_pages": total_pages,
-                "has_next": bool(total_pages and page < total_pages),
-                "has_prev": bool(total_pages and page > 1),
+                "has_next": has_next,
+                "has_prev": has_prev,
+                **cursors,
             },
         }
+
+    @staticmethod
+    def _seek_page(params, policy_filter_sql, page_size, cursor):
+        seek_sql, seek_params = RENEWAL_KEYSET.seek(cursor)
+
+        with core_cursor("policy_renewal_pending") as db_cursor:
+            db_cursor.execute(
+                _rows_sql(policy_filter_sql, "TOP (%s)", seek_sql, cursor.backward),
+                [page_size + 1, *params, *seek_params],
+            )
+            raw = db_cursor.fetchall()
+
+        raw, first_sn, has_next, has_prev = RENEWAL_KEYSET.window(raw, page_size, cursor)
+        data, sort_keys = _map_rows(raw)
+
+        return {
+            "rows": data,
+            "total": None,
+            "pagination": seek_pagination(
+                page_size,
+                has_next,
+                has_prev,
+                RENEWAL_KEYSET.cursors(sort_keys, first_sn, has_next, has_prev),
+            ),
+        }
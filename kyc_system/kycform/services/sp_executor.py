@@ -1,10 +1,10 @@
-from django.db import connections
+from kycform.services.core_db import columns, core_cursor, dict_rows
 
 class StoredProcedureExecutor:
 
     @staticmethod
     def execute(proc_name: str, params: dict):
-        with connections['sqlserver'].cursor() as cursor:
+        with core_cursor(proc_name) as cursor:
             placeholders = ', '.join([f'@{k}=%s' for k in params])
             sql = f'EXEC {proc_name} {placeholders}'
 
@@ -15,7 +15,7 @@ class StoredProcedureExecutor:
                 if not cursor.nextset():
                     return [], []
 
-            columns = [col[0] for col in cursor.description]
-            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            names = columns(cursor)
+            rows = dict_rows(cursor, names)
 
-        return columns, rows
+        return names, rows
@@ -1,8 +1,10 @@
 from datetime import date, timedelta
 import json
+from unittest import mock
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.test import override_settings
+from django.urls import reverse
 from django.utils import timezone
 from django.db import connection
 from django.db import IntegrityError
@@ -15,8 +17,16 @@ from kycform.models import (
     KycChangeLog,
     KycMobileOTP,
     KycSmsNotification,
+    AgentBusinessAggregate,
+    AgentBusinessRefresh,
+    AgentHierarchyClosure,
 )
 from kycform.services.kyc_sms import VERIFIED_SMS_MESSAGE, send_kyc_verified_sms
+from kycform.services.agent_business import aggregate_batch, get_agent_summary, get_downline_business
+from kycform.services.agent_hierarchy import ReadModelNotReady
+from kycform.services.core_db import key_table
+from kycform.services.keyset import Keyset, decode_cursor
+from kycform.services.policy_dashboard import dashboard_batch
 
 # ================================================================
 # MIXIN FOR UNMANAGED kyc_policy TABLE
@@ -284,6 +294,20 @@ class KycSmsNotificationTest(TestCase):
         self.assertEqual(saved.message, VERIFIED_SMS_MESSAGE)
         self.assertEqual(saved.delivery_status, "SKIPPED")
 
+    @override_settings(API_SERVICE_BASE_URL="http://api.test", API_SERVICE_TOKEN="backend-token")
+    def test_verified_sms_is_sent_with_backend_token(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {"success": True, "message_id": 42}
+
+        with mock.patch("kycform.services.kyc_sms.requests.post", return_value=response) as post:
+            notification = send_kyc_verified_sms(self.user, source="TEST")
+
+        self.assertEqual(post.call_args.args[0], "http://api.test/otp/send")
+        self.assertEqual(post.call_args.kwargs["headers"], {"Authorization": "Bearer backend-token"})
+        self.assertEqual(notification.delivery_status, "SENT")
+        notification.refresh_from_db()
+        self.assertEqual(notification.provider_reference, "42")
+
 
 # ================================================================
 # MOBILE OTP → SUBMISSION FLOW TEST
@@ -535,3 +559,185 @@ class IdentityRiskDetectionTests(UnmanagedPolicyTableMixin,TestCase):
             "CTZ123",
             "Risk not detectable: identity changed silently"
         )
+
+
+# ================================================================
+# AGENT BUSINESS READ MODEL
+# ================================================================
+
+class AgentSummaryTest(TestCase):
+
+    def setUp(self):
+        AgentBusinessAggregate.objects.create(
+            agent_code="A1", policy_count=2, policy_rows=5, premium=500, commission=50,
+        )
+        AgentBusinessAggregate.objects.create(
+            agent_code="A2", policy_count=1, policy_rows=3, premium=300, commission=30,
+        )
+        AgentHierarchyClosure.objects.create(ancestor="A1", descendant="A2", depth=1)
+        for name in ("agent_business", "agent_hierarchy"):
+            AgentBusinessRefresh.objects.create(name=name, refreshed_at=timezone.now())
+
+    def test_policies_and_premium_count_the_same_rows(self):
+        data = get_agent_summary("A1")
+
+        self.assertEqual(data["kpi"]["policies"], {"total": 8, "self": 5, "downline": 3})
+        self.assertEqual(data["kpi"]["premium"], {"total": 800, "self": 500, "downline": 300})
+        self.assertEqual(data["summary"]["commission"], 80)
+        self.assertIn("policies", data["basis"])
+        self.assertFalse(data["stale"])
+
+    def test_never_refreshed_is_not_ready(self):
+        AgentBusinessRefresh.objects.filter(name="agent_business").delete()
+
+        with self.assertRaises(ReadModelNotReady):
+            get_agent_summary("A1")
+        with self.assertRaises(ReadModelNotReady):
+            get_downline_business("A1")
+
+    @override_settings(AGENT_READ_MODEL_MAX_AGE_HOURS=1)
+    def test_overdue_refresh_is_stale(self):
+        AgentBusinessRefresh.objects.filter(name="agent_hierarchy").update(
+            refreshed_at=timezone.now() - timedelta(hours=2)
+        )
+
+        data = get_downline_business("A1")
+        self.assertTrue(data["stale"])
+        self.assertEqual([row["policy"] for row in data["rows"]], [1])
+
+
+class AgentHierarchyApiTest(TestCase):
+
+    def setUp(self):
+        session = self.client.session
+        session["agent_code"] = "A1"
+        session.save()
+
+    def test_not_ready_until_first_refresh(self):
+        response = self.client.get(reverse("kyc:agent_hierarchy_api"))
+        self.assertEqual(response.status_code, 503)
+
+        AgentBusinessRefresh.objects.create(name="agent_hierarchy", refreshed_at=timezone.now())
+        response = self.client.get(reverse("kyc:agent_hierarchy_api"))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()["stale"])
+
+
+# ================================================================
+# CORE BATCH SQL (no database needed)
+# ================================================================
+
+LOAN_COLS = {
+    "policy": "PolicyNo",
+    "amount": "LoanAmount",
+    "balance": "BalanceAmount",
+    "order": "LoanDate",
+    "loan_date": "LoanDate",
+    "interest": None,
+    "status": None,
+}
+
+
+def _first_dml(sql):
+    upper = sql.upper()
+    return min(
+        i for i in (upper.find("INSERT"), upper.find(" INTO #"), upper.find("CREATE TABLE"))
+        if i >= 0
+    )
+
+
+class CoreBatchSqlTest(SimpleTestCase):
+
+    def test_key_table_turns_nocount_on_first(self):
+        sql, params = key_table("keys", ["P1", "P2"])
+        self.assertTrue(sql.strip().startswith("SET NOCOUNT ON;"))
+        self.assertEqual(len(params), 8)
+
+    def test_dashboard_batch_nocount_before_first_dml(self):
+        for loan_cols in (None, LOAN_COLS):
+            sql, params = dashboard_batch(["P1", "P2", "P3"], loan_cols, date(2026, 1, 1))
+            self.assertLess(sql.upper().index("SET NOCOUNT ON"), _first_dml(sql))
+            self.assertEqual(sql.count("%s"), len(params))
+
+    def test_dashboard_batch_text_is_shared_within_a_bucket(self):
+        # mssql-django rewrites any statement containing GROUP BY into a
+        # per-value DECLARE prelude, which would undo the bucketing
+        for loan_cols in (None, LOAN_COLS):
+            five, _ = dashboard_batch([f"P{i}" for i in range(5)], loan_cols, date(2026, 1, 1))
+            seven, _ = dashboard_batch([f"POL{i:06d}" for i in range(7)], loan_cols, date(2026, 1, 1))
+            self.assertNotIn("GROUP BY", five)
+            self.assertEqual(five, seven)
+
+    def test_agent_aggregate_batch_nocount_before_first_dml(self):
+        sql, params = aggregate_batch(["A1", "A2"])
+        self.assertLess(sql.upper().index("SET NOCOUNT ON"), _first_dml(sql))
+        self.assertEqual(sql.count("%s"), len(params))
+        self.assertIn("DROP TABLE #business_agents", sql)
+
+        sql, params = aggregate_batch()
+        self.assertEqual(params, [])
+        self.assertNotIn("#business_agents", sql)
+
+
+class KeysetSeekTest(SimpleTestCase):
+    """
+    Walks a payments table page by page through seek cursors, forwards
+    and back, over NULL dates and several payments per policy and date.
+    sqlite sorts NULLs lowest, like SQL Server.
+    """
+
+    KEYSET = Keyset(
+        ("PaidDate", True, True),
+        ("PolicyNo", True),
+        ("PaymentId", True),
+    )
+
+    def setUp(self):
+        import sqlite3
+
+        self.db = sqlite3.connect(":memory:")
+        self.db.execute("CREATE TABLE pay (PaymentId INTEGER, PolicyNo TEXT, PaidDate TEXT)")
+        rows = []
+        for i in range(1, 41):
+            paid_date = None if i % 7 == 0 else f"2026-0{1 + i % 3}-0{1 + i % 2}"
+            rows.append((i, f"P{i % 4}", paid_date))
+        self.db.executemany("INSERT INTO pay VALUES (?, ?, ?)", rows)
+
+    def _page(self, cursor, size):
+        seek, params = self.KEYSET.seek(cursor)
+        backward = cursor.backward if cursor else False
+        sql = (
+            f"SELECT PaymentId, {self.KEYSET.columns()} FROM pay WHERE 1 = 1 {seek} "
+            f"ORDER BY {self.KEYSET.order_by(backward)} LIMIT ?"
+        ).replace("%s", "?")
+        raw = self.db.execute(sql, [*params, size + 1]).fetchall()
+        raw, first_sn, has_next, has_prev = self.KEYSET.window(raw, size, cursor)
+        rows, keys = self.KEYSET.rows(raw, ("id",))
+        return [r["id"] for r in rows], self.KEYSET.cursors(keys, first_sn, has_next, has_prev)
+
+    def test_forward_and_backward_visit_every_row_once(self):
+        expected = [
+            r[0] for r in self.db.execute(
+                f"SELECT PaymentId FROM pay ORDER BY {self.KEYSET.order_by()}"
+            )
+        ]
+
+        pages = []
+        ids, cursors = self._page(None, 6)
+        pages.append(ids)
+        while cursors["next_cursor"]:
+            ids, cursors = self._page(decode_cursor(cursors["next_cursor"], 3), 6)
+            pages.append(ids)
+        self.assertEqual([i for page in pages for i in page], expected)
+
+        back = [pages[-1]]
+        while cursors["prev_cursor"]:
+            ids, cursors = self._page(decode_cursor(cursors["prev_cursor"], 3), 6)
+            back.append(ids)
+        self.assertEqual(back[::-1], pages)
+
+    def test_unbound_row_key_cannot_seek(self):
+        keyset = Keyset(("PaidDate", True, True), row_key=("tblPremiumPaid", "pp"))
+        self.assertEqual(keyset.width, 2)
+        self.assertFalse(keyset.unique)
+
@@ -1084,10 +1084,10 @@ def policyholder_register_view(request):
         return redirect_login_tab("policy")
 
    # ----------------------------------------------------------
-   # 3) LOOKUP IN CORE VIA FASTAPI (secure + centralized)
+   # 3) LOOKUP POLICY + RELATED POLICIES IN CORE VIA FASTAPI
    # ----------------------------------------------------------
     try:
-        api_url = f"{settings.KYC_API_BASE_URL}/mssql/newpolicies"
+        api_url = f"{settings.KYC_API_BASE_URL}/mssql/identity"
         headers = {"Authorization": f"Bearer {settings.KYC_API_TOKEN}"}
 
         response = requests.get(api_url, params={
@@ -1102,8 +1102,10 @@ def policyholder_register_view(request):
         if response.status_code != 200:
             messages.error(request, "Server error during policy lookup.", extra_tags="error")
             return redirect("kyc:policy_register")
-        # API returns a list → extract first item
-        data = response.json()[0]
+
+        payload = response.json()
+        data = payload["policy"]
+        related = payload["related_policies"]
 
         # Match keys returned by FastAPI
         core_policy_no = data["PolicyNo"]
@@ -1129,27 +1131,8 @@ def policyholder_register_view(request):
         return redirect("kyc:policy_register")
 
     # ----------------------------------------------------------
-    # 5) FIND ALL RELATED POLICIES FROM MSSQL (via FastAPI)
+    # 5) RELATED POLICIES (RETURNED WITH THE LOOKUP ABOVE)
     # ----------------------------------------------------------
-    try:
-        api_url = f"{settings.KYC_API_BASE_URL}/mssql/related-policies"
-        headers = {"Authorization": f"Bearer {settings.KYC_API_TOKEN}"}
-
-        resp = requests.get(api_url, params={
-            "firstname": core_first,
-            "lastname": core_last,
-            "dob": core_dob,
-            "mobile": core_mobile
-        }, headers=headers)
-
-        resp.raise_for_status()
-        related = resp.json()
-
-    except Exception as e:
-        logger.exception("Related policy lookup failed")
-        messages.error(request, "Could not fetch related policies.", extra_tags="error")
-        return redirect("kyc:policy_register")
-
     related_policy_numbers = set(related)
     related_policy_numbers.add(policy_no)
 
@@ -2756,11 +2739,21 @@ def send_mobile_otp(request):
         resp = requests.post(
             f"{settings.API_SERVICE_BASE_URL.rstrip('/')}/otp/send",
             json={"mobile": mobile},
+            # api_service rate-limits per client IP as well as per mobile
+            headers={"X-Forwarded-For": request.META.get("REMOTE_ADDR", "")},
             timeout=10
         )
     except requests.RequestException:
         return JsonResponse({"error": "OTP service unavailable"}, status=503)
 
+    if resp.status_code == 429:
+        response = JsonResponse(
+            {"error": "Too many OTP requests. Please try again later."},
+            status=429,
+        )
+        response["Retry-After"] = resp.headers.get("Retry-After", "60")
+        return response
+
     if resp.status_code != 200:
         return JsonResponse({"error": "Failed to send OTP"}, status=400)
 